@@ -0,0 +1,70 @@
+"""
+JWT authentication for WebSocket connections.
+
+Browsers cannot set an Authorization header on a WebSocket handshake, so
+the access token travels in the query string: /ws/chat/<room>/?token=<jwt>.
+The token is validated locally (signature and expiry, no database), and
+the user is loaded from a small cached profile, so a reconnect storm
+does not turn into one user query per connection.
+"""
+
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import User
+
+PROFILE_TTL = 60 * 5  # seconds; saving or deleting the user drops it earlier
+# Everything the consumers read from scope['user']; other fields load on access
+PROFILE_FIELDS = ('id', 'username', 'profile_picture', 'is_active', 'is_staff')
+
+
+def profile_key(user_id):
+    return f"auth:profile:{user_id}"
+
+
+def get_cached_user(user_id):
+    """User with PROFILE_FIELDS loaded, from the cache when possible; None if missing or inactive"""
+    key = profile_key(user_id)
+    values = cache.get(key)
+    if values is None:
+        values = User.objects.filter(id=user_id).values_list(*PROFILE_FIELDS).first()
+        if values is None:
+            return None
+        cache.set(key, values, PROFILE_TTL)
+    user = User.from_db('default', PROFILE_FIELDS, values)
+    return user if user.is_active else None
+
+
+def user_from_token(raw_token):
+    """Validate an access token locally and resolve its user; None if invalid"""
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return get_cached_user(user_id) if user_id else None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Sets scope['user'] from the `token` query parameter, or AnonymousUser
+    when the token is missing or invalid. A user already present in the
+    scope (e.g. set by an outer middleware) is kept when there is no token.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        raw_token = (query.get('token') or [None])[0]
+        if raw_token:
+            user = await database_sync_to_async(user_from_token, thread_sensitive=False)(raw_token)
+            scope = dict(scope, user=user or AnonymousUser())
+        elif 'user' not in scope:
+            scope = dict(scope, user=AnonymousUser())
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,15 @@
+"""
+Authentication Signals - Keep cached WebSocket profiles fresh
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .middleware import profile_key
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_profile(sender, instance, **kwargs):
+    cache.delete(profile_key(instance.pk))
@@ -1,15 +1,45 @@
+import asyncio
 import json
+import uuid
+
 from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
+from django.db.models import Max
 from django.utils import timezone
-from .models import ChatRoom, Message, TypingStatus
+from django.utils.dateparse import parse_datetime
+from .membership import room_participants
+from .models import ChatRoom, Message
+from .pipeline import enqueue_message
+from .presence import set_typing
 from apps.authentication.models import User
 
+READ_RECEIPT_WINDOW = 1.0  # seconds of read receipts coalesced into one update
+
+
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f'chat_{self.room_id}'
-        self.user = self.scope['user']
+        self.user = self.scope.get('user')
+        self.room = None
+        
+        # Read receipts waiting for the next flush
+        self.read_message_ids = set()
+        self.read_up_to = None
+        self.last_read_message_id = None
+        self.read_flush = None
+        
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4003)
+            return
+        
+        # Participants come from the membership cache: no query on reconnects
+        participants = await database_sync_to_async(room_participants, thread_sensitive=False)(self.room_id)
+        if self.user.id not in participants:
+            await self.close(code=4003)
+            return
+        self.room = ChatRoom(id=self.room_id, participant_1_id=participants[0], participant_2_id=participants[1])
         
         # Join room group
         await self.channel_layer.group_add(
@@ -26,14 +56,23 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
     
     async def disconnect(self, close_code):
+        if self.room is None:
+            return  # rejected in connect
+        
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
         
-        # Set typing status to false
-        await self.update_typing_status(False)
+        # Clear typing indicator
+        await self.handle_typing({'is_typing': False})
+        
+        # Apply read receipts still waiting for their window
+        if self.read_flush is not None:
+            self.read_flush.cancel()
+            self.read_flush = None
+            await self.flush_read_receipts()
     
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -51,12 +90,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
         shared_content_id = data.get('shared_content_id')
         msg_type = data.get('message_type', 'text')
         
-        # Save message to database
-        message = await self.save_message(
-            message_text, 
-            msg_type, 
-            shared_content_id
+        # Queue the message (write-behind, see pipeline.py); it is
+        # persisted by the next flush, so broadcast right away
+        message = Message(
+            chat_room_id=self.room_id,
+            sender=self.user,
+            message_text=message_text,
+            message_type=msg_type,
+            shared_content_id=shared_content_id
         )
+        await sync_to_async(enqueue_message, thread_sensitive=False)(message)
         
         # Send message to room group
         await self.channel_layer.group_send(
@@ -89,10 +132,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
     
     async def handle_typing(self, data):
-        is_typing = data.get('is_typing', False)
+        is_typing = bool(data.get('is_typing', False))
         
-        # Update typing status
-        await self.update_typing_status(is_typing)
+        # Cache-only and throttled (see presence.py); no database writes
+        should_broadcast = await sync_to_async(set_typing, thread_sensitive=False)(
+            self.room_id, self.user.id, is_typing
+        )
+        if not should_broadcast:
+            return
         
         # Broadcast typing status
         await self.channel_layer.group_send(
@@ -116,10 +163,42 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }))
     
     async def handle_read_receipt(self, data):
+        # Read state is a per-participant high-water mark, so only the newest
+        # message read in a window matters: receipts are coalesced for
+        # READ_RECEIPT_WINDOW seconds, then applied and broadcast once.
+        # Clients should send the message's "timestamp" as broadcast; bare
+        # message ids are looked up, which misses messages not flushed yet.
         message_id = data.get('message_id')
+        if message_id:
+            self.read_message_ids.add(message_id)
+            self.last_read_message_id = message_id
         
-        # Mark message as read
-        await self.mark_message_read(message_id)
+        try:
+            timestamp = parse_datetime(data.get('timestamp') or '')
+        except ValueError:
+            timestamp = None
+        if timestamp and timezone.is_naive(timestamp):
+            timestamp = None  # broadcast timestamps always carry an offset
+        if timestamp and (self.read_up_to is None or timestamp > self.read_up_to):
+            self.read_up_to = timestamp
+        
+        if self.read_flush is None:
+            self.read_flush = asyncio.create_task(self.flush_read_receipts_later())
+    
+    async def flush_read_receipts_later(self):
+        await asyncio.sleep(READ_RECEIPT_WINDOW)
+        self.read_flush = None
+        await self.flush_read_receipts()
+    
+    async def flush_read_receipts(self):
+        message_ids, up_to, message_id = self.read_message_ids, self.read_up_to, self.last_read_message_id
+        self.read_message_ids, self.read_up_to = set(), None
+        if not message_ids and up_to is None:
+            return
+        
+        last_read_at = await self.save_read_mark(message_ids, up_to)
+        if last_read_at is None:
+            return  # mark did not move
         
         # Send read receipt to sender
         await self.channel_layer.group_send(
@@ -127,7 +206,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             {
                 'type': 'read_receipt_broadcast',
                 'message_id': message_id,
-                'reader_id': str(self.user.id)
+                'reader_id': str(self.user.id),
+                'last_read_at': last_read_at.isoformat()
             }
         )
     
@@ -135,47 +215,26 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'read_receipt',
             'message_id': event['message_id'],
-            'reader_id': event['reader_id']
+            'reader_id': event['reader_id'],
+            'last_read_at': event['last_read_at']
         }))
     
     @database_sync_to_async
-    def save_message(self, message_text, msg_type, shared_content_id):
-        chat_room = ChatRoom.objects.get(id=self.room_id)
-        message = Message.objects.create(
-            chat_room=chat_room,
-            sender=self.user,
-            message_text=message_text,
-            message_type=msg_type,
-            shared_content_id=shared_content_id
-        )
-        
-        # Update chat room
-        chat_room.last_message_text = message_text[:100]
-        chat_room.last_message_at = timezone.now()
-        chat_room.last_message_sender = self.user
-        chat_room.save()
+    def save_read_mark(self, message_ids, up_to):
+        """Move this user's mark to the newest receipt (one UPDATE); returns the new mark or None"""
+        valid_ids = []
+        for message_id in message_ids:
+            try:
+                valid_ids.append(uuid.UUID(str(message_id)))
+            except ValueError:
+                continue
+        if valid_ids:
+            latest = Message.objects.filter(chat_room_id=self.room_id, id__in=valid_ids).aggregate(
+                latest=Max('created_at')
+            )['latest']
+            up_to = max(filter(None, (up_to, latest)), default=None)
+        if up_to is None:
+            return None
+        up_to = min(up_to, timezone.now())
         
-        return message
-    
-    @database_sync_to_async
-    def update_typing_status(self, is_typing):
-        chat_room = ChatRoom.objects.get(id=self.room_id)
-        TypingStatus.objects.update_or_create(
-            chat_room=chat_room,
-            user=self.user,
-            defaults={
-                'is_typing': is_typing,
-                'last_updated': timezone.now()
-            }
-        )
-    
-    @database_sync_to_async
-    def mark_message_read(self, message_id):
-        try:
-            message = Message.objects.get(id=message_id)
-            if message.sender != self.user:
-                message.is_read = True
-                message.read_at = timezone.now()
-                message.save()
-        except Message.DoesNotExist:
-            pass
+        return up_to if self.room.mark_read(self.user.id, up_to) else None
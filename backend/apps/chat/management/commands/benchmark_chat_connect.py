@@ -0,0 +1,104 @@
+import asyncio
+import statistics
+import time
+import uuid
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.authentication.models import User
+from apps.chat.models import ChatRoom
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+# Process-local stand-in for Redis, so the run measures our code rather than the network
+LOCAL_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'bench',
+    'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Connect-storm benchmark for the chat WebSocket: every participant connects at once with a JWT, '
+        'disconnects, then all reconnect at once. Reports connect latency and database queries per storm.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=10000, help='Simultaneous connections per storm')
+        parser.add_argument('--real-cache', action='store_true',
+                            help='Use the configured cache instead of a local in-memory stand-in')
+
+    def handle(self, *args, **options):
+        from popcult_project.asgi import application
+
+        tag = uuid.uuid4().hex[:8]
+        count = options['connections'] + options['connections'] % 2
+        users = User.objects.bulk_create([
+            User(email=f'bench-{tag}-{i}@example.com', phone_number=f'+7{tag[:4]}{i:06d}'[:15],
+                 username=f'bench_{tag}_{i}', password=make_password(None))
+            for i in range(count)
+        ])
+        now = timezone.now()
+        rooms = ChatRoom.objects.bulk_create([
+            ChatRoom(participant_1=users[i], participant_2=users[i + 1], last_message_at=now,
+                     participant_1_last_read_at=now, participant_2_last_read_at=now)
+            for i in range(0, count, 2)
+        ])
+        clients = [
+            (f'/ws/chat/{room.id}/?token={AccessToken.for_user(user)}')
+            for room in rooms for user in (room.participant_1, room.participant_2)
+        ]
+
+        statements = {'queries': 0}
+
+        def count_query(execute, sql, params, many, context):
+            statements['queries'] += 1
+            return execute(sql, params, many, context)
+
+        def instrument(sender, connection, **kwargs):
+            connection.execute_wrappers.append(count_query)
+
+        cache_settings = {} if options['real_cache'] else {'CACHES': LOCAL_CACHE}
+        connection_created.connect(instrument)
+        connection.execute_wrappers.append(count_query)
+        self.stdout.write(f'{"storm":>8} {"connects":>9} {"per s":>7} {"p50 ms":>8} {"p95 ms":>8} {"queries":>8}')
+        try:
+            with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, **cache_settings):
+                for storm in ('cold', 'reconnect'):
+                    statements['queries'] = 0
+                    elapsed, latencies = asyncio.run(self.storm(application, clients))
+                    latencies.sort()
+                    self.stdout.write(
+                        f'{storm:>8} {len(latencies):>9} {len(latencies) / elapsed:>7.0f} '
+                        f'{statistics.median(latencies) * 1000:>8.1f} '
+                        f'{latencies[int(len(latencies) * 0.95) - 1] * 1000:>8.1f} {statements["queries"]:>8}'
+                    )
+        finally:
+            connection_created.disconnect(instrument)
+            connection.execute_wrappers.remove(count_query)
+            ChatRoom.objects.filter(id__in=[room.id for room in rooms]).delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    async def storm(self, application, clients):
+        communicators = [WebsocketCommunicator(application, path) for path in clients]
+        latencies = []
+
+        async def connect(communicator):
+            started = time.perf_counter()
+            connected, code = await communicator.connect(timeout=120)
+            if not connected:
+                raise RuntimeError(f'Connection rejected with code {code}')
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(connect(communicator) for communicator in communicators))
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+        return elapsed, latencies
@@ -0,0 +1,130 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.chat.models import ChatRoom, Message
+from apps.chat.search import search_messages
+
+# Synthetic messages draw 8 words from this vocabulary; the last words are rare
+VOCABULARY = (
+    'movie tonight watch dinner popcorn trailer cinema review plot actor scene ending sequel '
+    'ticket seats weekend friday late early great boring amazing funny scary long short '
+    'dune oppenheimer barbie interstellar inception parasite arrival'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark chat message search on PostgreSQL against a synthetic messages table '
+        '(50M rows by default). Generates users, rooms and messages tagged as benchmark data, '
+        'times first-page searches as the API runs them and prints one query plan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=50_000_000, help='Synthetic messages to generate')
+        parser.add_argument('--rooms', type=int, default=100_000, help='Rooms to spread them over')
+        parser.add_argument('--searches', type=int, default=200, help='Searches to time')
+        parser.add_argument('--batch-rooms', type=int, default=1000, help='Rooms filled per INSERT')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data afterwards')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Message search benchmarks need PostgreSQL (tsvector + GIN)')
+
+        tag = uuid.uuid4().hex[:8]
+        rooms = self.create_rooms(tag, options['rooms'])
+        try:
+            self.fill_messages(rooms, options['messages'], options['batch_rooms'])
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Message._meta.db_table}')
+            self.run_searches(rooms, options['searches'])
+        finally:
+            if not options['keep']:
+                self.cleanup(rooms)
+
+    def create_rooms(self, tag, count):
+        self.stdout.write(f'Creating {count} rooms...')
+        users = User.objects.bulk_create([
+            User(email=f'search-{tag}-{i}@example.com', phone_number=f'+6{tag[:4]}{i:07d}'[:15],
+                 username=f'search_{tag}_{i}', password=make_password(None))
+            for i in range(count * 2)
+        ], batch_size=5000)
+        now = timezone.now()
+        return ChatRoom.objects.bulk_create([
+            ChatRoom(participant_1=users[i], participant_2=users[i + 1], last_message_at=now,
+                     participant_1_last_read_at=now, participant_2_last_read_at=now)
+            for i in range(0, len(users), 2)
+        ], batch_size=5000)
+
+    def fill_messages(self, rooms, total, batch_rooms):
+        per_room = max(total // len(rooms), 1)
+        vocabulary = "ARRAY[%s]" % ', '.join(f"'{word}'" for word in VOCABULARY)
+        table = Message._meta.db_table
+        started = time.perf_counter()
+        for start in range(0, len(rooms), batch_rooms):
+            room_ids = [room.id for room in rooms[start:start + batch_rooms]]
+            with connection.cursor() as cursor:
+                # Words are skewed towards the start of the vocabulary (power law)
+                cursor.execute(
+                    f'''
+                    INSERT INTO {table}
+                        (id, chat_room_id, sender_id, message_text, message_type, is_read, created_at)
+                    SELECT gen_random_uuid(), r.id,
+                           CASE WHEN g % 2 = 0 THEN r.participant_1_id ELSE r.participant_2_id END,
+                           array_to_string(ARRAY(
+                               SELECT ({vocabulary})[1 + floor(power(random(), 2) * {len(VOCABULARY)})::int]
+                               FROM generate_series(1, 8) WHERE g > 0
+                           ), ' '),
+                           'text', false, now() - make_interval(secs => g * 60)
+                    FROM {ChatRoom._meta.db_table} r CROSS JOIN generate_series(1, %s) g
+                    WHERE r.id = ANY(%s)
+                    ''',
+                    [per_room, room_ids],
+                )
+            done = min(start + batch_rooms, len(rooms)) * per_room
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {done:,} messages ({done / elapsed:,.0f}/s)')
+
+    def run_searches(self, rooms, searches):
+        timings = {}
+        plan = None
+        for _ in range(searches):
+            room = random.choice(rooms)
+            user = User(id=room.participant_1_id)
+            term = random.choice(VOCABULARY)
+            queryset = search_messages(user, term).order_by('-created_at')[:21]
+            started = time.perf_counter()
+            list(queryset)
+            timings.setdefault(term, []).append(time.perf_counter() - started)
+            if plan is None:
+                plan = queryset.explain(analyze=True)
+
+        self.stdout.write(f'\n{"term":>14} {"searches":>9} {"p50 ms":>8} {"max ms":>8}')
+        for term in VOCABULARY:
+            if term in timings:
+                values = sorted(timings[term])
+                self.stdout.write(
+                    f'{term:>14} {len(values):>9} {statistics.median(values) * 1000:>8.2f} {values[-1] * 1000:>8.2f}'
+                )
+        everything = sorted(t for values in timings.values() for t in values)
+        self.stdout.write(self.style.SUCCESS(
+            f'\nAll searches: p50 {statistics.median(everything) * 1000:.2f} ms, '
+            f'p95 {everything[int(len(everything) * 0.95) - 1] * 1000:.2f} ms'
+        ))
+        self.stdout.write(f'\nPlan of the first search:\n{plan}')
+
+    def cleanup(self, rooms):
+        self.stdout.write('Removing synthetic data...')
+        room_ids = [room.id for room in rooms]
+        user_ids = [user_id for room in rooms for user_id in (room.participant_1_id, room.participant_2_id)]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Message._meta.db_table} WHERE chat_room_id = ANY(%s)', [room_ids])
+        ChatRoom.objects.filter(id__in=room_ids)._raw_delete(connection.alias)
+        User.objects.filter(id__in=user_ids).delete()
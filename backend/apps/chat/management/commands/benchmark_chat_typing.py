@@ -0,0 +1,108 @@
+import asyncio
+import time
+import uuid
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from apps.authentication.models import User
+from apps.chat.models import ChatRoom
+from apps.chat.routing import websocket_urlpatterns
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test typing indicators through the chat WebSocket consumer in-process. '
+        'Reports typing events, broadcasts and the database statements they caused; '
+        'the previous implementation wrote one TypingStatus row per event.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=50, help='Concurrent chat rooms')
+        parser.add_argument('--events', type=int, default=40, help='Typing events per participant')
+        parser.add_argument('--interval', type=float, default=0.05,
+                            help='Seconds between a participant\'s typing events (keystroke rate)')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(email=f'bench-{tag}-{i}@example.com', phone_number=f'+8{tag[:4]}{i:06d}'[:15],
+                 username=f'bench_{tag}_{i}', password=make_password(None))
+            for i in range(options['rooms'] * 2)
+        ])
+        rooms = [
+            ChatRoom.objects.create(participant_1=users[i], participant_2=users[i + 1])
+            for i in range(0, len(users), 2)
+        ]
+
+        statements = {'queries': 0, 'writes': 0}
+
+        def count(execute, sql, params, many, context):
+            statements['queries'] += 1
+            if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+                statements['writes'] += 1
+            return execute(sql, params, many, context)
+
+        def instrument(sender, connection, **kwargs):
+            connection.execute_wrappers.append(count)
+
+        connection_created.connect(instrument)
+        connection.execute_wrappers.append(count)
+        try:
+            with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER):
+                elapsed, broadcasts = asyncio.run(self.run(rooms, users, options['events'], options['interval']))
+        finally:
+            connection_created.disconnect(instrument)
+            connection.execute_wrappers.remove(count)
+            ChatRoom.objects.filter(id__in=[room.id for room in rooms]).delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+        events = len(users) * (options['events'] + 1)  # + the final "stopped typing"
+        self.stdout.write(f'typing events:        {events} in {elapsed:.2f}s ({events / elapsed:.0f}/s)')
+        self.stdout.write(f'broadcasts delivered: {broadcasts}')
+        self.stdout.write(f'database queries:     {statements["queries"]}')
+        self.stdout.write(f'database writes:      {statements["writes"]} (previously at least {events})')
+
+    async def run(self, rooms, users, events, interval):
+        application = URLRouter(websocket_urlpatterns)
+        pairs = []
+        for i, room in enumerate(rooms):
+            pair = []
+            for user in users[i * 2:i * 2 + 2]:
+                communicator = WebsocketCommunicator(application, f'/ws/chat/{room.id}/')
+                communicator.scope['user'] = user
+                connected, _ = await communicator.connect()
+                if not connected:
+                    raise RuntimeError(f'Could not connect to room {room.id}')
+                await communicator.receive_json_from()  # connection_established
+                pair.append(communicator)
+            pairs.append(pair)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.type(communicator, events, interval) for pair in pairs for communicator in pair
+        ))
+        elapsed = time.perf_counter() - started
+
+        broadcasts = 0
+        for pair in pairs:
+            for communicator in pair:
+                while not await communicator.receive_nothing(timeout=0.05):
+                    await communicator.receive_from()
+                    broadcasts += 1
+                await communicator.disconnect()
+        return elapsed, broadcasts
+
+    async def type(self, communicator, events, interval):
+        for _ in range(events):
+            await communicator.send_json_to({'type': 'typing', 'is_typing': True})
+            await asyncio.sleep(interval)
+        await communicator.send_json_to({'type': 'typing', 'is_typing': False})
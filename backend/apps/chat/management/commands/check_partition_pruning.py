@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import RequestFactory
+
+from apps.chat.models import Message
+from apps.chat.views import InboxView
+from apps.notifications.models import Notification
+from apps.users.models import UserActivity
+from utils.partitioning import is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN ANALYZE the hot-path queries on partitioned tables (PostgreSQL) and report how many '
+        'partitions each one actually read. Fails if a query that should prune read every partition.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partition pruning can only be checked on PostgreSQL')
+        with connection.cursor() as cursor:
+            missing = [t for t in ('messages', 'notifications', 'user_activities') if not is_partitioned(cursor, t)]
+        if missing:
+            raise CommandError(f"Not partitioned yet: {', '.join(missing)}")
+
+        latest = Message.objects.order_by('-created_at').select_related('chat_room').first()
+        if latest is None:
+            raise CommandError('No messages to sample queries from')
+        room = latest.chat_room
+        user = room.participant_1
+        older_than = room.messages.order_by('-created_at').values_list('created_at', flat=True)[30:31].first()
+
+        request = RequestFactory().get('/api/chat/inbox/')
+        request.user = user
+        inbox = InboxView(request=request, kwargs={}).get_queryset()
+
+        # (label, table, queryset, expected to prune)
+        checks = [
+            ('chat history, first page', 'messages', room.messages.order_by('-created_at')[:31], True),
+            ('chat history, older page', 'messages',
+             room.messages.filter(created_at__lt=older_than or latest.created_at).order_by('-created_at')[:31], True),
+            ('chat inbox unread counts', 'messages', inbox.order_by(F('last_message_at').desc(nulls_last=True), '-created_at', '-id')[:51], True),
+            ('notification list', 'notifications',
+             Notification.objects.filter(user=user).order_by('-created_at')[:20], True),
+            ('unread notification count', 'notifications',
+             Notification.objects.filter(user=user, is_read=False), False),
+            ('activity feed', 'user_activities',
+             UserActivity.objects.filter(user=user).order_by('-created_at')[:50], True),
+        ]
+
+        failures = []
+        self.stdout.write(f'{"query":<28} {"table":<16} {"read":>5} {"of":>4}')
+        for label, table, queryset, should_prune in checks:
+            plan = json.loads(queryset.explain(format='json', analyze=True))
+            read, total = self.partitions_read(plan, table)
+            status = ''
+            if should_prune and total > 1 and read >= total:
+                status = '  NOT PRUNED'
+                failures.append(label)
+            self.stdout.write(f'{label:<28} {table:<16} {read:>5} {total:>4}{status}')
+
+        if failures:
+            raise CommandError(f"Queries reading every partition: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot-path queries prune partitions'))
+
+    def partitions_read(self, plan, table):
+        """Partitions of `table` the plan executed at least once, and how many the table has"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                'WHERE i.inhparent = to_regclass(%s)',
+                [table],
+            )
+            partitions = {name for (name,) in cursor.fetchall()}
+
+        read = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node.get('Relation Name') in partitions and node.get('Actual Loops', 0) > 0:
+                read.add(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return len(read), len(partitions)
@@ -0,0 +1,37 @@
+"""
+Cached room membership for WebSocket connects.
+
+A room's participant pair never changes after creation, so it is cached
+per room id (Redis in production) and dropped whenever the room is saved
+or deleted (see signals.py). Unknown rooms are cached as an empty pair.
+"""
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .models import ChatRoom
+
+MEMBERSHIP_TTL = 60 * 60  # seconds
+
+
+def membership_key(room_id):
+    return f"chat:room:participants:{room_id}"
+
+
+def room_participants(room_id):
+    """(participant_1_id, participant_2_id) of a room, or () if it does not exist"""
+    key = membership_key(room_id)
+    participants = cache.get(key)
+    if participants is None:
+        try:
+            participants = ChatRoom.objects.filter(id=room_id).values_list(
+                "participant_1_id", "participant_2_id"
+            ).first() or ()
+        except ValidationError:  # not a UUID
+            participants = ()
+        cache.set(key, participants, MEMBERSHIP_TTL)
+    return participants
+
+
+def invalidate_room(room_id):
+    cache.delete(membership_key(room_id))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_alter_chatroom_created_at_alter_message_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['participant_1', '-last_message_at', '-created_at'], name='chat_rooms_partici_7d1dd5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['participant_2', '-last_message_at', '-created_at'], name='chat_rooms_partici_324ad3_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:25
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_read_marks(apps, schema_editor):
+    # Each participant has read up to the newest message from the other one flagged as read
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    for participant in ('participant_1', 'participant_2'):
+        last_read = (
+            Message.objects.filter(chat_room=models.OuterRef('pk'), is_read=True)
+            .exclude(sender=models.OuterRef(participant))
+            .order_by()
+            .values('chat_room')
+            .annotate(last=models.Max('created_at'))
+            .values('last')
+        )
+        ChatRoom.objects.update(**{
+            f'{participant}_last_read_at': Coalesce(models.Subquery(last_read), models.F('created_at'))
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='participant_1_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='participant_2_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_read_marks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Matches apps.chat.search.SEARCH_CONFIG
+SEARCH_CONFIG = 'simple'
+
+
+def create_search_index(apps, schema_editor):
+    # Stored tsvector plus a per-room GIN index for message search; PostgreSQL only.
+    # btree_gin lets chat_room_id (a plain uuid) share the GIN index with the tsvector.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+        schema_editor.execute(
+            'ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector '
+            f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', coalesce(message_text, ''))) STORED"
+        )
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS messages_search_gin ON messages USING gin (chat_room_id, search_vector)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS messages_search_gin')
+        schema_editor.execute('ALTER TABLE messages DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_read_marks'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from utils.partitioning import convert_to_partitioned
+
+
+def partition_by_month(apps, schema_editor):
+    # Monthly range partitions on created_at; PostgreSQL only (see utils/partitioning.py)
+    convert_to_partitioned(schema_editor, 'messages')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_message_search'),
+    ]
+
+    operations = [
+        # Reversing leaves the table partitioned; earlier migrations work with it as well
+        migrations.RunPython(partition_by_month, migrations.RunPython.noop),
+    ]
@@ -28,6 +28,10 @@ class ChatRoom(models.Model):
         User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
     )
 
+    # Read state per participant: every message up to this time is read
+    participant_1_last_read_at = models.DateTimeField(null=True, blank=True)
+    participant_2_last_read_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -35,8 +39,17 @@ class ChatRoom(models.Model):
         db_table = "chat_rooms"
         ordering = ["-last_message_at"]
         unique_together = ("participant_1", "participant_2")
+        indexes = [
+            # Inbox: a user's rooms by latest message, from either side; rooms
+            # without messages (last_message_at NULL) sort last, by age
+            models.Index(fields=["participant_1", "-last_message_at", "-created_at"]),
+            models.Index(fields=["participant_2", "-last_message_at", "-created_at"]),
+        ]
 
     def save(self, *args, **kwargs):
+        # Nothing in a new room is unread: both read marks start at its creation
+        if self._state.adding and self.participant_1_last_read_at is None:
+            self.participant_1_last_read_at = self.participant_2_last_read_at = timezone.now()
         if self.participant_1 and self.participant_2:
             if str(self.participant_1.id) > str(self.participant_2.id):
                 self.participant_1, self.participant_2 = (
@@ -45,6 +58,30 @@ class ChatRoom(models.Model):
                 )
         super().save(*args, **kwargs)
 
+    def last_read_field(self, user_id):
+        """Name of the high-water mark column of a participant"""
+        if user_id == self.participant_1_id:
+            return "participant_1_last_read_at"
+        if user_id == self.participant_2_id:
+            return "participant_2_last_read_at"
+        raise ValueError(f"{user_id} is not a participant of chat room {self.id}")
+
+    def last_read_at(self, user_id):
+        return getattr(self, self.last_read_field(user_id))
+
+    def mark_read(self, user_id, up_to):
+        """
+        Move a participant's mark forward to `up_to` with one UPDATE;
+        marks never move back. Returns True if the mark moved.
+        """
+        field = self.last_read_field(user_id)
+        moved = ChatRoom.objects.filter(
+            models.Q(**{f"{field}__isnull": True}) | models.Q(**{f"{field}__lt": up_to}), id=self.id
+        ).update(**{field: up_to})
+        if moved:
+            setattr(self, field, up_to)
+        return bool(moved)
+
     def get_other_participant(self, user):
         if user == self.participant_1:
             return self.participant_2
@@ -80,15 +117,20 @@ class Message(models.Model):
 
     shared_content_id = models.TextField(blank=True, null=True)
 
+    # Legacy per-message flags; read state is the room's per-participant mark
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Assigned by the sender's consumer, before the write-behind flush
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = "messages"
         ordering = ["created_at"]
-        indexes = [models.Index(fields=["chat_room", "created_at"])]
+        indexes = [
+            # History pages and unread counts (created_at past the reader's mark)
+            models.Index(fields=["chat_room", "created_at"]),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} in {self.chat_room.id}"
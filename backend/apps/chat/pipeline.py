@@ -0,0 +1,208 @@
+"""
+Write-behind persistence for chat messages.
+
+The consumer gives each message its final id and created_at, appends it
+to a durable queue and broadcasts it right away; flush_messages() (run
+by the flush_chat_messages task) later writes queued messages in batches
+with one bulk insert plus one last_message_* update per room.
+
+Guarantees:
+- Durability: a message is broadcast only after the queue accepted it.
+- At-least-once: entries are acknowledged only after the transaction
+  that wrote them commits. Entries read by a writer that died are handed
+  out again once they have been pending for CHAT_MESSAGE_CLAIM_AFTER
+  seconds. Redelivered messages keep their id, so the insert ignores
+  them and each message is stored exactly once.
+- Ordering: history is ordered by the created_at the consumer assigned,
+  not by when a batch happened to be flushed. A room's last_message_*
+  only moves forward in time, so late or redelivered batches never
+  replace a newer preview.
+- Visibility: a message shows up in the REST history once flushed, i.e.
+  within one flush interval.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.authentication.models import User
+from .models import ChatRoom, Message
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+class RedisStreamQueue:
+    """Queue on a Redis stream, read through a consumer group shared by all writers"""
+
+    def __init__(self, url, stream='chat:messages', group='chat-writers', claim_after=60):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.stream = stream
+        self.group = group
+        self.consumer = f'{socket.gethostname()}-{os.getpid()}'
+        self.claim_after_ms = int(claim_after * 1000)
+        try:
+            self.client.xgroup_create(stream, group, id='0', mkstream=True)
+        except redis.ResponseError as exc:
+            if 'BUSYGROUP' not in str(exc):
+                raise
+
+    def append(self, payload):
+        return self.client.xadd(self.stream, {'data': json.dumps(payload)})
+
+    def read(self, count):
+        """Up to `count` (entry_id, payload) pairs: stale pending entries first, then new ones"""
+        _, entries, *_ = self.client.xautoclaim(
+            self.stream, self.group, self.consumer, self.claim_after_ms, start_id='0-0', count=count
+        )
+        if len(entries) < count:
+            for _, new_entries in self.client.xreadgroup(
+                self.group, self.consumer, {self.stream: '>'}, count=count - len(entries)
+            ):
+                entries.extend(new_entries)
+        return [(entry_id, json.loads(fields['data'])) for entry_id, fields in entries if fields]
+
+    def ack(self, entry_ids):
+        if entry_ids:
+            self.client.xack(self.stream, self.group, *entry_ids)
+            self.client.xdel(self.stream, *entry_ids)
+
+
+class InMemoryQueue:
+    """
+    Process-local queue with the same delivery semantics as the stream;
+    for development and tests only (not durable, not shared between processes).
+    """
+
+    def __init__(self, claim_after=60):
+        self.claim_after = claim_after
+        self.entries = OrderedDict()  # entry_id -> payload
+        self.pending = {}  # entry_id -> time handed out
+        self.lock = threading.Lock()
+        self.last_id = 0
+
+    def append(self, payload):
+        with self.lock:
+            self.last_id += 1
+            self.entries[self.last_id] = payload
+            return self.last_id
+
+    def read(self, count):
+        now = time.monotonic()
+        with self.lock:
+            batch = []
+            for entry_id, payload in self.entries.items():
+                handed_out = self.pending.get(entry_id)
+                if handed_out is None or now - handed_out >= self.claim_after:
+                    self.pending[entry_id] = now
+                    batch.append((entry_id, payload))
+                    if len(batch) == count:
+                        break
+            return batch
+
+    def ack(self, entry_ids):
+        with self.lock:
+            for entry_id in entry_ids:
+                self.entries.pop(entry_id, None)
+                self.pending.pop(entry_id, None)
+
+
+_queues = {}
+
+
+def get_message_queue():
+    """The queue selected by CHAT_MESSAGE_QUEUE ('redis' or 'memory'), one per process"""
+    backend = settings.CHAT_MESSAGE_QUEUE
+    if backend not in _queues:
+        if backend == 'redis':
+            _queues[backend] = RedisStreamQueue(
+                settings.CHAT_MESSAGE_STREAM_URL, claim_after=settings.CHAT_MESSAGE_CLAIM_AFTER
+            )
+        elif backend == 'memory':
+            _queues[backend] = InMemoryQueue(claim_after=settings.CHAT_MESSAGE_CLAIM_AFTER)
+        else:
+            raise ValueError(f"Unknown CHAT_MESSAGE_QUEUE {backend!r}")
+    return _queues[backend]
+
+
+def message_payload(message: Message):
+    """Queue entry for a message that has its id and created_at but is not saved yet"""
+    return {
+        'id': str(message.id),
+        'chat_room_id': str(message.chat_room_id),
+        'sender_id': str(message.sender_id),
+        'message_text': message.message_text,
+        'message_type': message.message_type,
+        'shared_content_id': message.shared_content_id,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def enqueue_message(message: Message, queue=None):
+    (queue or get_message_queue()).append(message_payload(message))
+
+
+def flush_messages(queue=None, batch_size=FLUSH_BATCH_SIZE):
+    """
+    Write one batch of queued messages; returns how many entries were read.
+    Messages for rooms or senders that no longer exist are dropped.
+    """
+    queue = queue or get_message_queue()
+    entries = queue.read(batch_size)
+    if not entries:
+        return 0
+
+    payloads = [payload for _, payload in entries]
+    room_ids = {str(pk) for pk in ChatRoom.objects.filter(
+        id__in={p['chat_room_id'] for p in payloads}
+    ).values_list('id', flat=True)}
+    sender_ids = {str(pk) for pk in User.objects.filter(
+        id__in={p['sender_id'] for p in payloads}
+    ).values_list('id', flat=True)}
+
+    messages, latest = [], {}
+    for payload in payloads:
+        if payload['chat_room_id'] not in room_ids or payload['sender_id'] not in sender_ids:
+            logger.warning("Dropping queued message %s for a deleted room or sender", payload['id'])
+            continue
+        message = Message(
+            id=payload['id'],
+            chat_room_id=payload['chat_room_id'],
+            sender_id=payload['sender_id'],
+            message_text=payload['message_text'],
+            message_type=payload['message_type'],
+            shared_content_id=payload['shared_content_id'],
+            created_at=parse_datetime(payload['created_at']),
+        )
+        messages.append(message)
+        current = latest.get(message.chat_room_id)
+        if current is None or message.created_at >= current.created_at:
+            latest[message.chat_room_id] = message
+
+    with transaction.atomic():
+        Message.objects.bulk_create(messages, ignore_conflicts=True)
+        now = timezone.now()
+        for room_id, message in latest.items():
+            ChatRoom.objects.filter(
+                Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at), id=room_id
+            ).update(
+                last_message_text=message.message_text[:100],
+                last_message_at=message.created_at,
+                last_message_sender_id=message.sender_id,
+                updated_at=now,
+            )
+    queue.ack([entry_id for entry_id, _ in entries])
+    return len(entries)
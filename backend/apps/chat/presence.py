@@ -0,0 +1,43 @@
+"""
+Ephemeral chat presence (typing indicators).
+
+Typing state is transient, so it lives in short-lived cache keys (Redis
+in production) instead of the database: a key per (room, user) that
+expires on its own if the client vanishes without saying it stopped.
+Broadcasts are throttled server-side to one "is typing" per user per
+interval, however often the client fires keystroke events.
+"""
+
+from django.core.cache import cache
+
+TYPING_TTL = 6  # seconds a "typing" state survives without a refresh
+TYPING_THROTTLE = 2  # seconds between "is typing" broadcasts per user
+
+
+def typing_key(room_id, user_id):
+    return f"chat:typing:{room_id}:{user_id}"
+
+
+def _throttle_key(room_id, user_id):
+    return f"chat:typing:throttle:{room_id}:{user_id}"
+
+
+def set_typing(room_id, user_id, is_typing):
+    """
+    Record a typing event; returns True when it should be broadcast.
+    "Started typing" is broadcast at most once per TYPING_THROTTLE;
+    "stopped typing" only when the user was marked as typing.
+    """
+    key = typing_key(room_id, user_id)
+    if is_typing:
+        cache.set(key, True, TYPING_TTL)
+        return cache.add(_throttle_key(room_id, user_id), True, TYPING_THROTTLE)
+
+    cache.delete(_throttle_key(room_id, user_id))
+    return cache.delete(key)
+
+
+def typing_user_ids(room_id, user_ids):
+    """Which of `user_ids` are currently typing in the room (one cache round trip)"""
+    keys = {typing_key(room_id, user_id): user_id for user_id in user_ids}
+    return [keys[key] for key in cache.get_many(list(keys))]
@@ -0,0 +1,35 @@
+"""
+Full-text search over chat messages.
+
+On PostgreSQL, messages.search_vector is a stored generated tsvector
+column with a GIN index on (chat_room_id, search_vector) (btree_gin), so a
+search only reads the index entries of the caller's rooms instead of
+scanning the table. The column is created by migration 0006 and is not
+a model field; other databases fall back to icontains within the
+caller's rooms.
+"""
+
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
+
+from .models import ChatRoom, Message
+
+# No stemming or stop words: conversations mix languages, slang and titles
+SEARCH_CONFIG = "simple"
+MIN_QUERY_LENGTH = 2
+
+
+def search_messages(user, query, room_id=None):
+    """Messages in the user's rooms (or one of them) matching `query`, web-search syntax on PostgreSQL"""
+    rooms = ChatRoom.objects.filter(models.Q(participant_1=user) | models.Q(participant_2=user))
+    if room_id:
+        rooms = rooms.filter(id=room_id)
+    messages = Message.objects.filter(chat_room_id__in=rooms.values("id"))
+
+    if connection.vendor == "postgresql":
+        return messages.filter(RawSQL(
+            f"{Message._meta.db_table}.search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)",
+            [query],
+            output_field=models.BooleanField(),
+        ))
+    return messages.filter(message_text__icontains=query)
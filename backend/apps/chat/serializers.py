@@ -17,6 +17,7 @@ class MessageSerializer(serializers.ModelSerializer):
     """Serializer for Message model"""
 
     sender = ChatUserMiniSerializer(read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -39,6 +40,14 @@ class MessageSerializer(serializers.ModelSerializer):
             "is_read",
         ]
 
+    def get_is_read(self, obj) -> bool:
+        # Read once the recipient's mark has passed it; load messages through
+        # room.messages so obj.chat_room is already cached
+        room = obj.chat_room
+        recipient_id = room.participant_2_id if obj.sender_id == room.participant_1_id else room.participant_1_id
+        last_read_at = room.last_read_at(recipient_id)
+        return last_read_at is not None and obj.created_at <= last_read_at
+
 
 class TypingStatusSerializer(serializers.ModelSerializer):
     user = ChatUserMiniSerializer(read_only=True)
@@ -75,12 +84,40 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         return MessageSerializer(last, context=self.context).data if last else None
 
 
+class InboxRoomSerializer(serializers.ModelSerializer):
+    """
+    Inbox row built from the room's denormalized last-message columns.
+    Expects participants select_related and `unread_count` annotated
+    (see InboxView), so serializing a page runs no queries.
+    """
+
+    other_participant = serializers.SerializerMethodField()
+    last_message_sender_id = serializers.UUIDField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ChatRoom
+        fields = [
+            "id",
+            "other_participant",
+            "last_message_text",
+            "last_message_at",
+            "last_message_sender_id",
+            "unread_count",
+        ]
+
+    @extend_schema_field(ChatUserMiniSerializer)
+    def get_other_participant(self, obj) -> dict:
+        user = self.context["request"].user
+        other = obj.participant_2 if obj.participant_1_id == user.id else obj.participant_1
+        return ChatUserMiniSerializer(other, context=self.context).data
+
+
 class ChatRoomDetailSerializer(serializers.ModelSerializer):
-    """Full chat room with all messages"""
+    """Chat room; history is paged separately from rooms/<id>/messages/"""
 
     participant_1 = ChatUserMiniSerializer(read_only=True)
     participant_2 = ChatUserMiniSerializer(read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
 
     class Meta:
         model = ChatRoom
@@ -90,7 +127,6 @@ class ChatRoomDetailSerializer(serializers.ModelSerializer):
             "participant_2",
             "created_at",
             "updated_at",
-            "messages",
         ]
 
 class CreateChatRoomSerializer(serializers.ModelSerializer):
@@ -0,0 +1,14 @@
+"""
+Chat Signals - Keep cached room membership fresh
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .membership import invalidate_room
+from .models import ChatRoom
+
+
+@receiver([post_save, post_delete], sender=ChatRoom)
+def drop_cached_membership(sender, instance, **kwargs):
+    invalidate_room(instance.pk)
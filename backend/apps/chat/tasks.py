@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from .pipeline import FLUSH_BATCH_SIZE, flush_messages
+
+
+@shared_task
+def flush_chat_messages(batch_size=FLUSH_BATCH_SIZE, max_batches=20):
+    """Persist queued chat messages, batch by batch, until the queue is drained"""
+    written = 0
+    for _ in range(max_batches):
+        read = flush_messages(batch_size=batch_size)
+        written += read
+        if read < batch_size:
+            break
+    return written
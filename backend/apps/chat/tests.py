@@ -0,0 +1,432 @@
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from datetime import date, timedelta
+from unittest import mock
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.authentication.middleware import user_from_token
+from utils.pagination import InboxPagination
+from utils.partitioning import add_months, maintain_partitions, partition_name
+from apps.authentication.models import User
+from popcult_project.asgi import application
+from .membership import room_participants
+from .models import ChatRoom, Message, TypingStatus
+from .pipeline import InMemoryQueue, enqueue_message, flush_messages
+from .presence import set_typing, typing_user_ids
+from .tasks import flush_chat_messages
+
+
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.alice = User.objects.create_user(
+            email='alice@example.com', phone_number='+1000000001', password='TestPass123!', username='alice'
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', phone_number='+1000000002', password='TestPass123!', username='bob'
+        )
+        self.room = ChatRoom.objects.create(participant_1=self.alice, participant_2=self.bob)
+        self.client.force_authenticate(self.alice)
+
+    def send(self, count):
+        senders = [self.alice, self.bob]
+        Message.objects.bulk_create([
+            Message(chat_room=self.room, sender=senders[i % 2], message_text=f'message {i}')
+            for i in range(count)
+        ])
+
+    def test_history_pages_newest_first(self):
+        """Test history walks the whole conversation in fixed pages via cursors"""
+        self.send(75)
+
+        url, texts = f'/api/chat/rooms/{self.room.id}/messages/', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 30)
+            texts += [m['message_text'] for m in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(len(texts), 75)
+        self.assertEqual(len(set(texts)), 75)
+
+    def test_history_queries_do_not_grow_with_conversation(self):
+        """Test a page costs the same number of queries for short and long chats"""
+        url = f'/api/chat/rooms/{self.room.id}/messages/'
+        self.send(5)
+        with self.assertNumQueries(2):  # room membership, page with senders
+            self.client.get(url)
+
+        self.send(200)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 30)
+
+    def test_room_detail_does_not_embed_messages(self):
+        """Test room detail no longer serializes the conversation"""
+        self.send(3)
+        response = self.client.get(f'/api/chat/rooms/{self.room.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('messages', response.data)
+
+    def test_history_requires_membership(self):
+        """Test outsiders cannot read a room's history"""
+        outsider = User.objects.create_user(
+            email='eve@example.com', phone_number='+1000000003', password='TestPass123!', username='eve'
+        )
+        self.client.force_authenticate(outsider)
+        response = self.client.get(f'/api/chat/rooms/{self.room.id}/messages/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ChatSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.alice, self.bob, self.eve = [
+            User.objects.create_user(
+                email=f'{name}@example.com', phone_number=f'+300000000{i}', password='TestPass123!', username=name
+            )
+            for i, name in enumerate(('alice', 'bob', 'eve'))
+        ]
+        self.room = ChatRoom.objects.create(participant_1=self.alice, participant_2=self.bob)
+        self.other_room = ChatRoom.objects.create(participant_1=self.bob, participant_2=self.eve)
+        now = timezone.now()
+        Message.objects.bulk_create([
+            Message(chat_room=self.room, sender=self.bob, created_at=now + timedelta(seconds=i),
+                    message_text=f'watch Dune tonight? #{i}' if i % 2 else f'lunch #{i}')
+            for i in range(50)
+        ] + [Message(chat_room=self.other_room, sender=self.eve, message_text='Dune is great')])
+        self.client.force_authenticate(self.alice)
+
+    def test_search_only_reads_my_rooms_in_keyset_pages(self):
+        """Test hits come from the caller's rooms only, newest first, across cursor pages"""
+        response = self.client.get('/api/chat/messages/search/', {'q': 'dune'})
+        texts = [row['message_text'] for row in response.data['results']]
+        self.assertEqual(len(texts), 20)
+        self.assertEqual(texts[0], 'watch Dune tonight? #49')
+
+        response = self.client.get(response.data['next'])
+        texts += [row['message_text'] for row in response.data['results']]
+        self.assertEqual(len(texts), 25)
+        self.assertIsNone(response.data['next'])
+        self.assertNotIn('Dune is great', texts)
+
+        response = self.client.get('/api/chat/messages/search/', {'q': 'dune', 'room': str(self.other_room.id)})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(self.client.get('/api/chat/messages/search/', {'q': 'd'}).status_code, 400)
+
+
+class ChatInboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(
+                email=f'user{i}@example.com', phone_number=f'+200000000{i}', password='TestPass123!', username=f'user{i}'
+            )
+            for i in range(4)
+        ]
+        self.me = self.users[0]
+        self.client.force_authenticate(self.me)
+        self.rooms = [ChatRoom.objects.create(participant_1=self.me, participant_2=other) for other in self.users[1:]]
+
+    def test_inbox_is_one_query_with_unread_counts(self):
+        """Test the inbox returns other participant, preview and unread count in one query"""
+        for room, unread in zip(self.rooms, (0, 2, 1)):
+            other = room.get_other_participant(self.me)
+            Message.objects.bulk_create(
+                [Message(chat_room=room, sender=other, message_text='hi') for _ in range(unread)]
+                + [Message(chat_room=room, sender=self.me, message_text='mine')]
+            )
+        self.rooms[0].mark_read(self.me.id, timezone.now())
+        latest = self.rooms[1]
+        latest.last_message_text = 'latest'
+        latest.last_message_at = timezone.now()
+        latest.save()
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/chat/inbox/')
+
+        rows = response.data['results']
+        self.assertEqual(rows[0]['id'], str(latest.id))
+        self.assertEqual(rows[0]['last_message_text'], 'latest')
+        self.assertEqual(rows[0]['other_participant']['username'], latest.get_other_participant(self.me).username)
+        unread = {row['id']: row['unread_count'] for row in rows}
+        self.assertEqual(unread, {str(self.rooms[0].id): 0, str(self.rooms[1].id): 2, str(self.rooms[2].id): 1})
+
+
+    def test_rooms_without_messages_follow_active_ones(self):
+        """Test empty rooms keep a NULL last_message_at and page after rooms with messages"""
+        self.assertIsNone(self.rooms[0].last_message_at)
+        now = timezone.now()
+        for minutes, room in enumerate(self.rooms):
+            ChatRoom.objects.filter(id=room.id).update(created_at=now - timedelta(minutes=10 - minutes))
+        ChatRoom.objects.filter(id=self.rooms[0].id).update(last_message_at=now - timedelta(minutes=5))
+
+        seen, url = [], '/api/chat/inbox/'
+        while url:
+            with mock.patch.object(InboxPagination, 'page_size', 1):
+                response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        # the room with a message, then the empty ones by age, newest first
+        self.assertEqual(seen, [str(room.id) for room in (self.rooms[0], self.rooms[2], self.rooms[1])])
+
+
+class TypingPresenceTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(
+            email='alice@example.com', phone_number='+1000000001', password='TestPass123!', username='alice'
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', phone_number='+1000000002', password='TestPass123!', username='bob'
+        )
+        self.room = ChatRoom.objects.create(participant_1=self.alice, participant_2=self.bob)
+
+    def test_typing_is_throttled_and_never_touches_the_database(self):
+        """Test repeated typing events broadcast once and stop typing only when typing"""
+        with self.assertNumQueries(0):
+            self.assertTrue(set_typing(self.room.id, self.alice.id, True))
+            self.assertFalse(set_typing(self.room.id, self.alice.id, True))
+            self.assertEqual(typing_user_ids(self.room.id, [self.alice.id, self.bob.id]), [self.alice.id])
+
+            self.assertTrue(set_typing(self.room.id, self.alice.id, False))
+            self.assertFalse(set_typing(self.room.id, self.alice.id, False))
+            self.assertEqual(typing_user_ids(self.room.id, [self.alice.id, self.bob.id]), [])
+
+            # Stopping resets the throttle, so typing again is announced right away
+            self.assertTrue(set_typing(self.room.id, self.alice.id, True))
+
+    def test_consumer_broadcasts_typing_without_writes(self):
+        """Test the other participant sees typing events and no TypingStatus rows are written"""
+        async def scenario():
+            communicators = []
+            for user in (self.alice, self.bob):
+                communicator = WebsocketCommunicator(application, f'/ws/chat/{self.room.id}/')
+                communicator.scope['user'] = user
+                await communicator.connect()
+                await communicator.receive_json_from()  # connection_established
+                communicators.append(communicator)
+            alice, bob = communicators
+
+            for _ in range(5):
+                await alice.send_json_to({'type': 'typing', 'is_typing': True})
+            await alice.send_json_to({'type': 'typing', 'is_typing': False})
+            received = [await bob.receive_json_from(), await bob.receive_json_from()]
+            quiet = await bob.receive_nothing()
+
+            for communicator in communicators:
+                await communicator.disconnect()
+            return received, quiet
+
+        received, quiet = async_to_sync(scenario)()
+        self.assertEqual([event['is_typing'] for event in received], [True, False])
+        self.assertTrue(quiet)
+        self.assertFalse(TypingStatus.objects.exists())
+
+
+@override_settings(CHAT_MESSAGE_QUEUE='memory')
+class WriteBehindMessageTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email='alice@example.com', phone_number='+1000000001', password='TestPass123!', username='alice'
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', phone_number='+1000000002', password='TestPass123!', username='bob'
+        )
+        self.room = ChatRoom.objects.create(participant_1=self.alice, participant_2=self.bob)
+
+    def message(self, text, sender=None, created_at=None):
+        return Message(
+            chat_room=self.room, sender=sender or self.alice, message_text=text,
+            created_at=created_at or timezone.now(),
+        )
+
+    def test_consumer_broadcasts_before_the_message_is_written(self):
+        """Test the broadcast carries the final id and the flush stores that message"""
+        async def scenario():
+            communicator = WebsocketCommunicator(application, f'/ws/chat/{self.room.id}/')
+            communicator.scope['user'] = self.bob
+            await communicator.connect()
+            await communicator.receive_json_from()  # connection_established
+            await communicator.send_json_to({'type': 'chat_message', 'message': 'hi alice'})
+            event = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return event
+
+        event = async_to_sync(scenario)()
+        self.assertFalse(Message.objects.exists())
+
+        flush_chat_messages()
+        message = Message.objects.get()
+        self.assertEqual(str(message.id), event['message_id'])
+        self.assertEqual(message.created_at.isoformat(), event['timestamp'])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, 'hi alice')
+        self.assertEqual(self.room.last_message_sender, self.bob)
+
+    def test_flush_is_one_insert_and_one_update_per_room(self):
+        """Test a batch costs the same number of queries however many messages it holds"""
+        queue = InMemoryQueue()
+        for i in range(50):
+            enqueue_message(self.message(f'message {i}', sender=[self.alice, self.bob][i % 2]), queue)
+        # room + sender lookups, savepoint, insert, room update, release
+        with self.assertNumQueries(6):
+            self.assertEqual(flush_messages(queue), 50)
+        self.assertEqual(Message.objects.count(), 50)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, 'message 49')
+
+    def test_redelivered_and_late_messages(self):
+        """Test redelivery stores messages once and an older batch never moves last_message back"""
+        now = timezone.now()
+        queue = InMemoryQueue(claim_after=0)
+        newer = self.message('newer', created_at=now)
+        enqueue_message(newer, queue)
+
+        # A writer reads the entry and dies before acknowledging it
+        self.assertEqual(len(queue.read(10)), 1)
+        self.assertEqual(flush_messages(queue), 1)  # redelivered to the next writer
+        self.assertEqual(flush_messages(queue), 0)
+
+        # The same message delivered again, then an older one arriving late
+        enqueue_message(newer, queue)
+        enqueue_message(self.message('older', sender=self.bob, created_at=now - timedelta(minutes=1)), queue)
+        self.assertEqual(flush_messages(queue), 2)
+
+        self.assertEqual(
+            list(Message.objects.order_by('created_at').values_list('message_text', flat=True)),
+            ['older', 'newer'],
+        )
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_text, 'newer')
+        self.assertEqual(self.room.last_message_sender, self.alice)
+
+
+class ReadReceiptTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email='alice@example.com', phone_number='+1000000001', password='TestPass123!', username='alice'
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', phone_number='+1000000002', password='TestPass123!', username='bob'
+        )
+        self.room = ChatRoom.objects.create(participant_1=self.alice, participant_2=self.bob)
+        now = timezone.now()
+        self.messages = Message.objects.bulk_create([
+            Message(chat_room=self.room, sender=self.bob, message_text=f'message {i}',
+                    created_at=now + timedelta(milliseconds=i))
+            for i in range(100)
+        ])
+
+    def test_receipts_are_coalesced_into_one_mark_and_broadcast(self):
+        """Test scrolling through a backlog moves the mark once and notifies the sender once"""
+        async def scenario():
+            communicators = []
+            for user in (self.alice, self.bob):
+                communicator = WebsocketCommunicator(application, f'/ws/chat/{self.room.id}/')
+                communicator.scope['user'] = user
+                await communicator.connect()
+                await communicator.receive_json_from()  # connection_established
+                communicators.append(communicator)
+            alice, bob = communicators
+
+            for message in self.messages[:60]:
+                await alice.send_json_to({
+                    'type': 'read_receipt', 'message_id': str(message.id), 'timestamp': message.created_at.isoformat(),
+                })
+            receipts = [await bob.receive_json_from(timeout=5)]
+            while not await bob.receive_nothing(timeout=0.2):
+                receipts.append(await bob.receive_json_from())
+
+            for communicator in communicators:
+                await communicator.disconnect()
+            return receipts
+
+        receipts = async_to_sync(scenario)()
+        self.assertEqual(len(receipts), 1)
+        self.assertEqual(receipts[0]['message_id'], str(self.messages[59].id))
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_read_at(self.alice.id), self.messages[59].created_at)
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        self.assertEqual(client.get('/api/chat/inbox/').data['results'][0]['unread_count'], 40)
+
+    def test_mark_never_moves_back(self):
+        """Test a stale receipt leaves the mark alone and history reports read state from it"""
+        self.assertTrue(self.room.mark_read(self.alice.id, self.messages[79].created_at))
+        self.assertFalse(self.room.mark_read(self.alice.id, self.messages[10].created_at))
+
+        # Newest page holds messages 99..70, of which 79..70 are read
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        response = client.get(f'/api/chat/rooms/{self.room.id}/messages/')
+        read = [row['is_read'] for row in response.data['results']]
+        self.assertEqual(read, [False] * 20 + [True] * 10)
+
+
+class ChatConnectTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob, self.eve = [
+            User.objects.create_user(
+                email=f'{name}@example.com', phone_number=f'+100000000{i}', password='TestPass123!', username=name
+            )
+            for i, name in enumerate(('alice', 'bob', 'eve'))
+        ]
+        self.room = ChatRoom.objects.create(participant_1=self.alice, participant_2=self.bob)
+
+    def connect(self, query):
+        async def scenario():
+            communicator = WebsocketCommunicator(application, f'/ws/chat/{self.room.id}/?{query}')
+            connected, code = await communicator.connect()
+            await communicator.disconnect()
+            return connected, code
+
+        return async_to_sync(scenario)()
+
+    def test_only_participants_with_a_valid_token_connect(self):
+        """Test JWT auth and the membership check on connect"""
+        self.assertEqual(self.connect(f'token={AccessToken.for_user(self.alice)}'), (True, None))
+        self.assertEqual(self.connect(f'token={AccessToken.for_user(self.eve)}'), (False, 4003))
+        self.assertEqual(self.connect('token=not-a-jwt'), (False, 4003))
+        self.assertEqual(self.connect(''), (False, 4003))
+
+    def test_reconnects_need_no_queries(self):
+        """Test token user and room membership come from the cache once warm, until invalidated"""
+        token = str(AccessToken.for_user(self.alice))
+        user_from_token(token)
+        room_participants(self.room.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user_from_token(token).username, 'alice')
+            self.assertEqual(room_participants(self.room.id), (self.room.participant_1_id, self.room.participant_2_id))
+
+        self.alice.username = 'alice2'
+        self.alice.save()
+        self.assertEqual(user_from_token(token).username, 'alice2')
+        self.alice.is_active = False
+        self.alice.save()
+        self.assertIsNone(user_from_token(token))
+
+        room_id = self.room.id
+        self.room.delete()
+        self.assertEqual(room_participants(room_id), ())
+
+
+class PartitioningTests(TestCase):
+    def test_monthly_partition_names_and_bounds(self):
+        """Test month arithmetic across year ends and the partition naming scheme"""
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -13), date(2024, 12, 1))
+        self.assertEqual(partition_name('messages', date(2027, 1, 1)), 'messages_p202701')
+
+    def test_maintenance_skips_other_databases(self):
+        """Test the beat task is harmless where native partitioning is unavailable"""
+        self.assertEqual(maintain_partitions(), 'Partitioning needs PostgreSQL')
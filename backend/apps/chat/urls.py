@@ -1,7 +1,10 @@
 from django.urls import path
 from .views import (
     ChatRoomListView,
+    InboxView,
     ChatRoomDetailView,
+    MessageHistoryView,
+    MessageSearchView,
     SendMessageView,
     MarkMessagesReadView,
 )
@@ -11,11 +14,14 @@ urlpatterns = [
     # Chat Rooms
     # -------------------------------------
     path("rooms/", ChatRoomListView.as_view(), name="chat-rooms"),
+    path("inbox/", InboxView.as_view(), name="chat-inbox"),
     path("rooms/<uuid:room_id>/", ChatRoomDetailView.as_view(), name="chat-room-detail"),
 
     # -------------------------------------
     # Messaging
     # -------------------------------------
+    path("rooms/<uuid:room_id>/messages/", MessageHistoryView.as_view(), name="message-history"),
+    path("messages/search/", MessageSearchView.as_view(), name="message-search"),
     path("rooms/<uuid:room_id>/send/", SendMessageView.as_view(), name="send-message"),
     path("rooms/<uuid:room_id>/read/", MarkMessagesReadView.as_view(), name="mark-read"),
 ]
@@ -1,16 +1,22 @@
+import uuid
+
 from rest_framework import generics, status, serializers
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from drf_spectacular.utils import extend_schema, OpenApiResponse, extend_schema_view
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse, extend_schema_view
 
+from utils.pagination import InboxPagination, MessageHistoryPagination, MessageSearchPagination
 from .models import ChatRoom, Message
+from .search import MIN_QUERY_LENGTH, search_messages
 from .serializers import (
     ChatRoomSerializer,
     ChatRoomDetailSerializer,
+    InboxRoomSerializer,
     MessageSerializer,
 )
 
@@ -46,11 +52,55 @@ class ChatRoomListView(generics.ListAPIView):
         user = self.request.user
         return ChatRoom.objects.filter(
             models.Q(participant_1=user) | models.Q(participant_2=user)
-        ).distinct()
+        ).select_related("participant_1", "participant_2", "last_message_sender")
+
+
+# ============================================================
+# INBOX (one query per page)
+# ============================================================
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Chat"],
+        responses={200: InboxRoomSerializer(many=True)}
+    )
+)
+class InboxView(generics.ListAPIView):
+    """
+    The user's conversations by latest activity: other participant, last
+    message preview and unread count. Each page is a single query; the
+    unread count is a correlated range count on (chat_room, created_at)
+    past the user's read mark.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = InboxRoomSerializer
+    pagination_class = InboxPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        unread = (
+            Message.objects.filter(chat_room=models.OuterRef("pk"), created_at__gt=models.OuterRef("my_last_read_at"))
+            .exclude(sender=user)
+            .order_by()
+            .values("chat_room")
+            .annotate(count=models.Count("id"))
+            .values("count")
+        )
+        return (
+            ChatRoom.objects.filter(models.Q(participant_1=user) | models.Q(participant_2=user))
+            .select_related("participant_1", "participant_2")
+            .annotate(
+                my_last_read_at=models.Case(
+                    models.When(participant_1=user, then=models.F("participant_1_last_read_at")),
+                    default=models.F("participant_2_last_read_at"),
+                ),
+                unread_count=Coalesce(models.Subquery(unread), 0),
+            )
+        )
 
 
 # ============================================================
-# GET CHAT ROOM DETAIL (with message history)
+# GET CHAT ROOM DETAIL
 # ============================================================
 
 @extend_schema_view(
@@ -63,12 +113,83 @@ class ChatRoomDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ChatRoomDetailSerializer
     lookup_field = "id"
+    lookup_url_kwarg = "room_id"
 
     def get_queryset(self):
         user = self.request.user
         return ChatRoom.objects.filter(
             models.Q(participant_1=user) | models.Q(participant_2=user)
-        ).distinct()
+        ).select_related("participant_1", "participant_2")
+
+
+# ============================================================
+# MESSAGE HISTORY (keyset paginated, newest first)
+# ============================================================
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Chat"],
+        responses={200: MessageSerializer(many=True)}
+    )
+)
+class MessageHistoryView(generics.ListAPIView):
+    """
+    Fixed-size pages of a room's messages, newest first. Follow `next` for
+    older messages and `previous` for newer ones; each page is one indexed
+    range query on (chat_room, created_at), however long the conversation.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MessageSerializer
+    pagination_class = MessageHistoryPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        room = get_object_or_404(
+            ChatRoom.objects.filter(models.Q(participant_1=user) | models.Q(participant_2=user)),
+            id=self.kwargs["room_id"],
+        )
+        # Through the room, so messages derive is_read from its marks without queries
+        return room.messages.select_related("sender")
+
+
+# ============================================================
+# MESSAGE SEARCH (keyset paginated, newest first)
+# ============================================================
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Chat"],
+        parameters=[
+            OpenApiParameter(name="q", type=str, required=True, description="Search query (min 2 chars)"),
+            OpenApiParameter(name="room", type=str, description="Only search this chat room"),
+        ],
+        responses={200: MessageSerializer(many=True)}
+    )
+)
+class MessageSearchView(generics.ListAPIView):
+    """
+    Full-text search over the messages of the user's chat rooms, newest
+    first, in keyset pages. Served by the per-room GIN index on PostgreSQL
+    (see search.py), so only the caller's rooms are read.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MessageSerializer
+    pagination_class = MessageSearchPagination
+
+    def list(self, request, *args, **kwargs):
+        if len(request.query_params.get("q", "").strip()) < MIN_QUERY_LENGTH:
+            return Response({"error": f"Query must be >= {MIN_QUERY_LENGTH} chars"}, status=400)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        room_id = self.request.query_params.get("room")
+        try:
+            room_id = uuid.UUID(room_id) if room_id else None
+        except ValueError:
+            return Message.objects.none()
+        return search_messages(
+            self.request.user, self.request.query_params["q"].strip(), room_id
+        ).select_related("sender", "chat_room")
 
 
 # ============================================================
@@ -147,11 +268,14 @@ class MarkMessagesReadView(APIView):
         if request.user not in [room.participant_1, room.participant_2]:
             return Response({"error": "Not allowed"}, status=403)
 
-        qs = Message.objects.filter(
-            chat_room=room, is_read=False
-        ).exclude(sender=request.user)
-
-        updated = qs.update(is_read=True, read_at=timezone.now())
+        # Read state is a high-water mark: one UPDATE however many messages it covers
+        now = timezone.now()
+        updated = Message.objects.filter(
+            chat_room=room,
+            created_at__gt=room.last_read_at(request.user.id),
+            created_at__lte=now,
+        ).exclude(sender=request.user).count()
+        room.mark_read(request.user.id, now)
 
         return Response({"updated": updated}, status=200)
 
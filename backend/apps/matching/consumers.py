@@ -1,28 +1,54 @@
-import json
+from concurrent.futures import ThreadPoolExecutor
+
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from .models import MatchingSession
-from .utils import calculate_match_results_for_session
+from .utils import (
+    SessionClosedError, apply_swipe, check_quorum, refresh_match_percentages, results_snapshot, swipe_events,
+)
 from apps.movies.models import Movie
 
+# Swipes run on their own pool instead of the single thread shared by every
+# thread-sensitive sync_to_async call, so sessions don't queue behind each other.
+# Each thread holds one database connection.
+swipe_executor = ThreadPoolExecutor(
+    max_workers=settings.MATCHING_DB_POOL_SIZE, thread_name_prefix='matching-db'
+)
+
 
 class MatchingSessionConsumer(AsyncJsonWebsocketConsumer):
     """
     WebSocket consumer for real-time matching sessions.
     - Group name: matching_<session_id>
-    Events:
+    Events (protocol version "v": 1):
       - client -> server: {"action":"swipe","movie_id":"<uuid>","liked": true}
-      - server -> clients: {"type":"results_update", "results": [...], "swipe": {...}}
+      - client -> server: {"action":"snapshot"}
+      - server -> clients: {"type":"results_delta", "v": 1, "seq": 7, "movie_id": "<uuid>",
+                            "likes_count": 2, "match_percentage": 50.0, "user_id": "<uuid>", "liked": true}
+      - server -> client: {"type":"results_snapshot", "v": 1, "seq": 7, "results": [...]}
+      - server -> clients: {"type":"session_completed", "v": 1, "seq": 8, "movie_id": "<uuid>",
+                            "likes_count": 4, "match_percentage": 100.0}
+    A delta only carries the movie whose tally changed. "seq" grows by one
+    per swipe in the session; a client that sees a gap (or reconnects)
+    asks for a snapshot and then drops deltas with seq <= snapshot seq.
+    session_completed is sent once, when a movie reaches the session's
+    consensus quorum; later swipes are answered with an error.
     """
 
     async def connect(self):
         self.session_id = self.scope['url_route']['kwargs']['session_id']
         self.group_name = f"matching_{self.session_id}"
+        self.user = self.scope.get('user')
+
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4003)
+            return
 
         # verify session exists
-        exists = await database_sync_to_async(MatchingSession.objects.filter(id=self.session_id).exists)()
-        if not exists:
+        self.session = await MatchingSession.objects.filter(id=self.session_id).afirst()
+        if self.session is None:
             await self.close(code=4001)
             return
 
@@ -37,55 +63,48 @@ class MatchingSessionConsumer(AsyncJsonWebsocketConsumer):
 
     async def receive_json(self, content, **kwargs):
         action = content.get('action')
-        user = self.scope.get('user')
 
         if action == 'swipe':
             movie_id = content.get('movie_id')
             liked = content.get('liked', True)
             # _handle_swipe performs db work; call and get payload
-            payload = await self._handle_swipe(user, movie_id, liked)
-            if payload:
-                # broadcast to group so all participants get updates
-                await self.channel_layer.group_send(self.group_name, {
-                    'type': 'results_update',
-                    **payload
-                })
-
-    @database_sync_to_async
-    def _handle_swipe(self, user, movie_id, liked):
-        # Reuse REST logic: upsert swipe and recalc results
-        session = get_object_or_404(MatchingSession, id=self.session_id)
-        if user not in session.participants.all():
-            session.participants.add(user)
-
-        from .models import MovieSwipe
-        from apps.movies.models import Movie
-
-        movie = get_object_or_404(Movie, id=movie_id)
-        swipe, created = MovieSwipe.objects.update_or_create(
-            session=session, user=user, movie=movie, defaults={'liked': bool(liked)}
-        )
-
-        results = calculate_match_results_for_session(session)
-
-        msg = {
-            'results': [
-                {
-                    'movie_id': str(r.movie.id),
-                    'title': getattr(r.movie, 'title', ''),
-                    'likes_count': r.likes_count,
-                    'match_percentage': r.match_percentage
-                } for r in results
-            ],
-            'swipe': {
-                'user_id': str(user.id),
-                'movie_id': str(movie.id),
-                'liked': bool(liked)
-            }
-        }
-        return msg
-
-    async def results_update(self, event):
-        # forward results_update to connected client
+            events = await self._handle_swipe(movie_id, liked)
+            # broadcast to group so all participants get updates
+            for event in events:
+                await self.channel_layer.group_send(self.group_name, event)
+
+        elif action == 'snapshot':
+            snapshot = await database_sync_to_async(
+                results_snapshot, thread_sensitive=False, executor=swipe_executor
+            )(self.session)
+            await self.send_json(snapshot)
+
+    async def _handle_swipe(self, movie_id, liked):
+        try:
+            return await database_sync_to_async(
+                self._record_swipe, thread_sensitive=False, executor=swipe_executor
+            )(movie_id, liked)
+        except (Movie.DoesNotExist, ValidationError):
+            await self.send_json({'type': 'error', 'error': 'Unknown movie_id'})
+        except SessionClosedError:
+            await self.send_json({'type': 'error', 'error': 'Session is no longer accepting swipes'})
+        return []
+
+    def _record_swipe(self, movie_id, liked):
+        # Same path as the REST view: upsert swipe and update this movie's tally
+        movie = Movie.objects.only('id', 'title').get(id=movie_id)
+        if not self.session.participants.filter(id=self.user.id).exists():
+            self.session.participants.add(self.user)
+            refresh_match_percentages(self.session)
+            check_quorum(self.session)
+
+        outcome = apply_swipe(self.session, self.user, movie, liked)
+        return swipe_events(self.session, outcome)
+
+    async def results_delta(self, event):
+        # forward results_delta to connected client
         await self.send_json(event)
 
+    async def session_completed(self, event):
+        # final event: the session is over and accepts no more swipes
+        await self.send_json(event)
@@ -0,0 +1,114 @@
+"""
+Candidate deck for a matching session.
+
+Built once when the session starts: one indexed filter query picks the
+candidates, they are ranked against the participants' merged
+recommendation profiles, and the ordered movie ids are stored on the
+session. Clients then page through the deck in prefetch-sized chunks,
+each chunk being a single in_bulk() query.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q, Sum
+
+from apps.movies.models import Movie
+from apps.recommendations.models import Recommendation, RecommendationPreference
+from .models import MatchingSession
+
+DECK_SIZE = 200
+CANDIDATE_POOL = 1000  # most-voted movies considered besides recommended ones
+
+# Weights of the ranking terms; recommendation scores are already 0-1 per user
+GENRE_WEIGHT = 0.5
+POPULARITY_WEIGHT = 0.1
+
+
+def selected_genre_ids(session: MatchingSession):
+    """selected_genres may hold TMDb genre ids as ints or strings; names are ignored"""
+    genre_ids = []
+    for genre in session.selected_genres or []:
+        try:
+            genre_ids.append(int(genre))
+        except (TypeError, ValueError):
+            continue
+    return genre_ids
+
+
+def candidate_filter(session: MatchingSession):
+    """Session filters as one Q, using only indexed columns"""
+    q = Q()
+    if session.release_year_min:
+        q &= Q(release_date__gte=f'{session.release_year_min}-01-01')
+    if session.release_year_max:
+        q &= Q(release_date__lte=f'{session.release_year_max}-12-31')
+    if session.max_runtime:
+        q &= Q(runtime__lte=session.max_runtime)
+
+    genre_ids = selected_genre_ids(session)
+    if genre_ids and connection.features.supports_json_field_contains:
+        # JSONB containment, served by the GIN index on movies.genres
+        genres_q = Q()
+        for genre_id in genre_ids:
+            genres_q |= Q(genres__contains=[genre_id])
+        q &= genres_q
+    return q
+
+
+def build_deck(session: MatchingSession, size=DECK_SIZE):
+    """Select, rank and store the session's deck; returns the ordered movie ids"""
+    participant_ids = list(session.participants.values_list('id', flat=True))
+    filters = candidate_filter(session)
+    genre_ids = set(selected_genre_ids(session))
+
+    # Merged profile: summed recommendation scores per movie...
+    recommended = dict(
+        Recommendation.objects.filter(user_id__in=participant_ids, is_dismissed=False)
+        .values('movie_id')
+        .annotate(total=Sum('score'))
+        .values_list('movie_id', 'total')
+    )
+    # ...and summed genre weights, minus genres anyone dislikes
+    genre_weights = defaultdict(float)
+    for favorite, disliked in RecommendationPreference.objects.filter(user_id__in=participant_ids).values_list(
+        'favorite_genres', 'disliked_genres'
+    ):
+        for genre_id, weight in (favorite or {}).items():
+            if str(genre_id).isdigit():
+                genre_weights[int(genre_id)] += float(weight)
+        for genre_id in disliked or []:
+            if str(genre_id).isdigit():
+                genre_weights[int(genre_id)] -= 1.0
+
+    fields = ('id', 'genres', 'tmdb_vote_average', 'tmdb_vote_count')
+    candidates = {
+        m['id']: m for m in
+        Movie.objects.filter(filters).order_by('-tmdb_vote_count').values(*fields)[:CANDIDATE_POOL]
+    }
+    missing = [movie_id for movie_id in recommended if movie_id not in candidates]
+    if missing:
+        candidates.update(
+            (m['id'], m) for m in Movie.objects.filter(filters, id__in=missing).values(*fields)
+        )
+
+    def rank(movie):
+        movie_genres = movie['genres'] or []
+        if genre_ids and not genre_ids.intersection(movie_genres):
+            return None  # backends without JSON containment filter genres here
+        affinity = sum(genre_weights.get(g, 0.0) for g in movie_genres) / max(len(movie_genres), 1)
+        popularity = movie['tmdb_vote_average'] / 10 if movie['tmdb_vote_count'] else 0.0
+        return recommended.get(movie['id'], 0.0) + GENRE_WEIGHT * affinity + POPULARITY_WEIGHT * popularity
+
+    scored = ((rank(movie), movie_id) for movie_id, movie in candidates.items())
+    ranked = sorted((item for item in scored if item[0] is not None), key=lambda item: item[0], reverse=True)
+
+    session.deck = [str(movie_id) for _, movie_id in ranked[:size]]
+    session.save(update_fields=['deck', 'updated_at'])
+    return session.deck
+
+
+def deck_chunk(session: MatchingSession, offset=0, limit=20):
+    """Movies for deck[offset:offset + limit], in deck order, with one query"""
+    movie_ids = session.deck[offset:offset + limit]
+    movies = Movie.objects.in_bulk(movie_ids)
+    return [movies[movie_id] for movie_id in map(Movie._meta.pk.to_python, movie_ids) if movie_id in movies]
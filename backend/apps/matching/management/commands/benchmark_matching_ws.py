@@ -0,0 +1,146 @@
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from apps.authentication.models import User
+from apps.matching import consumers
+from apps.matching.models import MatchingSession
+from apps.matching.routing import websocket_urlpatterns
+from apps.movies.models import Movie
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the matching WebSocket consumer in-process with a local channel layer. '
+        'Runs each --sessions level and reports swipe throughput, latency and bytes sent per swipe '
+        '(deltas as broadcast vs. the full result list the consumer used to broadcast).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, nargs='+', default=[10, 50, 100],
+                            help='Concurrent session counts to try')
+        parser.add_argument('--participants', type=int, default=4, help='Participants per session')
+        parser.add_argument('--swipes', type=int, default=20, help='Swipes per participant')
+        parser.add_argument('--target-p95', type=float, default=100.0,
+                            help='Latency budget (ms) a level must meet to count as sustained')
+        parser.add_argument('--pool-size', type=int, default=None, help='Override MATCHING_DB_POOL_SIZE')
+
+    def handle(self, *args, **options):
+        participants, swipes = options['participants'], options['swipes']
+        if options['pool_size']:
+            consumers.swipe_executor = ThreadPoolExecutor(max_workers=options['pool_size'])
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(email=f'bench-{tag}-{i}@example.com', phone_number=f'+9{tag[:4]}{i:06d}'[:15],
+                 username=f'bench_{tag}_{i}', password=make_password(None))
+            for i in range(max(options['sessions']) * participants)
+        ])
+        movies = Movie.objects.bulk_create([
+            # Negative ids never collide with real TMDb movies
+            Movie(tmdb_id=-(int(tag[:5], 16) * 1000 + i + 1), title=f'Bench {tag} {i}', overview='', original_language='en')
+            for i in range(swipes)
+        ])
+
+        self.stdout.write(
+            f'{"sessions":>8} {"swipes/s":>10} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8} '
+            f'{"delta B/swipe":>14} {"full B/swipe":>13}'
+        )
+        sustained = 0
+        try:
+            for level in options['sessions']:
+                with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER):
+                    sessions = MatchingSession.objects.bulk_create([
+                        MatchingSession(created_by=users[i * participants], name=f'bench-{tag}', status='active')
+                        for i in range(level)
+                    ])
+                    for i, session in enumerate(sessions):
+                        session.participants.add(*users[i * participants:(i + 1) * participants])
+
+                    groups = [
+                        (session, users[i * participants:(i + 1) * participants])
+                        for i, session in enumerate(sessions)
+                    ]
+                    elapsed, latencies, delta_bytes, full_bytes = asyncio.run(self.run_level(groups, movies))
+
+                latencies.sort()
+                p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+                self.stdout.write(
+                    f'{level:>8} {len(latencies) / elapsed:>10.0f} '
+                    f'{statistics.median(latencies) * 1000:>8.1f} {p95:>8.1f} {latencies[-1] * 1000:>8.1f} '
+                    f'{delta_bytes / len(latencies):>14.0f} {full_bytes:>13.0f}'
+                )
+                if p95 <= options['target_p95']:
+                    sustained = level
+        finally:
+            MatchingSession.objects.filter(name=f'bench-{tag}').delete()
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+            Movie.objects.filter(id__in=[m.id for m in movies]).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Sustained {sustained} concurrent sessions within a {options["target_p95"]:.0f} ms p95 budget'
+        ))
+
+    async def run_level(self, groups, movies):
+        application = URLRouter(websocket_urlpatterns)
+        communicators = []
+        for session, users in groups:
+            for user in users:
+                communicator = WebsocketCommunicator(application, f'/ws/matching/{session.id}/')
+                communicator.scope['user'] = user
+                connected, _ = await communicator.connect()
+                if not connected:
+                    raise RuntimeError(f'Could not connect to session {session.id}')
+                communicators.append((communicator, user))
+
+        latencies, received = [], []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.swipe_all(c, user, movies, latencies, received, offset=i)
+            for i, (c, user) in enumerate(communicators)
+        ))
+        elapsed = time.perf_counter() - started
+
+        # What one swipe at the end of each session costs when every participant
+        # is sent the full result list (the previous results_update payload)
+        full_bytes = []
+        participants = len(communicators) // len(groups)
+        for communicator, _ in communicators[::participants]:
+            await communicator.send_json_to({'action': 'snapshot'})
+            while True:
+                text = await communicator.receive_from(timeout=30)
+                if json.loads(text)['type'] == 'results_snapshot':
+                    full_bytes.append(len(text.encode()) * participants)
+                    break
+
+        for communicator, _ in communicators:
+            await communicator.disconnect()
+        return elapsed, latencies, sum(received), statistics.mean(full_bytes)
+
+    async def swipe_all(self, communicator, user, movies, latencies, received, offset=0):
+        """
+        Swipe through every movie, timing each swipe until its own delta comes back.
+        Neighbouring participants swipe opposite ways so no session reaches consensus.
+        """
+        user_id = str(user.id)
+        for i, movie in enumerate(movies):
+            movie_id = str(movie.id)
+            sent = time.perf_counter()
+            await communicator.send_json_to({'action': 'swipe', 'movie_id': movie_id, 'liked': (i + offset) % 2 == 0})
+            while True:
+                text = await communicator.receive_from(timeout=30)
+                received.append(len(text.encode()))
+                event = json.loads(text)
+                if event.get('user_id') == user_id and event.get('movie_id') == movie_id:
+                    break
+            latencies.append(time.perf_counter() - sent)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.matching.models import MatchingSession
+from apps.matching.utils import calculate_match_results_for_session
+
+
+class Command(BaseCommand):
+    help = 'Rebuild match results and cached swipe tallies from the stored swipes (recovery only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_ids', nargs='*', help='Sessions to rebuild (default: all waiting/active sessions)')
+
+    def handle(self, *args, **options):
+        sessions = MatchingSession.objects.all()
+        if options['session_ids']:
+            sessions = sessions.filter(id__in=options['session_ids'])
+        else:
+            sessions = sessions.filter(status__in=['waiting', 'active'])
+
+        count = 0
+        for session in sessions.iterator():
+            calculate_match_results_for_session(session)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt match results for {count} sessions'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchingsession',
+            name='deck',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
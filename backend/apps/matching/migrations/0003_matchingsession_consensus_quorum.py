@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:13
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_matchingsession_deck'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchingsession',
+            name='consensus_quorum',
+            field=models.PositiveSmallIntegerField(default=100, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)]),
+        ),
+    ]
@@ -1,6 +1,7 @@
 """
 Movie Matching System Models (real-time friendly)
 """
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
 from apps.authentication.models import User
@@ -23,6 +24,11 @@ class MatchingSession(models.Model):
     release_year_max = models.IntegerField(null=True, blank=True)
     max_runtime = models.IntegerField(null=True, blank=True)
 
+    # Percent of participants that must like a movie for it to win (100 = everyone)
+    consensus_quorum = models.PositiveSmallIntegerField(
+        default=100, validators=[MinValueValidator(1), MaxValueValidator(100)]
+    )
+
     # Session state
     STATUS_CHOICES = [
         ('waiting', 'Waiting for participants'),
@@ -32,6 +38,9 @@ class MatchingSession(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
 
+    # Ordered candidate movie ids (as strings), built once when the session starts
+    deck = models.JSONField(default=list, blank=True)
+
     # If a match was chosen as final
     matched_movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, null=True, blank=True, related_name='matched_in_sessions')
 
@@ -54,12 +63,23 @@ class MatchingSession(models.Model):
         self.save(update_fields=['status', 'started_at', 'updated_at'])
 
     def complete(self, chosen_movie: Movie = None):
-        """Complete session and optionally set chosen match."""
-        self.status = 'completed'
-        self.completed_at = timezone.now()
+        """
+        Complete session and optionally set chosen match.
+        Conditional on the session still being open, so when two swipes
+        reach consensus at once only the first one wins; returns whether
+        this call completed it.
+        """
+        now = timezone.now()
+        changes = {'status': 'completed', 'completed_at': now, 'updated_at': now}
         if chosen_movie:
-            self.matched_movie = chosen_movie
-        self.save(update_fields=['status', 'completed_at', 'matched_movie', 'updated_at'])
+            changes['matched_movie'] = chosen_movie
+        completed = MatchingSession.objects.filter(
+            id=self.id, status__in=['waiting', 'active']
+        ).update(**changes)
+        if completed:
+            for field, value in changes.items():
+                setattr(self, field, value)
+        return bool(completed)
 
 
 class MovieSwipe(models.Model):
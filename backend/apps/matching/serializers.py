@@ -16,7 +16,7 @@ class MatchingSessionCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = MatchingSession
-        fields = ['id', 'name', 'selected_genres', 'theme', 'release_year_min', 'release_year_max', 'max_runtime']
+        fields = ['id', 'name', 'selected_genres', 'theme', 'release_year_min', 'release_year_max', 'max_runtime', 'consensus_quorum']
 
     def create(self, validated_data):
         # created_by is injected in view (serializer.save(created_by=request.user))
@@ -29,7 +29,7 @@ class MatchingSessionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = MatchingSession
-        fields = ['id', 'name', 'created_by', 'participants', 'status', 'selected_genres', 'theme', 'release_year_min', 'release_year_max', 'max_runtime', 'created_at', 'started_at', 'updated_at']
+        fields = ['id', 'name', 'created_by', 'participants', 'status', 'selected_genres', 'theme', 'release_year_min', 'release_year_max', 'max_runtime', 'consensus_quorum', 'matched_movie', 'created_at', 'started_at', 'completed_at', 'updated_at']
 
 
 class MovieSwipeSerializer(serializers.ModelSerializer):
@@ -0,0 +1,8 @@
+"""
+Matching Signals
+"""
+from django.dispatch import Signal
+
+# Sent by utils.complete_session, once per session, when a movie reaching the
+# consensus quorum completed it. kwargs: session, movie
+match_found = Signal()
@@ -0,0 +1,244 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.movies.models import Movie
+from apps.notifications.models import Notification
+from apps.recommendations.models import Recommendation
+from popcult_project.asgi import application
+from .models import MatchingSession, MatchResult, MovieSwipe
+from .signals import match_found
+from .utils import SessionClosedError, apply_swipe, calculate_match_results_for_session, check_quorum, get_tally
+
+
+class MatchingTallyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                email=f'user{i}@example.com',
+                phone_number=f'+100000000{i}',
+                password='TestPass123!',
+                username=f'user{i}'
+            )
+            for i in range(4)
+        ]
+        self.session = MatchingSession.objects.create(created_by=self.users[0])
+        self.session.participants.add(*self.users[:3])
+        self.movies = [
+            Movie.objects.create(tmdb_id=i, title=f'Movie {i}', overview='', original_language='en')
+            for i in range(1, 4)
+        ]
+
+    def test_swipes_only_touch_the_swiped_movie(self):
+        """Test likes, re-swipes and passes move one tally by their delta"""
+        apply_swipe(self.session, self.users[0], self.movies[0], True)
+        apply_swipe(self.session, self.users[1], self.movies[0], True)
+        apply_swipe(self.session, self.users[0], self.movies[1], True)
+        outcome = apply_swipe(self.session, self.users[0], self.movies[1], False)
+
+        self.assertEqual((outcome.likes_count, outcome.match_percentage), (0, 0.0))
+        result = MatchResult.objects.get(session=self.session)
+        self.assertEqual((result.movie, result.likes_count), (self.movies[0], 2))
+        self.assertAlmostEqual(result.match_percentage, 200 / 3)
+
+        # Repeating a swipe is a no-op
+        with self.assertNumQueries(4):
+            apply_swipe(self.session, self.users[0], self.movies[0], True)
+        self.assertEqual(get_tally(self.session.id, self.movies[0].id), 2)
+
+    def test_failed_swipe_does_not_leave_tally_drift(self):
+        """Test a swipe whose transaction rolls back leaves no delta in the cached tallies"""
+        apply_swipe(self.session, self.users[0], self.movies[0], True)
+
+        with mock.patch('apps.matching.utils._apply_result_delta', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                apply_swipe(self.session, self.users[1], self.movies[0], True)
+
+        self.assertFalse(MovieSwipe.objects.filter(user=self.users[1]).exists())
+        self.assertEqual(get_tally(self.session.id, self.movies[0].id), 1)
+        self.assertEqual(get_tally(self.session.id, self.movies[0].id, liked=False), 0)
+
+    def test_consensus_completes_session(self):
+        """Test the swipe that reaches the quorum completes the session and closes it"""
+        self.session.consensus_quorum = 50
+        self.session.save()
+
+        self.assertFalse(apply_swipe(self.session, self.users[0], self.movies[2], True).completed)
+        self.assertTrue(apply_swipe(self.session, self.users[1], self.movies[2], True).completed)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.matched_movie), ('completed', self.movies[2]))
+        with self.assertRaises(SessionClosedError):
+            apply_swipe(self.session, self.users[1], self.movies[0], True)
+
+    def test_likes_past_a_lowered_quorum_complete_session(self):
+        """Test a quorum that dropped below a movie's likes still completes the session"""
+        self.session.consensus_quorum = 100
+        self.session.save()
+        for user in self.users[:2]:
+            self.assertFalse(apply_swipe(self.session, user, self.movies[0], True, participants_count=3).completed)
+
+        # Counted against a smaller group the third like overshoots the quorum
+        self.assertTrue(apply_swipe(self.session, self.users[2], self.movies[0], True, participants_count=2).completed)
+
+    def test_membership_change_rechecks_quorum(self):
+        """Test a movie that already has the likes a new participant count needs completes the session"""
+        self.session.consensus_quorum = 100
+        self.session.save()
+        for user in self.users[:2]:
+            apply_swipe(self.session, user, self.movies[1], True)
+        self.assertFalse(check_quorum(self.session))
+
+        self.session.participants.remove(self.users[2])
+        self.assertTrue(check_quorum(self.session))
+        self.assertFalse(check_quorum(self.session))
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.matched_movie), ('completed', self.movies[1]))
+
+    def test_match_found_notifies_participants_once(self):
+        """Test crossing the quorum notifies every participant, and only once per movie"""
+        for user in self.users[:3]:
+            apply_swipe(self.session, user, self.movies[0], True)
+        # A repeated signal is deduplicated in the database, not the cache
+        cache.clear()
+        match_found.send(sender=MatchingSession, session=self.session, movie=self.movies[0])
+
+        notified = Notification.objects.filter(notification_type='match_found')
+        self.assertEqual(sorted(notified.values_list('user_id', flat=True)), sorted(u.id for u in self.users[:3]))
+
+    def test_rebuild_matches_incremental_results(self):
+        """Test recovery recomputes the same results and reseeds the tallies"""
+        for user in self.users[:2]:
+            for movie, liked in zip(self.movies, (True, user == self.users[0], False)):
+                apply_swipe(self.session, user, movie, liked)
+        incremental = sorted(MatchResult.objects.values_list('movie_id', 'likes_count', 'match_percentage'))
+
+        cache.clear()
+        calculate_match_results_for_session(self.session)
+        rebuilt = sorted(MatchResult.objects.values_list('movie_id', 'likes_count', 'match_percentage'))
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(get_tally(self.session.id, self.movies[1].id), 1)
+
+    def test_join_rescales_percentages(self):
+        """Test a new participant rescales existing results"""
+        apply_swipe(self.session, self.users[0], self.movies[0], True)
+        client = APIClient()
+        client.force_authenticate(self.users[3])
+
+        response = client.post(f'/api/matching/{self.session.id}/join/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MatchResult.objects.get().match_percentage, 25.0)
+
+
+class MatchingDeckTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='host@example.com', phone_number='+1000000008', password='TestPass123!', username='host'
+        )
+        self.client.force_authenticate(self.user)
+        self.session = MatchingSession.objects.create(
+            created_by=self.user, selected_genres=['28'], release_year_min=2000, max_runtime=150
+        )
+        self.session.participants.add(self.user)
+
+        def movie(tmdb_id, genres, year, runtime=100, votes=10):
+            return Movie.objects.create(
+                tmdb_id=tmdb_id, title=f'Movie {tmdb_id}', overview='', original_language='en',
+                genres=genres, release_date=f'{year}-06-01', runtime=runtime, tmdb_vote_count=votes,
+                tmdb_vote_average=7.0,
+            )
+
+        self.popular = movie(1, [28], 2010, votes=1000)
+        self.recommended = movie(2, [28, 18], 2015)
+        self.off_genre = movie(3, [18], 2015)
+        self.too_old = movie(4, [28], 1990)
+        self.too_long = movie(5, [28], 2015, runtime=200)
+        Recommendation.objects.create(user=self.user, movie=self.recommended, score=0.9)
+
+    def test_start_builds_ranked_deck(self):
+        """Test starting a session builds a filtered deck ranked by recommendations"""
+        response = self.client.post(f'/api/matching/{self.session.id}/start/')
+
+        self.assertEqual(response.status_code, 200)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'active')
+        self.assertEqual(self.session.deck, [str(self.recommended.id), str(self.popular.id)])
+
+    def test_deck_chunks_use_one_query_each(self):
+        """Test deck chunks come back in deck order without per-card queries"""
+        self.client.post(f'/api/matching/{self.session.id}/start/')
+
+        with self.assertNumQueries(3):  # session, membership, movies
+            response = self.client.get(f'/api/matching/{self.session.id}/deck/?limit=1')
+        self.assertEqual([m['id'] for m in response.data['results']], [str(self.recommended.id)])
+        self.assertEqual(response.data['next_offset'], 1)
+
+        response = self.client.get(f'/api/matching/{self.session.id}/deck/?offset=1')
+        self.assertEqual([m['id'] for m in response.data['results']], [str(self.popular.id)])
+        self.assertIsNone(response.data['next_offset'])
+
+    def test_deck_skips_cards_that_cannot_win(self):
+        """Test a card everyone needed has passed on is no longer served"""
+        self.client.post(f'/api/matching/{self.session.id}/start/')
+        apply_swipe(self.session, self.user, self.recommended, False)
+
+        response = self.client.get(f'/api/matching/{self.session.id}/deck/')
+        self.assertEqual([m['id'] for m in response.data['results']], [str(self.popular.id)])
+
+
+class MatchingConsumerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='swiper@example.com', phone_number='+1000000009', password='TestPass123!', username='swiper'
+        )
+        self.friend = User.objects.create_user(
+            email='friend@example.com', phone_number='+1000000010', password='TestPass123!', username='friend'
+        )
+        self.session = MatchingSession.objects.create(created_by=self.user)
+        self.session.participants.add(self.user, self.friend)
+        self.movie = Movie.objects.create(tmdb_id=1, title='Movie 1', overview='', original_language='en')
+
+    def test_swipe_broadcasts_delta_and_snapshot(self):
+        """Test a swipe broadcasts only the swiped movie's tally and a snapshot resyncs at its seq"""
+        async def swipe():
+            communicator = WebsocketCommunicator(application, f'/ws/matching/{self.session.id}/')
+            communicator.scope['user'] = self.user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.send_json_to({'action': 'swipe', 'movie_id': str(self.movie.id), 'liked': True})
+            delta = await communicator.receive_json_from(timeout=5)
+            await communicator.send_json_to({'action': 'snapshot'})
+            snapshot = await communicator.receive_json_from(timeout=5)
+            await communicator.disconnect()
+            return delta, snapshot
+
+        delta, snapshot = async_to_sync(swipe)()
+
+        self.assertEqual(delta, {
+            'type': 'results_delta',
+            'v': 1,
+            'seq': 1,
+            'movie_id': str(self.movie.id),
+            'likes_count': 1,
+            'match_percentage': 50.0,
+            'user_id': str(self.user.id),
+            'liked': True,
+        })
+        self.assertEqual(snapshot, {
+            'type': 'results_snapshot',
+            'v': 1,
+            'seq': 1,
+            'completed': False,
+            'results': [
+                {'movie_id': str(self.movie.id), 'title': 'Movie 1', 'likes_count': 1, 'match_percentage': 50.0},
+            ],
+        })
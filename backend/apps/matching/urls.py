@@ -2,6 +2,8 @@ from django.urls import path
 from .views import (
     CreateMatchingSessionView,
     JoinSessionView,
+    StartSessionView,
+    SessionDeckView,
     SwipeMovieView,
     GetMatchResultsView,
     SessionDetailView,
@@ -10,6 +12,8 @@ from .views import (
 urlpatterns = [
     path("create/", CreateMatchingSessionView.as_view(), name="create-session"),
     path("<uuid:session_id>/join/", JoinSessionView.as_view(), name="join-session"),
+    path("<uuid:session_id>/start/", StartSessionView.as_view(), name="start-session"),
+    path("<uuid:session_id>/deck/", SessionDeckView.as_view(), name="session-deck"),
     path("<uuid:session_id>/swipe/", SwipeMovieView.as_view(), name="swipe-movie"),
     path("<uuid:session_id>/results/", GetMatchResultsView.as_view(), name="match-results"),
     path("<uuid:session_id>/", SessionDetailView.as_view(), name="session-detail"),
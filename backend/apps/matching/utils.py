@@ -1,50 +1,329 @@
 """
 Utility functions for matching logic.
+
+Swipe tallies are kept incrementally: every swipe changes exactly one
+movie's like and pass counts by its delta (-1, 0 or +1). The hot counts
+live in the cache (Redis in production) so they can be read without
+touching the database; the durable like count is the session's
+MatchResult row for that movie, adjusted with the same delta in SQL.
+Rebuilding everything from MovieSwipe rows
+(calculate_match_results_for_session) is only needed for recovery, e.g.
+after a cache flush or a manual data fix.
+
+The same deltas drive consensus: a swipe only has to compare its own
+movie's new like count with the quorum, so detection is O(1). The quorum
+moves when participants join, so membership changes re-check every
+result (check_quorum). Either way the session's conditional UPDATE
+(MatchingSession.complete) picks the single winner.
 """
+import math
+from collections import namedtuple
+
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, F, Q
 from django.utils import timezone
 from .models import MatchingSession, MovieSwipe, MatchResult
-from apps.movies.models import Movie
+from .signals import match_found
+
+TALLY_TTL = 60 * 60 * 24  # seconds; sessions rarely last longer than an evening
+PROTOCOL_VERSION = 1  # of the results_delta / results_snapshot WebSocket messages
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+SwipeOutcome = namedtuple('SwipeOutcome', ['swipe', 'likes_count', 'match_percentage', 'completed'])
+
+
+class SessionClosedError(Exception):
+    """Raised when swiping in a session that is completed or cancelled"""
+
+
+def tally_key(session_id, movie_id, liked=True):
+    kind = 'tally' if liked else 'passes'
+    return f"matching:{kind}:{session_id}:{movie_id}"
+
+
+def closed_key(session_id):
+    return f"matching:closed:{session_id}"
+
+
+def get_tally(session_id, movie_id, liked=True):
+    """Current like (or pass) count for a movie in a session, seeded from the database on a miss"""
+    key = tally_key(session_id, movie_id, liked)
+    count = cache.get(key)
+    if count is None:
+        count = MovieSwipe.objects.filter(session_id=session_id, movie_id=movie_id, liked=liked).count()
+        cache.add(key, count, TALLY_TTL)
+    return count
+
+
+def _bump_tally(session_id, movie_id, delta, liked=True):
+    """Apply a delta to a tally seeded by get_tally() before the swipe was written"""
+    key = tally_key(session_id, movie_id, liked)
+    try:
+        return max(cache.incr(key, delta), 0)
+    except ValueError:
+        # Evicted meanwhile: recount, which already includes our uncommitted swipe
+        count = MovieSwipe.objects.filter(session_id=session_id, movie_id=movie_id, liked=liked).count()
+        cache.set(key, count, TALLY_TTL)
+        return count
+
+
+def likes_needed(session: MatchingSession, participants_count):
+    """Likes a movie needs to reach the session's consensus quorum"""
+    return max(math.ceil(participants_count * session.consensus_quorum / 100), 1)
+
+
+def is_session_closed(session: MatchingSession):
+    return session.status in CLOSED_STATUSES or bool(cache.get(closed_key(session.id)))
+
+
+def apply_swipe(session: MatchingSession, user, movie, liked, participants_count=None):
+    """
+    Record a swipe and update the tallies of that one movie.
+    - Upserts the MovieSwipe (row-locked so concurrent re-swipes serialize)
+    - Moves the cached like/pass counts by the swipe's delta (dropping them
+      for a reseed if the transaction fails)
+    - Adjusts only this movie's MatchResult, deleting it when nobody likes it
+    - Completes the session when the movie reaches the consensus quorum
+    Raises SessionClosedError once the session is completed or cancelled.
+    Returns a SwipeOutcome; `completed` is True only for the swipe that
+    completed the session.
+    """
+    if is_session_closed(session):
+        raise SessionClosedError(session.id)
+
+    liked = bool(liked)
+    if participants_count is None:
+        participants_count = session.participants.count()
+    participants_count = participants_count or 1  # avoid div by zero
+
+    try:
+        with transaction.atomic():
+            swipe = (
+                MovieSwipe.objects.select_for_update()
+                .filter(session=session, user=user, movie=movie)
+                .first()
+            )
+            previous = swipe.liked if swipe else None
+            # Seed the tallies before writing, so a seed never includes this swipe.
+            # Concurrent seeders race on cache.add() and each writer then applies
+            # only its own delta.
+            likes = get_tally(session.id, movie.id)
+            get_tally(session.id, movie.id, liked=False)
+
+            if swipe is None:
+                swipe = MovieSwipe.objects.create(session=session, user=user, movie=movie, liked=liked)
+            elif swipe.liked != liked:
+                swipe.liked = liked
+                swipe.save(update_fields=['liked', 'updated_at'])
+
+            delta = int(liked) - int(previous is True)
+            if delta:
+                likes = _bump_tally(session.id, movie.id, delta)
+                _apply_result_delta(session, movie, delta, participants_count)
+            pass_delta = int(not liked) - int(previous is False)
+            if pass_delta:
+                _bump_tally(session.id, movie.id, pass_delta, liked=False)
+    except Exception:
+        # The swipe rolled back but the cache kept our deltas: drop the
+        # tallies so the next read reseeds them from the database
+        cache.delete_many([tally_key(session.id, movie.id), tally_key(session.id, movie.id, liked=False)])
+        raise
+
+    completed = False
+    if delta > 0 and likes >= likes_needed(session, participants_count):
+        completed = complete_session(session, movie)
+
+    return SwipeOutcome(swipe, likes, round(likes / participants_count * 100.0, 2), completed)
+
+
+def complete_session(session: MatchingSession, movie):
+    """
+    Complete the session on `movie` and announce the match. Safe to call
+    from racing swipes: only the call that completed it returns True.
+    """
+    if not session.complete(movie):
+        return False
+    cache.set(closed_key(session.id), True, TALLY_TTL)
+    match_found.send(sender=MatchingSession, session=session, movie=movie)
+    return True
+
+
+def check_quorum(session: MatchingSession, participants_count=None):
+    """
+    Complete the session if some movie already has the likes the current
+    quorum needs, e.g. after the participant count changed. One query on
+    the session's results; returns whether this call completed it.
+    """
+    if participants_count is None:
+        participants_count = session.participants.count()
+    best = (
+        MatchResult.objects.filter(
+            session=session, likes_count__gte=likes_needed(session, participants_count or 1)
+        )
+        .select_related('movie')
+        .order_by('-likes_count', 'matched_at')
+        .first()
+    )
+    return best is not None and complete_session(session, best.movie)
+
+
+def hopeless_movie_ids(session: MatchingSession, movie_ids, participants_count):
+    """
+    Movies in `movie_ids` that can no longer reach the quorum because too
+    many participants passed on them. One cache round trip; movies without
+    a cached pass count are assumed to still be winnable.
+    """
+    max_passes = participants_count - likes_needed(session, participants_count)
+    keys = {tally_key(session.id, movie_id, liked=False): movie_id for movie_id in movie_ids}
+    passes = cache.get_many(list(keys))
+    return {keys[key] for key, count in passes.items() if count > max_passes}
+
+
+def _apply_result_delta(session, movie, delta, participants_count):
+    """Move one MatchResult row by `delta` likes in SQL, so concurrent swipes never overwrite each other"""
+    results = MatchResult.objects.filter(session=session, movie=movie)
+    changes = {
+        'likes_count': F('likes_count') + delta,
+        'match_percentage': (F('likes_count') + delta) * 100.0 / participants_count,
+        'matched_at': timezone.now(),
+    }
+    if delta > 0 and not results.update(**changes):
+        MatchResult.objects.bulk_create(
+            [MatchResult(session=session, movie=movie, likes_count=0)], ignore_conflicts=True
+        )
+        results.update(**changes)
+    elif delta < 0:
+        results.update(**changes)
+        results.filter(likes_count__lte=0).delete()
+
+
+def next_seq(session_id):
+    """Next broadcast sequence number of a session (starts at 1)"""
+    key = seq_key(session_id)
+    cache.add(key, 0, TALLY_TTL)
+    try:
+        return cache.incr(key)
+    except ValueError:  # evicted between add() and incr(); clients resync on the gap
+        cache.set(key, 1, TALLY_TTL)
+        return 1
+
+
+def current_seq(session_id):
+    return cache.get(seq_key(session_id), 0)
+
+
+def seq_key(session_id):
+    return f"matching:seq:{session_id}"
+
+
+def results_delta(outcome: SwipeOutcome):
+    """
+    Group message announcing one swipe and the swiped movie's new tally.
+    Call after the swipe is committed: a snapshot taken at seq N then
+    already includes every delta numbered N or lower.
+    """
+    return {
+        'type': 'results_delta',
+        'v': PROTOCOL_VERSION,
+        'seq': next_seq(outcome.swipe.session_id),
+        'movie_id': str(outcome.swipe.movie_id),
+        'likes_count': outcome.likes_count,
+        'match_percentage': outcome.match_percentage,
+        'user_id': str(outcome.swipe.user_id),
+        'liked': outcome.swipe.liked,
+    }
+
+
+def session_completed(session: MatchingSession, outcome: SwipeOutcome):
+    """Final group message once a movie reached the quorum"""
+    return {
+        'type': 'session_completed',
+        'v': PROTOCOL_VERSION,
+        'seq': next_seq(session.id),
+        'movie_id': str(outcome.swipe.movie_id),
+        'likes_count': outcome.likes_count,
+        'match_percentage': outcome.match_percentage,
+    }
+
+
+def swipe_events(session: MatchingSession, outcome: SwipeOutcome):
+    """Group messages for one swipe: its delta, then the final event if it completed the session"""
+    events = [results_delta(outcome)]
+    if outcome.completed:
+        events.append(session_completed(session, outcome))
+    return events
+
+
+def results_snapshot(session: MatchingSession):
+    """Full result list for (re)syncing a client, tagged with the seq it is current to"""
+    seq = current_seq(session.id)
+    results = MatchResult.objects.filter(session=session).select_related('movie').order_by(
+        '-match_percentage', '-likes_count'
+    )
+    return {
+        'type': 'results_snapshot',
+        'v': PROTOCOL_VERSION,
+        'seq': seq,
+        'completed': is_session_closed(session),
+        'results': [
+            {
+                'movie_id': str(r.movie_id),
+                'title': r.movie.title,
+                'likes_count': r.likes_count,
+                'match_percentage': r.match_percentage,
+            }
+            for r in results
+        ],
+    }
+
+
+def refresh_match_percentages(session: MatchingSession):
+    """Recompute every percentage after the participant count changed (one UPDATE)"""
+    participants_count = session.participants.count() or 1
+    MatchResult.objects.filter(session=session).update(
+        match_percentage=F('likes_count') * 100.0 / participants_count
+    )
 
 
 def calculate_match_results_for_session(session: MatchingSession):
     """
-    Recalculate MatchResult objects for the session.
-    - Count likes per movie
+    Rebuild MatchResult objects and cached like/pass tallies for the session from its swipes.
+    Only needed for recovery; regular swipes go through apply_swipe().
+    - Count likes per movie (one aggregate query)
     - Compute percent: (likes_count / participants_count) * 100
     - Replace MatchResult rows for the session (safe within atomic)
     Returns the list of MatchResult instances ordered by match_percentage desc.
     """
     participants_count = session.participants.count() or 1  # avoid div by zero
 
-    # collect likes per movie
-    swipes = MovieSwipe.objects.filter(session=session)
-    movie_like_map = {}
-    for s in swipes:
-        if s.liked:
-            movie_like_map.setdefault(s.movie_id, 0)
-            movie_like_map[s.movie_id] += 1
+    counts = (
+        MovieSwipe.objects.filter(session=session)
+        .values('movie_id')
+        .annotate(likes=Count('id', filter=Q(liked=True)), passes=Count('id', filter=Q(liked=False)))
+    )
+    like_counts, tallies = {}, {}
+    for row in counts:
+        like_counts[row['movie_id']] = row['likes']
+        tallies[tally_key(session.id, row['movie_id'])] = row['likes']
+        tallies[tally_key(session.id, row['movie_id'], liked=False)] = row['passes']
+
+    now = timezone.now()
+    results = [
+        MatchResult(
+            session=session,
+            movie_id=movie_id,
+            likes_count=likes_count,
+            match_percentage=likes_count * 100.0 / participants_count,
+            matched_at=now,
+        )
+        for movie_id, likes_count in like_counts.items() if likes_count
+    ]
 
     with transaction.atomic():
-        # remove old results
         MatchResult.objects.filter(session=session).delete()
-
-        results = []
-        for movie_id, likes_count in movie_like_map.items():
-            try:
-                movie = Movie.objects.get(id=movie_id)
-            except Movie.DoesNotExist:
-                continue
-
-            percent = (likes_count / participants_count) * 100.0
-            mr = MatchResult.objects.create(
-                session=session,
-                movie=movie,
-                likes_count=likes_count,
-                match_percentage=round(percent, 2),
-                matched_at=timezone.now(),
-            )
-            results.append(mr)
+        MatchResult.objects.bulk_create(results)
+        cache.set_many(tallies, TALLY_TTL)
 
     # return results sorted
     results.sort(key=lambda r: (r.match_percentage, r.likes_count), reverse=True)
@@ -6,13 +6,16 @@ REST endpoints for matching sessions.
 - swipe (like/pass)
 - get match results
 - session detail
+- start session (builds the candidate deck)
+- deck chunks
 """
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 
 from .models import MatchingSession, MovieSwipe, MatchResult
 from .serializers import (
@@ -22,8 +25,18 @@ from .serializers import (
     MatchResultSerializer,
 )
 from apps.movies.models import Movie
-
-from .utils import calculate_match_results_for_session  # helper implemented above
+from apps.movies.serializers import MovieSerializer
+
+from .deck import build_deck, deck_chunk
+from .utils import (
+    SessionClosedError,
+    apply_swipe,
+    check_quorum,
+    hopeless_movie_ids,
+    is_session_closed,
+    refresh_match_percentages,
+    swipe_events,
+)
 
 
 class CreateMatchingSessionView(generics.CreateAPIView):
@@ -55,15 +68,84 @@ class JoinSessionView(generics.GenericAPIView):
 
         session.participants.add(request.user)
         session.save(update_fields=['updated_at'])
+        refresh_match_percentages(session)
+        check_quorum(session)
         serializer = self.get_serializer(session, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class StartSessionView(generics.GenericAPIView):
+    """
+    POST: start the session (creator only). Builds the candidate deck once
+    from the session filters and the participants' recommendation profiles.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MatchingSessionSerializer
+
+    def post(self, request, session_id):
+        session = get_object_or_404(MatchingSession, id=session_id)
+
+        if session.created_by_id != request.user.id:
+            return Response({'error': 'Only the creator can start the session'}, status=status.HTTP_403_FORBIDDEN)
+
+        if session.status != 'waiting':
+            return Response({'error': 'Session has already started'}, status=status.HTTP_400_BAD_REQUEST)
+
+        deck = build_deck(session)
+        session.start()
+
+        serializer = self.get_serializer(session, context={'request': request})
+        return Response({'session': serializer.data, 'deck_size': len(deck)}, status=status.HTTP_200_OK)
+
+
+class SessionDeckView(generics.GenericAPIView):
+    """
+    GET: ?offset=0&limit=20 — the next chunk of the session's deck, in order.
+    Each chunk is one query, however many cards it holds. Cards that can no
+    longer reach the consensus quorum are left out, and a finished session
+    serves no cards at all.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MovieSerializer
+    max_limit = 50
+
+    def get(self, request, session_id):
+        session = get_object_or_404(
+            MatchingSession.objects.only('id', 'deck', 'status', 'consensus_quorum'), id=session_id
+        )
+        participant_ids = set(session.participants.values_list('id', flat=True))
+
+        if request.user.id not in participant_ids:
+            return Response({'error': 'You must join the session first'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_session_closed(session):
+            return Response({'results': [], 'offset': offset, 'next_offset': None, 'deck_size': len(session.deck)})
+
+        chunk_ids = session.deck[offset:offset + limit]
+        hopeless = hopeless_movie_ids(session, chunk_ids, len(participant_ids))
+        movies = [movie for movie in deck_chunk(session, offset, limit) if str(movie.id) not in hopeless]
+        next_offset = offset + limit if offset + limit < len(session.deck) else None
+        return Response({
+            'results': self.get_serializer(movies, many=True).data,
+            'offset': offset,
+            'next_offset': next_offset,
+            'deck_size': len(session.deck),
+        }, status=status.HTTP_200_OK)
+
+
 class SwipeMovieView(generics.GenericAPIView):
     """
     POST: Body: { "movie_id": "<uuid>", "liked": true/false }
     Creates or updates a MovieSwipe for the (session, user, movie).
-    After each update, recompute the MatchResults.
+    Only the swiped movie's tally and MatchResult change (see utils.apply_swipe).
+    Prefer the WebSocket (ws/matching/<session_id>/); this endpoint holds a
+    worker thread per swipe but broadcasts the same delta to connected clients.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = MovieSwipeSerializer  # describes the swipe structure
@@ -71,7 +153,7 @@ class SwipeMovieView(generics.GenericAPIView):
     def post(self, request, session_id):
         session = get_object_or_404(MatchingSession, id=session_id)
 
-        if request.user not in session.participants.all():
+        if not session.participants.filter(id=request.user.id).exists():
             return Response({'error': 'You must join the session first'}, status=status.HTTP_403_FORBIDDEN)
 
         movie_id = request.data.get('movie_id')
@@ -82,20 +164,26 @@ class SwipeMovieView(generics.GenericAPIView):
 
         movie = get_object_or_404(Movie, id=movie_id)
 
-        # upsert swipe
-        with transaction.atomic():
-            swipe, created = MovieSwipe.objects.update_or_create(
-                session=session, user=request.user, movie=movie,
-                defaults={'liked': bool(liked)}
-            )
+        try:
+            outcome = apply_swipe(session, request.user, movie, liked)
+        except SessionClosedError:
+            return Response({'error': 'Session is no longer accepting swipes'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # recalc results (helper will delete & recreate MatchResult rows)
-            results = calculate_match_results_for_session(session)
+        group_send = async_to_sync(get_channel_layer().group_send)
+        for event in swipe_events(session, outcome):
+            group_send(f"matching_{session.id}", event)
+        results = MatchResult.objects.filter(session=session).select_related('movie').order_by(
+            '-match_percentage', '-likes_count'
+        )
 
         # Return the updated swipe and results to client
-        swipe_serializer = self.get_serializer(swipe, context={'request': request})
+        swipe_serializer = self.get_serializer(outcome.swipe, context={'request': request})
         results_serializer = MatchResultSerializer(results, many=True, context={'request': request})
-        return Response({'swipe': swipe_serializer.data, 'results': results_serializer.data}, status=status.HTTP_200_OK)
+        return Response({
+            'swipe': swipe_serializer.data,
+            'results': results_serializer.data,
+            'completed': outcome.completed,
+        }, status=status.HTTP_200_OK)
 
 
 class GetMatchResultsView(generics.ListAPIView):
@@ -108,7 +196,7 @@ class GetMatchResultsView(generics.ListAPIView):
     def get_queryset(self):
         session_id = self.kwargs.get('session_id')
         session = get_object_or_404(MatchingSession, id=session_id)
-        return MatchResult.objects.filter(session=session).order_by('-match_percentage', '-matched_at')
+        return MatchResult.objects.filter(session=session).select_related('movie').order_by('-match_percentage', '-matched_at')
 
     # ListAPIView already implements get() using serializer_class
 
@@ -126,7 +214,7 @@ class SessionDetailView(generics.GenericAPIView):
 
         # include swipes and results summary
         swipes = MovieSwipe.objects.filter(session=session).select_related('movie', 'user')
-        results = MatchResult.objects.filter(session=session).order_by('-match_percentage')
+        results = MatchResult.objects.filter(session=session).select_related('movie').order_by('-match_percentage')
 
         results_data = MatchResultSerializer(results, many=True, context={'request': request}).data
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Movie, UserMovieInteraction, Watchlist, WatchlistMovie
+from .models import Movie, UserMovieInteraction, Watchlist, WatchlistMovie, SyncCheckpoint
 
 
 # ============================
@@ -73,3 +73,12 @@ class WatchlistMovieAdmin(admin.ModelAdmin):
     )
     search_fields = ("movie__title", "watchlist__name", "added_by__username")
     ordering = ("-added_at",)
+
+
+# ============================
+# Sync Checkpoint Admin
+# ============================
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "high_water_mark", "updated_at")
+    readonly_fields = ("updated_at",)
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.movies.tasks import update_popular_movies
+from utils.tmdb_stub import TMDbStubServer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the popular-movies sync against a local TMDb stub (no network, changes rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=0.05, help='Simulated TMDb latency per request (seconds)')
+        parser.add_argument('--workers', type=int, default=None, help='Override TMDB_MAX_WORKERS')
+        parser.add_argument('--rate', type=int, default=None, help='Override TMDB_RATE_LIMIT (requests/second)')
+        parser.add_argument('--cache', action='store_true', help='Keep the TMDb response cache enabled')
+
+    def handle(self, *args, **options):
+        overrides = {'TMDB_CACHE_ENABLED': options['cache']}
+        if options['workers']:
+            overrides['TMDB_MAX_WORKERS'] = options['workers']
+        if options['rate']:
+            overrides['TMDB_RATE_LIMIT'] = options['rate']
+
+        with TMDbStubServer(latency=options['latency']) as stub:
+            overrides['TMDB_BASE_URL'] = stub.base_url
+            started = time.perf_counter()
+            try:
+                with override_settings(**overrides), transaction.atomic():
+                    update_popular_movies()
+                    raise _Rollback
+            except _Rollback:
+                pass
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Synced popular movies with {stub.request_count} TMDb requests '
+                f'in {elapsed:.2f}s ({stub.request_count / elapsed:.1f} req/s)'
+            )
+        )
@@ -0,0 +1,74 @@
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.movies.models import SyncCheckpoint
+from utils.tmdb_export import chunked, get_loader, movies_from_rows, open_export, parse_rows, read_lines
+
+
+class Command(BaseCommand):
+    help = 'Import a TMDb daily ID export or a JSON-lines dump of movie payloads (plain or gzipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Export file, e.g. movie_ids_10_19_2026.json.gz')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Movies written per transaction')
+        parser.add_argument('--checkpoint', default=None, help='Checkpoint name (defaults to the file name)')
+        parser.add_argument('--restart', action='store_true', help='Ignore any saved checkpoint and start from line 1')
+        loader = parser.add_mutually_exclusive_group()
+        loader.add_argument('--copy', dest='use_copy', action='store_true', default=None,
+                            help='Load with COPY (PostgreSQL only, default there)')
+        loader.add_argument('--no-copy', dest='use_copy', action='store_false',
+                            help='Load with chunked bulk_create')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        try:
+            loader = get_loader(options['use_copy'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        name = options['checkpoint'] or f'import:{os.path.basename(path)}'
+        checkpoint, _ = SyncCheckpoint.objects.get_or_create(name=name)
+        if options['restart']:
+            checkpoint.position = 0
+        if checkpoint.position:
+            self.stdout.write(f'Resuming {name} after line {checkpoint.position}')
+
+        stats = Counter()
+        started = time.perf_counter()
+        with open_export(path) as fh:
+            rows = parse_rows(read_lines(fh, skip=checkpoint.position), stats)
+            for last_line, full, skeletons in chunked(movies_from_rows(rows, stats), options['chunk_size']):
+                # The checkpoint commits with the chunk, so a resumed run never skips or repeats rows
+                with transaction.atomic():
+                    loader.load(full, skeletons)
+                    checkpoint.position = last_line
+                    checkpoint.save(update_fields=['position', 'updated_at'])
+
+                stats['full'] += len(full)
+                stats['skeletons'] += len(skeletons)
+                loaded = stats['full'] + stats['skeletons']
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'line {last_line}: {loaded} movies loaded, {stats["skipped"]} skipped '
+                    f'({loaded / elapsed:.0f} movies/s)'
+                )
+
+        if stats['last_line'] > checkpoint.position:
+            # Trailing rows were all skipped; don't re-read them next time
+            checkpoint.position = stats['last_line']
+            checkpoint.save(update_fields=['position', 'updated_at'])
+
+        elapsed = time.perf_counter() - started
+        loaded = stats['full'] + stats['skeletons']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {loaded} movies ({stats["full"]} full payloads, {stats["skeletons"]} ID-only) '
+                f'in {elapsed:.1f}s, {stats["skipped"]} rows skipped'
+            )
+        )
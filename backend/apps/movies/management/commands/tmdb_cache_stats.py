@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from utils.tmdb_client import response_cache
+
+
+class Command(BaseCommand):
+    help = 'Show TMDb response cache hit ratio and bytes saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = response_cache.stats()
+        for name, value in stats.items():
+            self.stdout.write(f'{name}: {value}')
+
+        if options['reset']:
+            response_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('\nCounters reset'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+def create_genres_gin_index(apps, schema_editor):
+    # JSONB containment (genres @> '[28]') for matching decks; PostgreSQL only
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS movies_genres_gin ON movies USING gin (genres jsonb_path_ops)'
+        )
+
+
+def drop_genres_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS movies_genres_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_synccheckpoint_position'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-tmdb_vote_count'], name='movies_tmdb_vo_f91a99_idx'),
+        ),
+        migrations.RunPython(create_genres_gin_index, drop_genres_gin_index),
+    ]
@@ -53,6 +53,7 @@ class Movie(models.Model):
             models.Index(fields=['tmdb_id']),
             models.Index(fields=['release_date']),
             models.Index(fields=['is_upcoming']),
+            models.Index(fields=['-tmdb_vote_count']),
         ]
     
     def __str__(self):
@@ -146,4 +147,19 @@ class WatchlistMovie(models.Model):
         ordering = ['-added_at']
     
     def __str__(self):
-        return f"{self.movie} in {self.watchlist}"
\ No newline at end of file
+        return f"{self.movie} in {self.watchlist}"
+
+class SyncCheckpoint(models.Model):
+    """High-water mark of an incremental TMDb job (e.g. the changes feed)"""
+    
+    name = models.CharField(max_length=100, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    position = models.BigIntegerField(default=0)  # lines consumed by a bulk import
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'sync_checkpoints'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
@@ -1,17 +1,27 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
 from celery import shared_task
 from utils.tmdb_client import TMDbClient
-from .models import Movie
+from .models import Movie, SyncCheckpoint
 from django.utils import timezone
 
+logger = logging.getLogger(__name__)
+
+CHANGES_CHECKPOINT = 'tmdb_movie_changes'
+CHANGES_MAX_WINDOW = timedelta(days=14)  # TMDb rejects longer ranges
+CHANGES_BATCH_SIZE = 100
+
 @shared_task
 def update_popular_movies():
     """Update popular movies from TMDb"""
     client = TMDbClient()
     
-    for page in range(1, 6):  # Get first 5 pages
-        data = client.get_popular_movies(page=page)
-        for movie_data in data.get('results', []):
-            client.cache_movie(movie_data['id'])
+    # Get first 5 pages concurrently, then upsert each page in one transaction
+    pages = client.map_concurrently(client.get_popular_movies, range(1, 6))
+    for page in sorted(pages):
+        client.cache_movies([movie_data['id'] for movie_data in pages[page].get('results', [])])
     
     return "Popular movies updated"
 
@@ -21,10 +31,7 @@ def check_upcoming_releases():
     client = TMDbClient()
     data = client.get_upcoming_movies()
     
-    for movie_data in data.get('results', []):
-        movie = client.cache_movie(movie_data['id'])
-        movie.is_upcoming = True
-        movie.save()
+    client.sync_upcoming_movies([movie_data['id'] for movie_data in data.get('results', [])])
     
     return "Upcoming movies updated"
 
@@ -33,4 +40,46 @@ def sync_movie_details(tmdb_id):
     """Sync specific movie details"""
     client = TMDbClient()
     movie = client.cache_movie(tmdb_id)
-    return f"Synced {movie.title}"
\ No newline at end of file
+    return f"Synced {movie.title}"
+
+@shared_task
+def sync_tmdb_changes():
+    """
+    Refresh only the movies TMDb reports as changed since the last run.
+    The feed is intersected with our catalogue (sorted numpy array of
+    tmdb_ids), matches are refreshed in concurrent batches and the
+    high-water mark is stored after each window.
+    The feed is only day-granular, so each hourly run sees the whole
+    current day again; details are revalidated with their ETag and movies
+    TMDb answers 304 for are not rewritten.
+    """
+    client = TMDbClient()
+    checkpoint, _ = SyncCheckpoint.objects.get_or_create(name=CHANGES_CHECKPOINT)
+    now = timezone.now()
+    start = checkpoint.high_water_mark or now - timedelta(days=1)
+    if now - start > CHANGES_MAX_WINDOW * 4:
+        # Too far behind to replay; the 7-day TTL in cache_movie covers the gap
+        logger.warning("TMDb changes checkpoint %s is too old, skipping ahead", start)
+        start = now - CHANGES_MAX_WINDOW
+
+    known_ids = np.fromiter(
+        Movie.objects.values_list('tmdb_id', flat=True).iterator(chunk_size=10_000),
+        dtype=np.int64,
+    )
+    known_ids.sort()
+
+    refreshed = 0
+    while start < now:
+        end = min(start + CHANGES_MAX_WINDOW, now)
+        changed = np.unique(np.fromiter(client.get_changed_movie_ids(start.date(), end.date()), dtype=np.int64))
+        ours = changed[np.isin(changed, known_ids, assume_unique=True)].tolist()
+
+        for i in range(0, len(ours), CHANGES_BATCH_SIZE):
+            client.cache_movies(ours[i:i + CHANGES_BATCH_SIZE], force=True)
+        refreshed += len(ours)
+
+        checkpoint.high_water_mark = end
+        checkpoint.save(update_fields=['high_water_mark', 'updated_at'])
+        start = end
+
+    return f"Refreshed {refreshed} changed movies"
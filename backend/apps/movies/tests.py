@@ -0,0 +1,191 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from utils.tmdb_client import TMDbClient, response_cache
+from utils.tmdb_export import CopyLoader, movies_from_rows
+from utils.tmdb_stub import TMDbStubServer, movie_payload
+from .models import Movie, SyncCheckpoint
+from .tasks import update_popular_movies, check_upcoming_releases, sync_tmdb_changes
+
+
+@override_settings(TMDB_RATE_LIMIT=1000)
+class TMDbSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stub = TMDbStubServer().start()
+        self.addCleanup(self.stub.stop)
+        overrides = override_settings(TMDB_BASE_URL=self.stub.base_url)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_update_popular_movies(self):
+        """Test popular sync caches every movie on the first five pages"""
+        update_popular_movies()
+        self.assertEqual(Movie.objects.count(), 100)
+        self.assertEqual(self.stub.request_count, 105)
+
+    def test_second_sync_is_served_from_cache(self):
+        """Test a second sync neither refetches fresh movies nor the cached pages"""
+        update_popular_movies()
+        update_popular_movies()
+        self.assertEqual(self.stub.request_count, 105)
+        self.assertEqual(response_cache.stats()['hits'], 5)
+
+    def test_check_upcoming_releases_replaces_flags(self):
+        """Test upcoming sync flags the current list and clears stale flags"""
+        stale = Movie.objects.create(
+            tmdb_id=1, title='Old Upcoming', overview='', original_language='en', is_upcoming=True
+        )
+        check_upcoming_releases()
+
+        stale.refresh_from_db()
+        self.assertFalse(stale.is_upcoming)
+        self.assertEqual(Movie.objects.filter(is_upcoming=True).count(), 20)
+
+    def test_cache_movie_uses_the_bulk_field_mapping(self):
+        """Test the single-movie path stores the same fields as the bulk upsert, with parsed dates"""
+        stale = Movie.objects.create(
+            tmdb_id=12, title='Old', overview='', original_language='fr',
+            last_synced=timezone.now() - timedelta(days=30),
+        )
+        movie = TMDbClient().cache_movie(12)
+
+        self.assertEqual(movie.id, stale.id)
+        self.assertEqual(movie.release_date, date(2012, 1, 1))
+        stale.refresh_from_db()
+        self.assertEqual(
+            (stale.title, stale.original_language, stale.release_date, stale.genres),
+            ('Stub Movie 12', 'en', date(2012, 1, 1), [28, 18]),
+        )
+
+        untitled = {**movie_payload(13), 'title': None, 'release_date': ''}
+        with mock.patch.object(TMDbClient, 'get_movie_details', return_value=untitled):
+            movie = TMDbClient().cache_movie(13)
+        self.assertEqual((movie.title, movie.release_date), ('Stub Movie 13', None))
+
+    def test_expired_response_is_revalidated(self):
+        """Test an expired cache entry is revalidated with its ETag"""
+        client = TMDbClient()
+        first = client.search_movies('stub')
+
+        key = response_cache.make_key('/search/movie', {'query': 'stub', 'page': 1})
+        entry = cache.get(key)
+        entry['expires_at'] = 0
+        cache.set(key, entry)
+
+        self.assertEqual(client.search_movies('stub'), first)
+        self.assertEqual(self.stub.not_modified_count, 1)
+        stats = response_cache.stats()
+        self.assertEqual((stats['misses'], stats['revalidated']), (1, 1))
+        self.assertEqual(stats['bytes_saved'], stats['bytes_fetched'])
+
+    def test_sync_tmdb_changes_refreshes_only_changed_movies(self):
+        """Test the changes feed refreshes our changed movies and stores a checkpoint"""
+        for tmdb_id in (5, 150, 999_999):
+            Movie.objects.create(tmdb_id=tmdb_id, title='Outdated', overview='', original_language='en')
+
+        sync_tmdb_changes()
+
+        titles = dict(Movie.objects.values_list('tmdb_id', 'title'))
+        self.assertEqual(titles, {5: 'Stub Movie 5', 150: 'Stub Movie 150', 999_999: 'Outdated'})
+        # 3 feed pages + 2 detail requests
+        self.assertEqual(self.stub.request_count, 5)
+        self.assertIsNotNone(SyncCheckpoint.objects.get(name='tmdb_movie_changes').high_water_mark)
+
+    def test_repeated_sync_tmdb_changes_skips_unmodified_movies(self):
+        """Test a later run over the same day revalidates changed movies without rewriting them"""
+        Movie.objects.create(tmdb_id=5, title='Outdated', overview='', original_language='en')
+        sync_tmdb_changes()
+        synced = Movie.objects.get(tmdb_id=5).last_synced
+
+        sync_tmdb_changes()
+
+        self.assertEqual(self.stub.not_modified_count, 1)
+        self.assertEqual(Movie.objects.get(tmdb_id=5).last_synced, synced)
+
+
+class TMDbExportImportTests(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json.gz')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def write_export(self, lines):
+        with gzip.open(self.path, 'wt') as fh:
+            fh.write('\n'.join(lines) + '\n')
+
+    def import_export(self, *args):
+        call_command('import_tmdb_export', self.path, '--chunk-size', '2', *args, stdout=StringIO())
+
+    def test_import_mixed_export(self):
+        """Test ID rows become skeletons, payloads are upserted and bad rows are skipped"""
+        Movie.objects.create(tmdb_id=2, title='Kept', overview='Detailed', original_language='en')
+        Movie.objects.create(tmdb_id=3, title='Outdated', overview='', original_language='en')
+        self.write_export([
+            json.dumps({'id': 1, 'original_title': 'Skeleton', 'adult': False, 'popularity': 1.5}),
+            json.dumps({'id': 2, 'original_title': 'Ignored', 'adult': False}),
+            json.dumps({**movie_payload(3), 'release_date': '', 'poster_path': None}),
+            json.dumps({'id': 4, 'original_title': 'Adult', 'adult': True}),
+            '{not json',
+            json.dumps({'id': 'x', 'title': 'Bad id'}),
+        ])
+
+        self.import_export()
+
+        movies = {m.tmdb_id: m for m in Movie.objects.all()}
+        self.assertEqual(sorted(movies), [1, 2, 3])
+        self.assertEqual(movies[1].title, 'Skeleton')
+        self.assertEqual(movies[1].last_synced.year, 1970)
+        self.assertEqual(movies[2].title, 'Kept')
+        self.assertEqual((movies[3].title, movies[3].release_date, movies[3].poster_path), ('Stub Movie 3', None, ''))
+        self.assertEqual(movies[3].genres, [28, 18])
+        self.assertEqual(SyncCheckpoint.objects.get(name=f'import:{os.path.basename(self.path)}').position, 6)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test a rerun skips lines already committed by a previous run"""
+        self.write_export([json.dumps({'id': tmdb_id, 'original_title': f'Movie {tmdb_id}'}) for tmdb_id in range(1, 6)])
+        SyncCheckpoint.objects.create(name='export', position=3)
+
+        self.import_export('--checkpoint', 'export')
+        self.assertEqual(sorted(Movie.objects.values_list('tmdb_id', flat=True)), [4, 5])
+
+        self.import_export('--checkpoint', 'export', '--restart')
+        self.assertEqual(Movie.objects.count(), 5)
+
+    def skeleton(self, tmdb_id=7):
+        stats = {'skipped': 0}
+        [(_, movie, _)] = movies_from_rows([(1, {'id': tmdb_id, 'original_title': 'Skeleton "7"'})], stats)
+        return movie
+
+    def test_copy_csv_writes_null_for_none(self):
+        """Test COPY rows leave None fields bare (NULL) and quote every string, empty ones included"""
+        loader = CopyLoader()
+        movie = self.skeleton()
+        self.assertIsNone(movie.runtime)
+        self.assertIsNone(movie.release_date)
+
+        fields = dict(zip((f.name for f in loader.fields), loader._to_csv([movie]).read().rstrip('\n').split(',')))
+        self.assertEqual(fields['runtime'], '')
+        self.assertEqual(fields['release_date'], '')
+        self.assertEqual(fields['overview'], '""')
+        self.assertEqual(fields['title'], '"Skeleton ""7"""')
+        self.assertEqual(fields['tmdb_id'], '7')
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY needs PostgreSQL')
+    def test_copy_loader_loads_skeleton_with_null_columns(self):
+        """Test a skeleton with null runtime and release_date goes through COPY"""
+        with transaction.atomic():
+            CopyLoader().load([], [self.skeleton()])
+        movie = Movie.objects.get(tmdb_id=7)
+        self.assertEqual((movie.runtime, movie.release_date, movie.overview), (None, None, ''))
@@ -10,6 +10,7 @@ from .views import (
     UserWatchlistView,
     CreateWatchlistView,
 )
+from apps.reviews.views import MovieReviewsView
 
 urlpatterns = [
     # -------------------------------------
@@ -23,6 +24,7 @@ urlpatterns = [
     # Movie Details
     # -------------------------------------
     path("<uuid:movie_id>/", MovieDetailView.as_view(), name="movie-detail"),
+    path("<uuid:movie_id>/reviews/", MovieReviewsView.as_view(), name="movie-reviews"),
 
     # -------------------------------------
     # Movie Interactions
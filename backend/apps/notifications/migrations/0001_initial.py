@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:42
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('notification_type', models.CharField(choices=[('follow_request', 'Follow Request'), ('follow_accepted', 'Follow Request Accepted'), ('chat_request', 'Chat Request'), ('chat_accepted', 'Chat Request Accepted'), ('review_liked', 'Review Liked'), ('review_commented', 'Review Commented'), ('review_reposted', 'Review Reposted'), ('achievement_earned', 'Achievement Earned'), ('match_found', 'Match Found'), ('mentioned', 'Mentioned'), ('new_follower', 'New Follower')], max_length=30)),
+                ('title', models.CharField(max_length=100)),
+                ('message', models.TextField(max_length=500)),
+                ('related_object_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('related_object_type', models.CharField(blank=True, max_length=50)),
+                ('action_url', models.CharField(blank=True, max_length=200)),
+                ('is_read', models.BooleanField(default=False)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('related_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications_about', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notifications',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'is_read', '-created_at'], name='notificatio_user_id_c4e471_idx'), models.Index(fields=['user', '-created_at'], name='notificatio_user_id_611c58_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PushToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_type', models.CharField(choices=[('ios', 'iOS'), ('android', 'Android'), ('web', 'Web')], max_length=10)),
+                ('token', models.CharField(max_length=500, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='push_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'push_tokens',
+                'unique_together': {('user', 'token')},
+            },
+        ),
+    ]
@@ -2,12 +2,14 @@
 Notification Signals - Auto-create notifications on events
 """
 
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from apps.authentication.models import FollowRequest, ChatRequest, UserFollow
 from apps.reviews.models import ReviewLike, ReviewComment, ReviewRepost
 from apps.social.models import UserAchievement
-from apps.matching.models import MatchResult
+from apps.matching.models import MatchingSession
+from apps.matching.signals import match_found
 from .models import Notification
 
 
@@ -147,17 +149,29 @@ def notify_achievement_earned(sender, instance, created, **kwargs):
         )
 
 
-@receiver(post_save, sender=MatchResult)
-def notify_match_found(sender, instance, created, **kwargs):
-    """Notify all participants when a match is found"""
-    if created:
-        for user in instance.matched_users.all():
-            Notification.objects.create(
-                user=user,
+@receiver(match_found)
+def notify_match_found(sender, session, movie, **kwargs):
+    """Notify all participants once when a movie reaches the session's quorum"""
+    with transaction.atomic():
+        # Serialize on the session row, then dedupe on the notifications
+        # themselves (through the participants' user index), so a repeated
+        # signal never notifies twice
+        list(MatchingSession.objects.select_for_update().filter(id=session.id).values_list('id', flat=True))
+        participant_ids = list(session.participants.values_list('id', flat=True))
+        if Notification.objects.filter(
+            user_id__in=participant_ids, notification_type='match_found', related_object_id=str(session.id)
+        ).exists():
+            return
+
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
                 notification_type='match_found',
                 title='Movie Match Found! 🎬',
-                message=f'You matched on "{instance.movie.title}"',
-                related_object_id=str(instance.session.id),
+                message=f'You matched on "{movie.title}"',
+                related_object_id=str(session.id),
                 related_object_type='matching_session',
-                action_url=f'/matching/{instance.session.id}'
-            )
\ No newline at end of file
+                action_url=f'/matching/{session.id}'
+            )
+            for user_id in participant_ids
+        ])
@@ -19,7 +19,6 @@ Notes:
 import os
 import logging
 import json
-from pathlib import Path
 from typing import List, Tuple, Optional
 
 import numpy as np
@@ -42,16 +41,13 @@ except Exception:
 from apps.movies.models import Movie, UserMovieInteraction
 from apps.authentication.models import User
 from apps.recommendations.models import Recommendation
+from apps.recommendations.ml.utils import ML_DATA_DIR, MOVIE_EMB_PATH, MOVIE_IDX_PATH, RATING_MAP
 
 logger = logging.getLogger(__name__)
 
 # Storage paths
-BASE_DIR = Path(__file__).resolve().parent
-ML_DATA_DIR = BASE_DIR / "ml_data"
 ML_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-MOVIE_IDX_PATH = ML_DATA_DIR / "movie_index.json"       # maps idx->movie_id
-MOVIE_EMB_PATH = ML_DATA_DIR / "movie_embeddings.npy"  # embeddings matrix
 VECTORIZER_PATH = ML_DATA_DIR / "tfidf_vectorizer.pkl" # optional (not pickled in this file)
 
 
@@ -60,14 +56,6 @@ EMBEDDING_DIM = 384 if USE_TRANSFORMERS and SentenceTransformer is not None else
 TFIDF_MAX_FEATURES = 20_000
 DEFAULT_TOP_K = 20
 
-# Rating mapping (same as elsewhere)
-RATING_MAP = {
-    "trash": 1.0,
-    "timepass": 2.0,
-    "worth": 3.0,
-    "peak": 4.0,
-}
-
 
 class EmbeddingBackend:
     """
@@ -2,8 +2,26 @@
 Utility functions for the recommendation engine.
 """
 
+import json
+from pathlib import Path
+
 import numpy as np
 
+# Storage paths
+ML_DATA_DIR = Path(__file__).resolve().parent / "ml_data"
+MOVIE_IDX_PATH = ML_DATA_DIR / "movie_index.json"       # maps idx->movie_id
+MOVIE_EMB_PATH = ML_DATA_DIR / "movie_embeddings.npy"  # embeddings matrix
+
+# Rating mapping (same as elsewhere)
+RATING_MAP = {
+    "trash": 1.0,
+    "timepass": 2.0,
+    "worth": 3.0,
+    "peak": 4.0,
+}
+
+_embeddings = {"mtime": None, "rows": {}, "matrix": None}
+
 
 def normalize_matrix(matrix):
     """
@@ -15,3 +33,19 @@ def normalize_matrix(matrix):
     norm[norm == 0] = 1  # Prevent division by zero
     return matrix / norm
 
+
+def load_movie_embeddings():
+    """
+    Persisted movie embeddings as ({movie_id: row}, matrix), or ({}, None)
+    before the engine has built them. The matrix is memory-mapped and
+    reloaded only when the file changes, so callers can use it per request.
+    """
+    try:
+        mtime = MOVIE_EMB_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return {}, None
+    if _embeddings["mtime"] != mtime:
+        with open(MOVIE_IDX_PATH, "r", encoding="utf-8") as f:
+            rows = {movie_id: idx for idx, movie_id in enumerate(json.load(f))}
+        _embeddings.update(mtime=mtime, rows=rows, matrix=np.load(MOVIE_EMB_PATH, mmap_mode="r"))
+    return _embeddings["rows"], _embeddings["matrix"]
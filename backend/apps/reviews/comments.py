@@ -0,0 +1,64 @@
+"""
+Loading comment threads without per-comment queries.
+
+Comments carry a materialized path (see ReviewComment.path), so any
+subtree is one range scan on the (root, path) index, already in
+depth-first order. Rows are hung under their parents in memory
+(`loaded_replies`) in one pass, which is what ReviewCommentSerializer
+renders.
+
+Comments are paged at the top level; each page brings REPLY_DEPTH levels
+of replies along in one query. Deeper levels are paged with
+?parent=<comment id> or loaded whole with the thread endpoint.
+"""
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .models import ReviewComment
+
+REPLY_DEPTH = 3
+
+
+def subtree_filter(comment, depth=None):
+    """Q for the comments below `comment`, at most `depth` levels down"""
+    q = Q(root_id=comment.root_id, path__gt=comment.path, path__lt=comment.path + 'g')
+    if depth is not None:
+        q &= Q(depth__lte=comment.depth + depth)
+    return q
+
+
+def hang_replies(comments, replies):
+    """Attach `replies` under their parents among `comments` + `replies`, in O(n); returns `comments`"""
+    children = defaultdict(list)
+    for reply in replies:
+        children[reply.parent_comment_id].append(reply)
+    for comment in comments:
+        comment.loaded_replies = children.get(comment.id, [])
+    for reply in replies:
+        reply.loaded_replies = children.get(reply.id, [])
+    return comments
+
+
+def attach_replies(comments, depth=REPLY_DEPTH):
+    """Load up to `depth` levels of replies under `comments` in one query; returns `comments`"""
+    comments = list(comments)
+    if not comments or depth < 1:
+        return hang_replies(comments, [])
+
+    if all(comment.depth == 0 for comment in comments):
+        below = Q(root_id__in=[comment.id for comment in comments], depth__gte=1, depth__lte=depth)
+    else:
+        below = Q()
+        for comment in comments:
+            below |= subtree_filter(comment, depth)
+    replies = list(ReviewComment.objects.filter(below).select_related('user').order_by('root_id', 'path'))
+    return hang_replies(comments, replies)
+
+
+def load_thread(comment, depth=None):
+    """`comment` with its whole subtree (or `depth` levels of it) attached, in one query"""
+    replies = list(
+        ReviewComment.objects.filter(subtree_filter(comment, depth)).select_related('user').order_by('path')
+    )
+    return hang_replies([comment], replies)[0]
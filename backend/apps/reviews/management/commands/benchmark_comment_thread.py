@@ -0,0 +1,101 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.authentication.models import User
+from apps.movies.models import Movie
+from apps.reviews.comments import load_thread
+from apps.reviews.models import Review, ReviewComment
+from apps.reviews.serializers import ReviewCommentSerializer
+
+
+class RecursiveCommentSerializer(serializers.ModelSerializer):
+    """The previous serializer: one replies query (and one user query) per comment"""
+    user = serializers.StringRelatedField(read_only=True)
+    replies = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReviewComment
+        fields = ['id', 'user', 'comment_text', 'parent_comment', 'replies', 'created_at', 'updated_at']
+
+    def get_replies(self, obj):
+        return RecursiveCommentSerializer(obj.replies.all(), many=True).data
+
+
+class Command(BaseCommand):
+    help = (
+        'Build one synthetic comment thread and time loading and serializing it, '
+        'walking replies recursively (before) vs one materialized-path range query (after)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=10_000, help='Comments in the thread')
+        parser.add_argument('--reply-to-recent', type=float, default=0.7,
+                            help='Chance a reply answers one of the last few comments (makes deeper threads)')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(email=f'bench-{tag}-{i}@example.com', phone_number=f'+7{tag[:4]}{i:06d}'[:15],
+                 username=f'bench_{tag}_{i}', password=make_password(None))
+            for i in range(20)
+        ])
+        movie = Movie.objects.create(tmdb_id=-int(tag[:6], 16) - 1, title=f'Bench {tag}', overview='',
+                                     original_language='en')
+        review = Review.objects.create(user=users[0], movie=movie)
+
+        try:
+            root = self.build_thread(review, users, options['comments'], options['reply_to_recent'], rng)
+            depth = ReviewComment.objects.filter(root=root).order_by('-depth').values_list('depth', flat=True)[0]
+            self.stdout.write(f'Thread of {options["comments"]} comments, {depth + 1} levels deep')
+
+            before = self.measure(lambda: RecursiveCommentSerializer(ReviewComment.objects.get(id=root.id)).data)
+            after = self.measure(lambda: ReviewCommentSerializer(
+                load_thread(ReviewComment.objects.select_related('user').get(id=root.id))
+            ).data)
+            for label, (ms, queries) in (('before (recursive)', before), ('after (path range)', after)):
+                self.stdout.write(f'{label:>20}: {ms:>9.1f} ms {queries:>7} queries')
+        finally:
+            review.delete()
+            movie.delete()
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+
+    def build_thread(self, review, users, count, reply_to_recent, rng):
+        start = timezone.now() - timedelta(days=1)
+        comments = []
+        for i in range(count):
+            parent = None
+            if comments:  # the first comment is the root; everything else replies within its thread
+                recent = comments[-5:] if rng.random() < reply_to_recent else comments
+                parent = rng.choice(recent)
+            comment = ReviewComment(
+                user=rng.choice(users), review=review, parent_comment=parent,
+                comment_text=f'comment {i}', created_at=start + timedelta(milliseconds=i),
+            )
+            comment.place_in_thread()
+            comments.append(comment)
+        ReviewComment.objects.bulk_create(comments, batch_size=1000)
+        return comments[0]
+
+    def measure(self, load):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            load()
+            elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, queries
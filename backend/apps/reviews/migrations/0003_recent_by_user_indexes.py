@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_movie_movies_tmdb_vo_f91a99_idx'),
+        ('reviews', '0002_tag_remove_review_tags_review_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-created_at'], name='reviews_user_id_9f7b05_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reviewrepost',
+            index=models.Index(fields=['user', '-created_at'], name='review_repo_user_id_581174_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_recent_by_user_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reviewcomment',
+            index=models.Index(fields=['review', 'parent_comment', 'created_at'], name='review_comm_review__4ae71a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reviewlike',
+            index=models.Index(fields=['review', '-created_at'], name='review_like_review__57ceb1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reviewrepost',
+            index=models.Index(fields=['original_review', '-created_at'], name='review_repo_origina_ce00e3_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+MAX_COMMENT_DEPTH = 50
+PATH_STEP = 19
+BATCH_SIZE = 2000
+
+
+def path_segment(created_at, comment_id):
+    return f"{int(created_at.timestamp() * 1_000_000):013x}{comment_id.hex[:6]}"
+
+
+def fill_paths(apps, schema_editor):
+    """Place existing comments level by level: each pass takes the unplaced comments whose parent is placed"""
+    ReviewComment = apps.get_model('reviews', 'ReviewComment')
+
+    roots = []
+    for comment_id, created_at in ReviewComment.objects.filter(parent_comment__isnull=True).values_list('id', 'created_at'):
+        roots.append(ReviewComment(id=comment_id, root_id=comment_id, depth=0, path=path_segment(created_at, comment_id)))
+    ReviewComment.objects.bulk_update(roots, ['root', 'depth', 'path'], batch_size=BATCH_SIZE)
+
+    fields = ('id', 'created_at', 'parent_comment__root_id', 'parent_comment__depth', 'parent_comment__path')
+    while True:
+        level = ReviewComment.objects.filter(path='', parent_comment__path__gt='').values_list(*fields)
+        placed = []
+        for comment_id, created_at, root_id, depth, path in level.iterator(chunk_size=BATCH_SIZE):
+            if depth >= MAX_COMMENT_DEPTH - 1:
+                # Too deep: only the path is capped, beside the parent, as for new replies
+                depth, path = depth - 1, path[:-PATH_STEP]
+            placed.append(ReviewComment(
+                id=comment_id, root_id=root_id, depth=depth + 1, path=path + path_segment(created_at, comment_id),
+            ))
+        if not placed:
+            break
+        ReviewComment.objects.bulk_update(placed, ['root', 'depth', 'path'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_activity_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='path',
+            field=models.CharField(blank=True, max_length=950),
+        ),
+        migrations.AddField(
+            model_name='reviewcomment',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.reviewcomment'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reviewcomment',
+            index=models.Index(fields=['root', 'path'], name='review_comm_root_id_c0d73f_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_movie_movies_tmdb_vo_f91a99_idx'),
+        ('reviews', '0005_comment_materialized_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='reviews_user_id_79db63_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='reviews_movie_i_fe5b09_idx',
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-likes_count', '-created_at'], name='reviews_user_id_f158fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['movie', '-created_at'], name='reviews_movie_i_ecc56a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['movie', '-likes_count', '-created_at'], name='reviews_movie_i_d8067f_idx'),
+        ),
+    ]
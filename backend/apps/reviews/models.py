@@ -82,9 +82,13 @@ class Review(models.Model):
         ordering = ['-created_at']
         unique_together = ('user', 'movie')
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['movie']),
             models.Index(fields=['-created_at']),
+            # A user's reviews, newest or most liked first (also feed candidates)
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', '-likes_count', '-created_at']),
+            # A movie's reviews, newest or most liked first
+            models.Index(fields=['movie', '-created_at']),
+            models.Index(fields=['movie', '-likes_count', '-created_at']),
         ]
     
     def __str__(self):
@@ -101,11 +105,23 @@ class ReviewLike(models.Model):
     class Meta:
         db_table = 'review_likes'
         unique_together = ('user', 'review')
+        indexes = [
+            models.Index(fields=['review', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user} liked review {self.review.id}"
 
 
+MAX_COMMENT_DEPTH = 50
+PATH_STEP = 19  # characters per path segment
+
+
+def path_segment(created_at, comment_id):
+    """Fixed-width, lowercase-hex path segment: creation time in microseconds, then part of the id"""
+    return f"{int(created_at.timestamp() * 1_000_000):013x}{comment_id.hex[:6]}"
+
+
 class ReviewComment(models.Model):
     """Comments on Reviews"""
     
@@ -118,15 +134,51 @@ class ReviewComment(models.Model):
     # Reply structure
     parent_comment = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
     
+    # Materialized path: `root` is the top-level comment of the thread (itself
+    # for top-level comments) and `path` concatenates one PATH_STEP-character
+    # segment per ancestor, then this comment's own. Sorting a thread by path
+    # gives depth-first order with siblings oldest first, and a subtree is the
+    # range [path, path + 'g'). Set on first save.
+    root = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    depth = models.PositiveSmallIntegerField(default=0)
+    path = models.CharField(max_length=MAX_COMMENT_DEPTH * PATH_STEP, blank=True)
+    
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'review_comments'
         ordering = ['created_at']
+        indexes = [
+            # Top-level comments of a review (parent_comment IS NULL), in order
+            models.Index(fields=['review', 'parent_comment', 'created_at']),
+            # Threads and subtrees as one range scan
+            models.Index(fields=['root', 'path']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user} on review {self.review.id}"
+    
+    def save(self, *args, **kwargs):
+        if not self.path:
+            self.place_in_thread()
+        super().save(*args, **kwargs)
+    
+    def place_in_thread(self):
+        """
+        Fill in root, depth and path from the parent comment. Past
+        MAX_COMMENT_DEPTH only the path is capped: the reply is placed
+        beside its parent in the path order (so it still loads with the
+        thread), while parent_comment keeps who was replied to.
+        """
+        parent = self.parent_comment
+        segment = path_segment(self.created_at, self.id)
+        if parent is None:
+            self.root_id, self.depth, self.path = self.id, 0, segment
+        elif parent.depth >= MAX_COMMENT_DEPTH - 1:
+            self.root_id, self.depth, self.path = parent.root_id, parent.depth, parent.path[:-PATH_STEP] + segment
+        else:
+            self.root_id, self.depth, self.path = parent.root_id, parent.depth + 1, parent.path + segment
 
 
 class ReviewRepost(models.Model):
@@ -145,6 +197,11 @@ class ReviewRepost(models.Model):
         db_table = 'review_reposts'
         unique_together = ('user', 'original_review')
         ordering = ['-created_at']
+        indexes = [
+            # Followed users' recent reposts (ranked feed candidates)
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['original_review', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user} reposted review {self.original_review.id}"
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Review visibility.
+
+A viewer's relationships are loaded once per request as two id sets:
+the authors they follow and their friends (mutual follows). Visibility
+is then a single filter over any review queryset, instead of a check
+per review.
+"""
+from django.db.models import Q
+
+from apps.authentication.models import UserFollow
+
+
+def relationship_sets(viewer, among=None):
+    """
+    (ids the viewer follows, ids of the viewer's friends), with at most two
+    queries. Pass `among` to only consider those authors.
+    """
+    follows = UserFollow.objects.filter(follower=viewer)
+    if among is not None:
+        follows = follows.filter(following_id__in=among)
+    following = set(follows.values_list('following_id', flat=True))
+    friends = set(
+        UserFollow.objects.filter(following=viewer, follower_id__in=following).values_list('follower_id', flat=True)
+    ) if following else set()
+    return following, friends
+
+
+def visible_reviews(viewer, following, friends, prefix=''):
+    """
+    Q for reviews `viewer` may see, given its relationship_sets(). Use
+    `prefix` to filter through a relation, e.g. 'original_review__'.
+    """
+    privacy, author = f'{prefix}privacy', f'{prefix}user_id'
+    return (
+        Q(**{privacy: 'everyone'})
+        | Q(**{author: viewer.id})
+        | Q(**{privacy: 'followers', f'{author}__in': following})
+        | Q(**{privacy: 'friends', f'{author}__in': friends})
+    )
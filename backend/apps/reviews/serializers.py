@@ -39,8 +39,9 @@ class ReviewCommentSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.ListSerializer(child=serializers.DictField()))
     def get_replies(self, obj):
-        queryset = obj.replies.all()
-        return ReviewCommentSerializer(queryset, many=True).data
+        # Filled in by the loaders in comments.py; never queried per comment.
+        # Reusing this serializer builds its fields once per thread, not per reply.
+        return [self.to_representation(reply) for reply in getattr(obj, "loaded_replies", [])]
 
 
 # =====================================================================
@@ -60,11 +61,12 @@ class ReviewRepostSerializer(serializers.ModelSerializer):
 # =====================================================================
 
 class ReviewSerializer(serializers.ModelSerializer):
+    """
+    Review with its counts. Likes, comments and reposts are paged by
+    their own endpoints; the detail view adds the first comment page.
+    """
     user = serializers.StringRelatedField(read_only=True)
     movie = MovieSerializer(read_only=True)
-    likes = ReviewLikeSerializer(many=True, read_only=True)
-    comments = ReviewCommentSerializer(many=True, read_only=True)
-    reposts = ReviewRepostSerializer(many=True, read_only=True)
 
     class Meta:
         model = Review
@@ -80,9 +82,6 @@ class ReviewSerializer(serializers.ModelSerializer):
             "likes_count",
             "comments_count",
             "reposts_count",
-            "likes",
-            "comments",
-            "reposts",
             "created_at",
             "updated_at",
         ]
@@ -0,0 +1,218 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User, UserFollow
+from apps.movies.models import Movie
+from utils.pagination import ReviewListPagination
+from .comments import load_thread
+from .models import MAX_COMMENT_DEPTH, PATH_STEP, Review, ReviewComment, ReviewLike, ReviewRepost
+
+
+class ReviewDetailTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                email=f'user{i}@example.com', phone_number=f'+10000004{i:02d}', password='TestPass123!', username=f'user{i}'
+            )
+            for i in range(3)
+        ]
+        movie = Movie.objects.create(tmdb_id=1, title='Heat', overview='', original_language='en')
+        self.review = Review.objects.create(user=self.users[0], movie=movie, rating='peak')
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1])
+        self.start = timezone.now() - timedelta(days=1)
+
+    def comment(self, minutes, parent=None):
+        return ReviewComment.objects.create(
+            user=self.users[minutes % 3], review=self.review, parent_comment=parent,
+            comment_text=f'comment {minutes}', created_at=self.start + timedelta(minutes=minutes),
+        )
+
+    def test_detail_returns_counts_and_first_comment_page(self):
+        roots = [self.comment(i) for i in range(25)]
+        reply = self.comment(100, parent=roots[0])
+        nested = self.comment(101, parent=reply)
+        for user in self.users:
+            ReviewLike.objects.create(user=user, review=self.review)
+
+        # review, tags, comment page, replies
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/reviews/{self.review.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('likes', response.data)
+        self.assertEqual(response.data['likes_count'], 3)
+
+        comments = response.data['comments']
+        self.assertEqual(len(comments['results']), 20)
+        first = comments['results'][0]
+        self.assertEqual(first['id'], str(roots[0].id))
+        self.assertEqual(first['replies'][0]['id'], str(reply.id))
+        self.assertEqual(first['replies'][0]['replies'][0]['id'], str(nested.id))
+
+        rest = self.client.get(comments['next'])
+        self.assertEqual([c['id'] for c in rest.data['results']], [str(c.id) for c in roots[20:]])
+
+        replies = self.client.get(f'/api/reviews/{self.review.id}/comments/', {'parent': str(reply.id)})
+        self.assertEqual([c['id'] for c in replies.data['results']], [str(nested.id)])
+
+    def test_likes_and_reposts_are_paged(self):
+        for user in self.users:
+            ReviewLike.objects.create(user=user, review=self.review)
+            ReviewRepost.objects.create(user=user, original_review=self.review)
+
+        likes = self.client.get(f'/api/reviews/{self.review.id}/likes/')
+        self.assertEqual(likes.status_code, 200)
+        self.assertEqual({like['user'] for like in likes.data['results']}, {u.username for u in self.users})
+        self.assertNotIn('count', likes.data)
+
+        reposts = self.client.get(f'/api/reviews/{self.review.id}/reposts/')
+        self.assertEqual(len(reposts.data['results']), 3)
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='threads@example.com', phone_number='+1000000500', password='TestPass123!', username='threads'
+        )
+        movie = Movie.objects.create(tmdb_id=2, title='Alien', overview='', original_language='en')
+        self.review = Review.objects.create(user=self.user, movie=movie)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start = timezone.now() - timedelta(days=1)
+        self.minutes = 0
+
+    def reply(self, parent=None):
+        self.minutes += 1
+        return ReviewComment.objects.create(
+            user=self.user, review=self.review, parent_comment=parent, comment_text='text',
+            created_at=self.start + timedelta(minutes=self.minutes),
+        )
+
+    def test_thread_loads_in_one_range_query(self):
+        root = self.reply()
+        a, b = self.reply(root), self.reply(root)
+        a1 = self.reply(a)
+        a1x = self.reply(a1)
+        other = self.reply()
+        self.reply(other)
+
+        self.assertEqual((a1x.root_id, a1x.depth), (root.id, 3))
+        self.assertTrue(a1x.path.startswith(a1.path))
+
+        url = f'/api/reviews/{self.review.id}/comments/{root.id}/thread/'
+        # the comment, then its subtree
+        with self.assertNumQueries(2):
+            thread = self.client.get(url).data
+        self.assertEqual([c['id'] for c in thread['replies']], [str(a.id), str(b.id)])
+        self.assertEqual(thread['replies'][0]['replies'][0]['replies'][0]['id'], str(a1x.id))
+
+        shallow = self.client.get(url, {'depth': 2}).data
+        self.assertEqual(shallow['replies'][0]['replies'][0]['replies'], [])
+
+    def test_replies_past_max_depth_keep_their_parent(self):
+        root = comment = self.reply()
+        for _ in range(MAX_COMMENT_DEPTH):
+            parent, comment = comment, self.reply(comment)
+        self.assertEqual(comment.depth, MAX_COMMENT_DEPTH - 1)
+        self.assertEqual(len(comment.path), MAX_COMMENT_DEPTH * PATH_STEP)
+        self.assertEqual(ReviewComment.objects.get(id=comment.id).parent_comment_id, parent.id)
+
+        url = f'/api/reviews/{self.review.id}/comments/'
+        response = self.client.get(url, {'parent': str(parent.id)})
+        self.assertEqual([c['id'] for c in response.data['results']], [str(comment.id)])
+        self.assertEqual(len(load_thread(root).loaded_replies), 1)
+
+
+class ReviewListingTests(TestCase):
+    def setUp(self):
+        self.viewer, self.followed, self.friend, self.stranger = [
+            User.objects.create_user(
+                email=f'{name}@example.com', phone_number=f'+10000006{i:02d}', password='TestPass123!', username=name
+            )
+            for i, name in enumerate(['viewer', 'followed', 'friend', 'stranger'])
+        ]
+        UserFollow.objects.create(follower=self.viewer, following=self.followed)
+        UserFollow.objects.create(follower=self.viewer, following=self.friend)
+        UserFollow.objects.create(follower=self.friend, following=self.viewer)
+        self.movie = Movie.objects.create(tmdb_id=3, title='Ran', overview='', original_language='en')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        self.start = timezone.now() - timedelta(days=1)
+
+    def review(self, user, privacy, minutes, likes=0, movie=None):
+        return Review.objects.create(
+            user=user, movie=movie or self.movie, privacy=privacy, likes_count=likes,
+            created_at=self.start + timedelta(minutes=minutes),
+        )
+
+    def test_movie_reviews_respect_privacy_and_sort(self):
+        visible = [
+            self.review(self.stranger, 'everyone', 1, likes=5),
+            self.review(self.followed, 'followers', 2, likes=9),
+            self.review(self.friend, 'friends', 3),
+            self.review(self.viewer, 'private', 4, likes=1),
+        ]
+        hidden_movie = Movie.objects.create(tmdb_id=4, title='Ikiru', overview='', original_language='en')
+        self.review(self.stranger, 'followers', 5, movie=hidden_movie)
+        self.review(self.followed, 'friends', 6, movie=hidden_movie)
+        self.review(self.friend, 'private', 7, movie=hidden_movie)
+
+        url = f'/api/movies/{self.movie.id}/reviews/'
+        # movie, following, friends, page, tags
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual([r['id'] for r in response.data['results']], [str(r.id) for r in reversed(visible)])
+        self.assertNotIn('count', response.data)
+
+        by_likes = self.client.get(url, {'sort': 'likes'})
+        self.assertEqual(
+            [r['id'] for r in by_likes.data['results']], [str(visible[i].id) for i in (1, 0, 3, 2)]
+        )
+        self.assertEqual(self.client.get(f'/api/movies/{hidden_movie.id}/reviews/').data['results'], [])
+
+    def test_user_reviews_hide_what_the_viewer_may_not_see(self):
+        public = self.review(self.followed, 'everyone', 1)
+        followers_only = self.review(
+            self.followed, 'followers', 2, movie=Movie.objects.create(tmdb_id=5, title='M', overview='', original_language='en')
+        )
+        self.review(
+            self.followed, 'friends', 3, movie=Movie.objects.create(tmdb_id=6, title='N', overview='', original_language='en')
+        )
+
+        response = self.client.get(f'/api/reviews/user/{self.followed.id}/')
+        self.assertEqual([r['id'] for r in response.data['results']], [str(followers_only.id), str(public.id)])
+        self.assertEqual(response.data['results'][0]['movie']['title'], 'M')
+
+        self.client.force_authenticate(self.stranger)
+        response = self.client.get(f'/api/reviews/user/{self.followed.id}/')
+        self.assertEqual([r['id'] for r in response.data['results']], [str(public.id)])
+
+    def test_pages_through_tied_likes_without_overlap(self):
+        movies = Movie.objects.bulk_create([
+            Movie(tmdb_id=100 + i, title=f'Movie {i}', overview='', original_language='en') for i in range(30)
+        ])
+        # Mostly tied on likes_count, and on created_at within each group of three
+        reviews = [
+            self.review(self.followed, 'everyone', i // 3, likes=int(i == 7), movie=movie)
+            for i, movie in enumerate(movies)
+        ]
+
+        for sort in ('likes', 'recent'):
+            seen, url, params = [], f'/api/reviews/user/{self.followed.id}/', {'sort': sort}
+            while url:
+                with mock.patch.object(ReviewListPagination, 'page_size', 4):
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(r['id'] for r in response.data['results'])
+                url, params = response.data['next'], None
+            self.assertEqual(len(seen), len(set(seen)))
+            self.assertEqual(set(seen), {str(r.id) for r in reviews})
+            if sort == 'likes':
+                self.assertEqual(seen[0], str(reviews[7].id))
+
+        response = self.client.get(f'/api/reviews/user/{self.followed.id}/', {'sort': 'likes', 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
@@ -2,6 +2,10 @@ from django.urls import path
 from .views import (
     CreateReviewView,
     ReviewDetailView,
+    ReviewCommentsView,
+    CommentThreadView,
+    ReviewLikesView,
+    ReviewRepostsView,
     LikeReviewView,
     CommentOnReviewView,
     RepostReviewView,
@@ -26,4 +30,8 @@ urlpatterns = [
     path("<uuid:review_id>/like/", LikeReviewView.as_view(), name="like-review"),
     path("<uuid:review_id>/comment/", CommentOnReviewView.as_view(), name="comment-review"),
     path("<uuid:review_id>/repost/", RepostReviewView.as_view(), name="repost-review"),
+    path("<uuid:review_id>/comments/", ReviewCommentsView.as_view(), name="review-comments"),
+    path("<uuid:review_id>/comments/<uuid:comment_id>/thread/", CommentThreadView.as_view(), name="comment-thread"),
+    path("<uuid:review_id>/likes/", ReviewLikesView.as_view(), name="review-likes"),
+    path("<uuid:review_id>/reposts/", ReviewRepostsView.as_view(), name="review-reposts"),
 ]
@@ -5,12 +5,22 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 
+from .comments import attach_replies, load_thread
+from .privacy import relationship_sets, visible_reviews
 from .models import Review, ReviewLike, ReviewComment, ReviewRepost
 from apps.authentication.models import User
 from apps.movies.models import Movie
+from utils.pagination import ReviewActivityPagination, ReviewCommentPagination, ReviewListPagination
 
-from .serializers import ReviewSerializer, ReviewCommentSerializer
+from .serializers import (
+    ReviewSerializer,
+    ReviewCommentSerializer,
+    ReviewLikeSerializer,
+    ReviewListSerializer,
+    ReviewRepostSerializer,
+)
 
 
 # ------------------------
@@ -80,15 +90,35 @@ class CreateReviewView(generics.CreateAPIView):
 
 class ReviewDetailView(generics.RetrieveDestroyAPIView):
     """
-    GET: retrieve review
+    GET: retrieve review with its counts and the first page of comments
     DELETE: delete review (owner only)
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ReviewSerializer
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related("user", "movie").prefetch_related("tags")
     lookup_field = "id"
     lookup_url_kwarg = "review_id"
 
+    def retrieve(self, request, *args, **kwargs):
+        review = self.get_object()
+        data = self.get_serializer(review).data
+
+        paginator = ReviewCommentPagination()
+        comments = paginator.paginate_queryset(
+            ReviewComment.objects.filter(review=review, parent_comment__isnull=True).select_related("user"),
+            request,
+            view=self,
+        )
+        # Further pages come from the comments endpoint
+        paginator.base_url = request.build_absolute_uri(
+            reverse("review-comments", kwargs={"review_id": review.id})
+        )
+        data["comments"] = {
+            "next": paginator.get_next_link(),
+            "results": ReviewCommentSerializer(attach_replies(comments), many=True).data,
+        }
+        return Response(data)
+
     def destroy(self, request, *args, **kwargs):
         review = self.get_object()
         if review.user != request.user:
@@ -96,6 +126,73 @@ class ReviewDetailView(generics.RetrieveDestroyAPIView):
         return super().destroy(request, *args, **kwargs)
 
 
+class ReviewCommentsView(generics.ListAPIView):
+    """
+    GET: top-level comments of a review, each with its first levels of
+    replies; ?parent=<comment_id> pages the replies of one comment instead
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReviewCommentSerializer
+    pagination_class = ReviewCommentPagination
+
+    def get_queryset(self):
+        review = get_object_or_404(Review, id=self.kwargs["review_id"])
+        comments = ReviewComment.objects.filter(review=review).select_related("user")
+        parent = self.request.query_params.get("parent")
+        if parent:
+            parent = get_object_or_404(comments.select_related(None).only("id"), id=serializers.UUIDField().to_internal_value(parent))
+            return comments.filter(parent_comment=parent)
+        return comments.filter(parent_comment__isnull=True)
+
+    def paginate_queryset(self, queryset):
+        return attach_replies(super().paginate_queryset(queryset))
+
+
+class CommentThreadView(generics.RetrieveAPIView):
+    """
+    GET: a comment with its whole reply tree, or ?depth=N levels of it
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReviewCommentSerializer
+
+    def get_object(self):
+        comment = get_object_or_404(
+            ReviewComment.objects.select_related("user"),
+            id=self.kwargs["comment_id"],
+            review_id=self.kwargs["review_id"],
+        )
+        depth = self.request.query_params.get("depth")
+        if depth is not None:
+            depth = serializers.IntegerField(min_value=1).run_validation(depth)
+        return load_thread(comment, depth)
+
+
+class ReviewLikesView(generics.ListAPIView):
+    """
+    GET: users who liked a review, newest first
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReviewLikeSerializer
+    pagination_class = ReviewActivityPagination
+
+    def get_queryset(self):
+        review = get_object_or_404(Review, id=self.kwargs["review_id"])
+        return ReviewLike.objects.filter(review=review).select_related("user")
+
+
+class ReviewRepostsView(generics.ListAPIView):
+    """
+    GET: reposts of a review, newest first
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReviewRepostSerializer
+    pagination_class = ReviewActivityPagination
+
+    def get_queryset(self):
+        review = get_object_or_404(Review, id=self.kwargs["review_id"])
+        return ReviewRepost.objects.filter(original_review=review).select_related("user")
+
+
 # ============================================================
 #                         LIKE REVIEW
 # ============================================================
@@ -196,13 +293,44 @@ class RepostReviewView(generics.GenericAPIView):
 
 class UserReviewsView(generics.ListAPIView):
     """
-    GET: list all reviews made by a user
+    GET: reviews made by a user that the viewer may see (?sort=recent|likes)
     """
     permission_classes = [IsAuthenticated]
-    serializer_class = ReviewSerializer
+    serializer_class = ReviewListSerializer
+    pagination_class = ReviewListPagination
 
     def get_queryset(self):
-        user_id = self.kwargs.get("user_id")
-        user = get_object_or_404(User, id=user_id)
-        return Review.objects.filter(user=user).order_by("-created_at")
+        user = get_object_or_404(User.objects.only("id"), id=self.kwargs.get("user_id"))
+        viewer = self.request.user
+        following, friends = relationship_sets(viewer, among=[user.id])
+        return (
+            Review.objects.filter(user=user)
+            .filter(visible_reviews(viewer, following, friends))
+            .select_related("user", "movie")
+            .prefetch_related("tags")
+        )
+
+
+# ============================================================
+#                LIST ALL REVIEWS OF A MOVIE
+# ============================================================
+
+class MovieReviewsView(generics.ListAPIView):
+    """
+    GET: reviews of a movie that the viewer may see (?sort=recent|likes)
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReviewListSerializer
+    pagination_class = ReviewListPagination
+
+    def get_queryset(self):
+        movie = get_object_or_404(Movie.objects.only("id"), id=self.kwargs.get("movie_id"))
+        viewer = self.request.user
+        following, friends = relationship_sets(viewer)
+        return (
+            Review.objects.filter(movie=movie)
+            .filter(visible_reviews(viewer, following, friends))
+            .select_related("user", "movie")
+            .prefetch_related("tags")
+        )
 
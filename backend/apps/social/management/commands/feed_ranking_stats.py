@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.social.ranking import ranking_stats, reset_ranking_stats
+
+
+class Command(BaseCommand):
+    help = 'Show p50/p95 latency of For You candidate generation and ranking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the histograms after printing them')
+
+    def handle(self, *args, **options):
+        for stage, stats in ranking_stats().items():
+            self.stdout.write(
+                f"{stage}: {stats['count']} runs, p50 <= {stats['p50_ms']} ms, p95 <= {stats['p95_ms']} ms"
+            )
+
+        if options['reset']:
+            reset_ranking_stats()
+            self.stdout.write(self.style.SUCCESS('\nHistograms reset'))
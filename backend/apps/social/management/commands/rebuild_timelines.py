@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.authentication.models import User
+from apps.social.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized home timelines from posts and follows (initial load or recovery)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', help='Users to rebuild (default: all active users)')
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+        else:
+            users = users.filter(is_active=True)
+
+        count = entries = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            entries += rebuild_timeline(user_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} timelines ({entries} entries)'))
@@ -30,11 +30,42 @@ class Post(models.Model):
     class Meta:
         db_table = 'posts'
         ordering = ['-created_at']
+        indexes = [
+            # Author pages and celebrity posts merged into feeds at read time
+            models.Index(fields=['user', '-created_at']),
+        ]
     
     def __str__(self):
         return f"Post by {self.user}"
 
 
+class TimelineEntry(models.Model):
+    """
+    A post in a user's materialized home timeline (fan-out on write, see
+    timeline.py). created_at is the post's, so pages are read from this
+    table's index alone.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'timeline_entries'
+        unique_together = ('user', 'post')
+        ordering = ['-created_at', '-post']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post']),
+            # Unfollow cleanup
+            models.Index(fields=['user', 'author']),
+        ]
+    
+    def __str__(self):
+        return f"{self.post_id} in timeline of {self.user_id}"
+
+
 class Achievement(models.Model):
     """Achievement/Badge System"""
     
@@ -0,0 +1,230 @@
+"""
+Ranked "For You" feed.
+
+Candidates are the last CANDIDATE_WINDOW of reviews, reposts and posts by
+the people the viewer follows, one time-bounded query per source on its
+(user, created_at) index, filtered by review privacy. They are scored in
+one pass of numpy arithmetic:
+
+    score = kind weight * (RECENCY_WEIGHT * recency
+                           + ENGAGEMENT_WEIGHT * engagement
+                           + AFFINITY_WEIGHT * affinity)
+
+- recency halves every HALF_LIFE_HOURS
+- engagement is log1p(likes + 2 * comments + 3 * reposts), scaled to 0-1
+  within the candidate set
+- affinity is the cosine between the movie's embedding and the viewer's
+  taste vector (the embeddings of movies they rated, weighted by rating),
+  from the recommendation engine's persisted embeddings
+
+The same review surfaces once, through its best-scoring candidate. The
+ranked list is cached per viewer for RANKING_TTL seconds and pages are
+sliced from it. Latencies of both stages are counted into cache
+histograms; see ranking_stats() and the feed_ranking_stats command.
+"""
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.movies.models import UserMovieInteraction
+from apps.recommendations.ml.utils import RATING_MAP, load_movie_embeddings
+from apps.reviews.models import Review, ReviewRepost
+from apps.reviews.privacy import relationship_sets, visible_reviews
+from .models import Post
+
+CANDIDATE_WINDOW = timedelta(days=7)
+CANDIDATES_PER_SOURCE = 300
+RANKED_SIZE = 200
+RANKING_TTL = 60  # seconds
+
+HALF_LIFE_HOURS = 18.0
+RECENCY_WEIGHT = 1.0
+ENGAGEMENT_WEIGHT = 0.5
+AFFINITY_WEIGHT = 0.75
+KIND_WEIGHTS = {'review': 1.0, 'post': 0.9, 'repost': 0.7}
+PROFILE_SIZE = 200  # most recently rated movies in the viewer's taste vector
+
+STAGES = ('candidates', 'ranking')
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+STATS_PREFIX = 'social:ranking:'
+STATS_TTL = 60 * 60 * 24 * 7
+
+
+def ranking_key(user_id):
+    return f"social:for_you:{user_id}"
+
+
+def collect_candidates(viewer, now=None):
+    """
+    Rows of (kind, id, review key, movie id, likes, comments, reposts,
+    created_at) from the viewer's follows within the candidate window.
+    """
+    now = now or timezone.now()
+    following, friends = relationship_sets(viewer)
+    following.discard(viewer.id)
+    if not following:
+        return []
+    since = now - CANDIDATE_WINDOW
+
+    reviews = (
+        Review.objects.filter(user_id__in=following, created_at__gte=since)
+        .filter(visible_reviews(viewer, following, friends))
+        .order_by('-created_at')
+        .values_list('id', 'id', 'movie_id', 'likes_count', 'comments_count', 'reposts_count', 'created_at')
+    )
+    reposts = (
+        ReviewRepost.objects.filter(user_id__in=following, created_at__gte=since)
+        .filter(visible_reviews(viewer, following, friends, prefix='original_review__'))
+        .order_by('-created_at')
+        .values_list(
+            'id', 'original_review_id', 'original_review__movie_id', 'original_review__likes_count',
+            'original_review__comments_count', 'original_review__reposts_count', 'created_at',
+        )
+    )
+    posts = (
+        Post.objects.filter(user_id__in=following, created_at__gte=since)
+        .filter(Q(review__isnull=True) | visible_reviews(viewer, following, friends, prefix='review__'))
+        .order_by('-created_at')
+        .values_list('id', 'review_id', 'review__movie_id', 'likes_count', 'comments_count', 'created_at')
+    )
+
+    candidates = [('review', *row) for row in reviews[:CANDIDATES_PER_SOURCE]]
+    candidates += [('repost', *row) for row in reposts[:CANDIDATES_PER_SOURCE]]
+    candidates += [
+        ('post', post_id, review_id or post_id, movie_id, likes, comments, 0, created_at)
+        for post_id, review_id, movie_id, likes, comments, created_at in posts[:CANDIDATES_PER_SOURCE]
+    ]
+    return candidates
+
+
+def taste_vector(viewer, rows, matrix):
+    """Unit vector of the viewer's rated movies' embeddings, weighted by rating; None without data"""
+    ratings = (
+        UserMovieInteraction.objects.filter(user=viewer, rating__isnull=False)
+        .order_by('-updated_at')
+        .values_list('movie_id', 'rating')[:PROFILE_SIZE]
+    )
+    idx, weights = [], []
+    for movie_id, rating in ratings:
+        row = rows.get(str(movie_id))
+        if row is not None:
+            idx.append(row)
+            weights.append(RATING_MAP.get(rating, 0.0))
+    if not idx:
+        return None
+    vector = np.asarray(weights, dtype=np.float32) @ np.asarray(matrix[idx], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def affinities(viewer, movie_ids):
+    """Cosine between each movie and the viewer's taste; 0 where either is unknown"""
+    scores = np.zeros(len(movie_ids), dtype=np.float32)
+    rows, matrix = load_movie_embeddings()
+    if matrix is None:
+        return scores
+    profile = taste_vector(viewer, rows, matrix)
+    if profile is None:
+        return scores
+
+    positions = [i for i, movie_id in enumerate(movie_ids) if movie_id and str(movie_id) in rows]
+    if positions:
+        idx = [rows[str(movie_ids[i])] for i in positions]
+        scores[positions] = np.asarray(matrix[idx], dtype=np.float32) @ profile
+    return scores
+
+
+def score_candidates(candidates, affinity, now):
+    """Scores for collect_candidates() rows, computed column-wise"""
+    kinds, _, _, _, likes, comments, reposts, created_at = zip(*candidates)
+    age_hours = np.array([(now - ts).total_seconds() for ts in created_at]) / 3600.0
+    recency = np.exp2(-np.maximum(age_hours, 0.0) / HALF_LIFE_HOURS)
+
+    engagement = np.log1p(np.array(likes) + 2.0 * np.array(comments) + 3.0 * np.array(reposts))
+    if engagement.max() > 0:
+        engagement /= engagement.max()
+
+    kind_weight = np.array([KIND_WEIGHTS[kind] for kind in kinds])
+    return kind_weight * (RECENCY_WEIGHT * recency + ENGAGEMENT_WEIGHT * engagement + AFFINITY_WEIGHT * affinity)
+
+
+def rank_feed(viewer, now=None):
+    """
+    The viewer's ranked feed as [(kind, id, score)], best first, at most
+    RANKED_SIZE long; served from the cache for RANKING_TTL seconds.
+    """
+    key = ranking_key(viewer.id)
+    ranked = cache.get(key)
+    if ranked is not None:
+        return ranked
+
+    now = now or timezone.now()
+    started = time.perf_counter()
+    candidates = collect_candidates(viewer, now)
+    generated = time.perf_counter()
+    record_latency('candidates', generated - started)
+
+    ranked = []
+    if candidates:
+        scores = score_candidates(candidates, affinities(viewer, [c[3] for c in candidates]), now)
+        seen = set()
+        for i in np.argsort(-scores, kind='stable'):
+            kind, item_id, review_key = candidates[i][:3]
+            if review_key in seen:
+                continue
+            seen.add(review_key)
+            ranked.append((kind, item_id, round(float(scores[i]), 4)))
+            if len(ranked) >= RANKED_SIZE:
+                break
+    record_latency('ranking', time.perf_counter() - generated)
+
+    cache.set(key, ranked, RANKING_TTL)
+    return ranked
+
+
+def _bucket_key(stage, bucket):
+    return f"{STATS_PREFIX}{stage}:{bucket}"
+
+
+def record_latency(stage, seconds):
+    """Count one sample into the stage's latency histogram"""
+    ms = seconds * 1000
+    bucket = next((edge for edge in LATENCY_BUCKETS_MS if ms <= edge), 'inf')
+    key = _bucket_key(stage, bucket)
+    cache.add(key, 0, STATS_TTL)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(key, 1, STATS_TTL)
+
+
+def ranking_stats():
+    """{stage: {'count', 'p50_ms', 'p95_ms'}}; percentiles are histogram bucket upper bounds"""
+    edges = LATENCY_BUCKETS_MS + ('inf',)
+    stats = {}
+    for stage in STAGES:
+        counts = cache.get_many([_bucket_key(stage, edge) for edge in edges])
+        histogram = [counts.get(_bucket_key(stage, edge), 0) for edge in edges]
+        total = sum(histogram)
+        stats[stage] = {'count': total, 'p50_ms': _percentile(edges, histogram, total, 0.50),
+                        'p95_ms': _percentile(edges, histogram, total, 0.95)}
+    return stats
+
+
+def _percentile(edges, histogram, total, fraction):
+    if not total:
+        return None
+    cumulative = 0
+    for edge, count in zip(edges, histogram):
+        cumulative += count
+        if cumulative >= total * fraction:
+            return edge
+    return edges[-1]
+
+
+def reset_ranking_stats():
+    cache.delete_many([_bucket_key(stage, edge) for stage in STAGES for edge in LATENCY_BUCKETS_MS + ('inf',)])
@@ -1,6 +1,8 @@
+from django.db.models import CharField, Value
 from rest_framework import serializers
 from apps.social.models import Post, Achievement, UserAchievement, YearlyStats
-from apps.reviews.serializers import ReviewSerializer
+from apps.reviews.models import ReviewLike, ReviewRepost
+from apps.reviews.serializers import ReviewListSerializer
 from apps.authentication.models import User
 
 
@@ -17,8 +19,15 @@ class UserMiniSerializer(serializers.ModelSerializer):
 # POST SERIALIZER
 # ------------------------------
 class PostSerializer(serializers.ModelSerializer):
+    """
+    Feed post. Load posts with FEED_SELECT_RELATED / FEED_PREFETCH_RELATED
+    and pass viewer_flags() in the context, so a page costs a fixed number
+    of queries.
+    """
     user = UserMiniSerializer(read_only=True)
-    review = ReviewSerializer(read_only=True)
+    review = ReviewListSerializer(read_only=True)
+    is_liked = serializers.SerializerMethodField()
+    is_reposted = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -29,10 +38,59 @@ class PostSerializer(serializers.ModelSerializer):
             "review",
             "likes_count",
             "comments_count",
+            "is_liked",
+            "is_reposted",
             "created_at",
             "updated_at",
         ]
 
+    def get_is_liked(self, obj) -> bool:
+        return obj.review_id in self.context.get("liked_review_ids", ())
+
+    def get_is_reposted(self, obj) -> bool:
+        return obj.review_id in self.context.get("reposted_review_ids", ())
+
+
+class RepostSerializer(serializers.ModelSerializer):
+    """Repost in the ranked feed; load with REPOST_SELECT_RELATED / REPOST_PREFETCH_RELATED"""
+    user = UserMiniSerializer(read_only=True)
+    original_review = ReviewListSerializer(read_only=True)
+
+    class Meta:
+        model = ReviewRepost
+        fields = ["id", "user", "comment", "original_review", "created_at"]
+
+
+FEED_SELECT_RELATED = ("user", "review__user", "review__movie")
+FEED_PREFETCH_RELATED = ("review__tags",)
+REVIEW_SELECT_RELATED = ("user", "movie")
+REVIEW_PREFETCH_RELATED = ("tags",)
+REPOST_SELECT_RELATED = ("user", "original_review__user", "original_review__movie")
+REPOST_PREFETCH_RELATED = ("original_review__tags",)
+
+
+def viewer_flags(user, posts):
+    """Reviews of `posts` the viewer liked / reposted, in one query, as serializer context"""
+    flags = {"liked_review_ids": set(), "reposted_review_ids": set()}
+    review_ids = {post.review_id for post in posts if post.review_id}
+    if not review_ids:
+        return flags
+
+    liked = (
+        ReviewLike.objects.filter(user=user, review_id__in=review_ids)
+        .annotate(flag=Value("liked_review_ids", output_field=CharField()))
+        .values_list("review_id", "flag")
+    )
+    reposted = (
+        ReviewRepost.objects.filter(user=user, original_review_id__in=review_ids)
+        .annotate(flag=Value("reposted_review_ids", output_field=CharField()))
+        .values_list("original_review_id", "flag")
+        .order_by()
+    )
+    for review_id, flag in liked.union(reposted, all=True):
+        flags[flag].add(review_id)
+    return flags
+
 
 # ------------------------------
 # ACHIEVEMENTS
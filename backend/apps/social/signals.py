@@ -2,12 +2,14 @@
 Social Signals - Achievement Award Logic
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from apps.movies.models import UserMovieInteraction
 from apps.reviews.models import Review, ReviewLike
 from apps.authentication.models import UserFollow
-from .models import Achievement, UserAchievement
+from .models import Achievement, Post, UserAchievement
+from . import tasks
 
 
 def check_and_award_achievement(user, achievement_name):
@@ -98,4 +100,25 @@ def check_follower_achievements(sender, instance, created, **kwargs):
         if followers_count >= 100:
             check_and_award_achievement(followed_user, "Celebrity")
         if followers_count >= 1000:
-            check_and_award_achievement(followed_user, "Icon")
\ No newline at end of file
+            check_and_award_achievement(followed_user, "Icon")
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Append new posts to followers' timelines once committed"""
+    if created:
+        post_id = str(instance.id)
+        transaction.on_commit(lambda: tasks.fan_out_post.delay(post_id))
+
+
+@receiver(post_save, sender=UserFollow)
+def backfill_followed_author(sender, instance, created, **kwargs):
+    if created:
+        follower_id, author_id = str(instance.follower_id), str(instance.following_id)
+        transaction.on_commit(lambda: tasks.follow_author.delay(follower_id, author_id))
+
+
+@receiver(post_delete, sender=UserFollow)
+def drop_unfollowed_author(sender, instance, **kwargs):
+    follower_id, author_id = str(instance.follower_id), str(instance.following_id)
+    transaction.on_commit(lambda: tasks.unfollow_author.delay(follower_id, author_id))
@@ -1,3 +1,5 @@
+import uuid
+
 from celery import shared_task
 from django.db.models import Count, Avg, Sum
 from django.utils import timezone
@@ -5,7 +7,8 @@ from datetime import datetime
 from apps.authentication.models import User
 from apps.movies.models import UserMovieInteraction
 from apps.reviews.models import Review, ReviewLike
-from .models import YearlyStats, UserAchievement
+from .models import Post, YearlyStats, UserAchievement
+from . import timeline
 
 
 @shared_task
@@ -154,4 +157,38 @@ def generate_yearly_stats_for_user(user_id, year=None):
         }
     )
     
-    return f"Yearly stats {'created' if created else 'updated'} for {user.username} ({year})"
\ No newline at end of file
+    return f"Yearly stats {'created' if created else 'updated'} for {user.username} ({year})"
+
+
+@shared_task
+def fan_out_post(post_id):
+    """Append a new post to its followers' timelines"""
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        return 0
+    return timeline.fan_out_post(post)
+
+
+@shared_task
+def follow_author(follower_id, author_id):
+    """Backfill a newly followed author's recent posts"""
+    return timeline.follow_author(uuid.UUID(follower_id), uuid.UUID(author_id))
+
+
+@shared_task
+def unfollow_author(follower_id, author_id):
+    """Remove an unfollowed author's posts from the follower's timeline"""
+    return timeline.unfollow_author(uuid.UUID(follower_id), uuid.UUID(author_id))
+
+
+@shared_task
+def trim_timelines():
+    """Keep each timeline at SOCIAL_TIMELINE_CAP entries"""
+    return timeline.trim_timelines()
+
+
+@shared_task
+def refresh_celebrities():
+    """Recount which authors are merged at read time instead of fanned out"""
+    promoted, demoted = timeline.refresh_celebrities()
+    return f"{len(promoted)} authors promoted, {len(demoted)} demoted"
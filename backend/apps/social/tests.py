@@ -0,0 +1,227 @@
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User, UserFollow
+from apps.movies.models import Movie, UserMovieInteraction
+from apps.reviews.models import Review, ReviewLike, ReviewRepost, Tag
+from . import tasks
+from .models import Post, TimelineEntry
+from .ranking import rank_feed, ranking_stats
+from .views import SocialFeedView
+from .timeline import CELEBRITIES_KEY, read_timeline, rebuild_timeline, trim_timelines
+
+
+def run_tasks_eagerly(test):
+    """Run the timeline tasks the signals .delay() inline, so no broker is needed"""
+    for task in (tasks.fan_out_post, tasks.follow_author, tasks.unfollow_author):
+        patcher = mock.patch.object(task, 'delay', task.run)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+@override_settings(SOCIAL_CELEBRITY_FOLLOWERS=3)
+class TimelineTests(TestCase):
+    def setUp(self):
+        run_tasks_eagerly(self)
+        cache.delete(CELEBRITIES_KEY)
+        self.users = [
+            User.objects.create_user(
+                email=f'user{i}@example.com', phone_number=f'+100000000{i}', password='TestPass123!', username=f'user{i}'
+            )
+            for i in range(5)
+        ]
+        self.reader, self.author, self.star = self.users[:3]
+        self.start = timezone.now() - timedelta(days=1)
+
+    def follow(self, follower, following):
+        with self.captureOnCommitCallbacks(execute=True):
+            return UserFollow.objects.create(follower=follower, following=following)
+
+    def post(self, user, minutes):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(user=user, content='hi', created_at=self.start + timedelta(minutes=minutes))
+
+    def test_posts_fan_out_to_followers(self):
+        self.follow(self.reader, self.author)
+        post = self.post(self.author, 1)
+
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertTrue(TimelineEntry.objects.filter(user=self.author, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.star, post=post).exists())
+
+    def test_follow_backfills_and_unfollow_drops(self):
+        old = self.post(self.author, 1)
+        follow = self.follow(self.reader, self.author)
+        self.assertEqual(read_timeline(self.reader)[0], [old.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.delete()
+        self.assertEqual(read_timeline(self.reader)[0], [])
+
+    def test_celebrity_posts_are_merged_at_read_time(self):
+        for fan in self.users[:2] + self.users[3:]:
+            self.follow(fan, self.star)
+        cache.delete(CELEBRITIES_KEY)
+        self.follow(self.reader, self.author)
+
+        mine = self.post(self.reader, 1)
+        famous = self.post(self.star, 2)
+        normal = self.post(self.author, 3)
+
+        self.assertEqual(TimelineEntry.objects.filter(post=famous).count(), 1)  # the star's own entry
+        self.assertEqual(read_timeline(self.reader)[0], [normal.id, famous.id, mine.id])
+
+    def test_cursor_pages_through_merged_feed(self):
+        for fan in self.users[:2] + self.users[3:]:
+            self.follow(fan, self.star)
+        cache.delete(CELEBRITIES_KEY)
+        self.follow(self.reader, self.author)
+        expected = [self.post([self.author, self.star][i % 2], i).id for i in range(7)][::-1]
+
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        seen, url = [], '/api/social/feed/'
+        while url:
+            with mock.patch.object(SocialFeedView, 'page_size', 3), self.assertNumQueries(4):
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [str(post_id) for post_id in expected])
+
+        self.assertEqual(client.get('/api/social/feed/', {'cursor': 'bogus'}).status_code, 404)
+
+    def test_trim_and_rebuild(self):
+        self.follow(self.reader, self.author)
+        posts = [self.post(self.author, i) for i in range(5)]
+
+        self.assertEqual(trim_timelines(cap=3), 4)  # two from each of the reader's and author's timelines
+        self.assertEqual(read_timeline(self.reader)[0], [p.id for p in posts[:1:-1]])
+
+        self.assertEqual(rebuild_timeline(self.reader.id), 5)
+        self.assertEqual(read_timeline(self.reader)[0], [p.id for p in reversed(posts)])
+
+
+class FeedSerializationTests(TestCase):
+    def setUp(self):
+        run_tasks_eagerly(self)
+        cache.delete(CELEBRITIES_KEY)
+        self.reader = User.objects.create_user(
+            email='reader@example.com', phone_number='+1000000101', password='TestPass123!', username='reader'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def add_review_posts(self, count):
+        author = User.objects.create_user(
+            email=f'author{count}@example.com', phone_number=f'+10000002{count:02d}', password='TestPass123!',
+            username=f'author{count}'
+        )
+        UserFollow.objects.create(follower=self.reader, following=author)
+        posts = []
+        for i in range(count):
+            movie = Movie.objects.create(tmdb_id=count * 100 + i, title=f'Movie {i}', overview='', original_language='en')
+            review = Review.objects.create(user=author, movie=movie, rating='peak')
+            review.tags.add(Tag.objects.create(name=f'tag {count} {i}'))
+            with self.captureOnCommitCallbacks(execute=True):
+                posts.append(Post.objects.create(user=author, review=review, created_at=timezone.now()))
+        return posts
+
+    def test_feed_queries_do_not_grow_with_page(self):
+        posts = self.add_review_posts(2)
+        ReviewLike.objects.create(user=self.reader, review=posts[0].review)
+        ReviewRepost.objects.create(user=self.reader, original_review=posts[1].review)
+
+        # timeline, posts with authors/reviews/movies, review tags, liked/reposted flags
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/social/feed/')
+        results = {post['id']: post for post in response.data['results']}
+        liked, reposted = results[str(posts[0].id)], results[str(posts[1].id)]
+        self.assertEqual((liked['is_liked'], liked['is_reposted']), (True, False))
+        self.assertEqual((reposted['is_liked'], reposted['is_reposted']), (False, True))
+        self.assertEqual(liked['user']['username'], 'author2')
+        self.assertEqual(liked['review']['movie']['title'], 'Movie 0')
+
+        self.add_review_posts(6)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/social/feed/')
+        self.assertEqual(len(response.data['results']), 8)
+
+
+class ForYouRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer, self.critic, self.stranger = [
+            User.objects.create_user(
+                email=f'{name}@example.com', phone_number=f'+10000003{i:02d}', password='TestPass123!', username=name
+            )
+            for i, name in enumerate(['viewer', 'critic', 'stranger'])
+        ]
+        UserFollow.objects.create(follower=self.viewer, following=self.critic)
+        self.movies = [
+            Movie.objects.create(tmdb_id=900 + i, title=f'Movie {i}', overview='', original_language='en')
+            for i in range(4)
+        ]
+        self.now = timezone.now()
+
+    def review(self, user, movie, hours_ago, **fields):
+        return Review.objects.create(
+            user=user, movie=movie, rating='worth', created_at=self.now - timedelta(hours=hours_ago), **fields
+        )
+
+    def test_ranks_recent_and_engaging_visible_candidates(self):
+        old = self.review(self.critic, self.movies[0], 60)
+        fresh = self.review(self.critic, self.movies[1], 1)
+        popular = self.review(self.critic, self.movies[2], 30)
+        Review.objects.filter(id=popular.id).update(likes_count=40, comments_count=10)
+        self.review(self.critic, self.movies[3], 1, privacy='friends')  # not mutual
+        ancient = self.review(self.stranger, self.movies[3], 24 * 30)
+        repost = ReviewRepost.objects.create(
+            user=self.critic, original_review=ancient, created_at=self.now - timedelta(hours=10)
+        )
+
+        ranked = rank_feed(self.viewer, now=self.now)
+        self.assertEqual(
+            [(kind, item_id) for kind, item_id, _ in ranked],
+            [('review', fresh.id), ('review', popular.id), ('repost', repost.id), ('review', old.id)],
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(rank_feed(self.viewer), ranked)
+        self.assertEqual(ranking_stats()['ranking']['count'], 1)
+
+    def test_taste_affinity_breaks_ties(self):
+        liked, other = self.movies[:2]
+        # bulk_create skips post_save, which would refresh (and persist) the recommendation embeddings
+        UserMovieInteraction.objects.bulk_create([UserMovieInteraction(user=self.viewer, movie=liked, rating='peak')])
+        first = self.review(self.critic, other, 2)
+        second = self.review(self.critic, liked, 2)
+        Review.objects.filter(id__in=[first.id, second.id]).update(created_at=self.now)
+        rows = {str(liked.id): 0, str(other.id): 1}
+        matrix = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+        with mock.patch('apps.social.ranking.load_movie_embeddings', return_value=(rows, matrix)):
+            ranked = rank_feed(self.viewer, now=self.now)
+        self.assertEqual([item_id for _, item_id, _ in ranked], [second.id, first.id])
+
+    def test_endpoint_pages_ranked_items(self):
+        reviews = [self.review(self.critic, movie, i) for i, movie in enumerate(self.movies)]
+        Post.objects.create(user=self.critic, content='hello', created_at=self.now - timedelta(hours=10))
+
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        response = client.get('/api/social/feed/for-you/', {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(
+            [item['review']['id'] for item in response.data['results']], [str(r.id) for r in reviews[:3]]
+        )
+        response = client.get(response.data['next'])
+        self.assertEqual([item['type'] for item in response.data['results']], ['review', 'post'])
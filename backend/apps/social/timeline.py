@@ -0,0 +1,214 @@
+"""
+Home timelines, materialized on write.
+
+Every new post is appended to its author's and its followers' rows in
+TimelineEntry, so a feed page is one range scan on the
+(user, created_at, post) index instead of an IN-list over everyone the
+reader follows plus a sort.
+
+Authors with SOCIAL_CELEBRITY_FOLLOWERS followers or more are not fanned
+out (one post would mean that many inserts). Their posts are read from
+the (user, created_at) index on posts and merged into the page at read
+time instead. The set of such authors is cached and refreshed hourly.
+
+Timelines are capped at SOCIAL_TIMELINE_CAP entries by a daily trim;
+feeds are paged with an opaque cursor on (created_at, post id).
+"""
+import base64
+import binascii
+import itertools
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+
+from apps.authentication.models import UserFollow
+from .models import Post, TimelineEntry
+
+FAN_OUT_BATCH = 1000  # followers inserted per bulk_create
+BACKFILL_POSTS = 50  # of a newly followed author's posts copied into the follower's timeline
+CELEBRITIES_KEY = 'social:celebrities'
+CELEBRITIES_TTL = 60 * 60 * 2  # refreshed hourly; survives one missed run
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def count_celebrities():
+    """Ids of authors at or above the follower threshold, counted from user_follows"""
+    return set(
+        UserFollow.objects.values('following_id')
+        .annotate(followers=Count('id'))
+        .filter(followers__gte=settings.SOCIAL_CELEBRITY_FOLLOWERS)
+        .values_list('following_id', flat=True)
+    )
+
+
+def celebrity_ids():
+    """Authors whose posts are merged at read time (cached)"""
+    ids = cache.get(CELEBRITIES_KEY)
+    if ids is None:
+        ids = count_celebrities()
+        cache.set(CELEBRITIES_KEY, ids, CELEBRITIES_TTL)
+    return ids
+
+
+def refresh_celebrities():
+    """
+    Recount the celebrity set. Authors who dropped below the threshold get
+    their recent posts fanned out, since nothing merges them at read time
+    any more. Returns (promoted, demoted) ids.
+    """
+    previous = cache.get(CELEBRITIES_KEY)
+    current = count_celebrities()
+    cache.set(CELEBRITIES_KEY, current, CELEBRITIES_TTL)
+    if previous is None:
+        return set(), set()
+
+    demoted = previous - current
+    for author_id in demoted:
+        for post in Post.objects.filter(user_id=author_id).order_by('-created_at', '-id')[:BACKFILL_POSTS]:
+            fan_out_post(post)
+    return current - previous, demoted
+
+
+def fan_out_post(post):
+    """Append a post to its author's timeline and, unless the author is a celebrity, to every follower's"""
+    entry = dict(post_id=post.id, author_id=post.user_id, created_at=post.created_at)
+    TimelineEntry.objects.bulk_create([TimelineEntry(user_id=post.user_id, **entry)], ignore_conflicts=True)
+    if post.user_id in celebrity_ids():
+        return 0
+
+    fanned_out = 0
+    follower_ids = (
+        UserFollow.objects.filter(following_id=post.user_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=FAN_OUT_BATCH)
+    )
+    for batch in _batches(follower_ids, FAN_OUT_BATCH):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=follower_id, **entry) for follower_id in batch],
+            ignore_conflicts=True,
+        )
+        fanned_out += len(batch)
+    return fanned_out
+
+
+def follow_author(follower_id, author_id):
+    """Copy a newly followed author's recent posts into the follower's timeline"""
+    if author_id in celebrity_ids():
+        return 0
+    posts = Post.objects.filter(user_id=author_id).order_by('-created_at', '-id')
+    entries = [
+        TimelineEntry(user_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, created_at in posts.values_list('id', 'created_at')[:BACKFILL_POSTS]
+    ]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def unfollow_author(follower_id, author_id):
+    """Drop an unfollowed author's posts from the follower's timeline"""
+    deleted, _ = TimelineEntry.objects.filter(user_id=follower_id, author_id=author_id).delete()
+    return deleted
+
+
+def rebuild_timeline(user_id, cap=None):
+    """Rebuild one timeline from scratch: own posts and those of followed, fanned-out authors"""
+    cap = cap or settings.SOCIAL_TIMELINE_CAP
+    celebrities = celebrity_ids() - {user_id}
+    posts = (
+        Post.objects.filter(Q(user_id=user_id) | Q(user__followers__follower_id=user_id))
+        .exclude(user_id__in=celebrities)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'user_id', 'created_at')[:cap]
+    )
+    entries = [
+        TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in posts
+    ]
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def trim_timelines(cap=None):
+    """Delete everything past the newest `cap` entries of each timeline over the cap"""
+    cap = cap or settings.SOCIAL_TIMELINE_CAP
+    over_cap = (
+        TimelineEntry.objects.values('user_id')
+        .annotate(entries=Count('id'))
+        .filter(entries__gt=cap)
+        .values_list('user_id', flat=True)
+    )
+    trimmed = 0
+    for user_id in over_cap.iterator():
+        timeline = TimelineEntry.objects.filter(user_id=user_id)
+        oldest_kept = timeline.order_by('-created_at', '-post_id').values('created_at', 'post_id')[cap - 1]
+        deleted, _ = timeline.filter(
+            Q(created_at__lt=oldest_kept['created_at'])
+            | Q(created_at=oldest_kept['created_at'], post_id__lt=oldest_kept['post_id'])
+        ).delete()
+        trimmed += deleted
+    return trimmed
+
+
+def encode_cursor(created_at, post_id):
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{post_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, post_id) of a cursor; raises NotFound when it is malformed"""
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        post_id = uuid.UUID(post_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        created_at = None
+    if created_at is None:
+        raise NotFound('Invalid cursor')
+    return created_at, post_id
+
+
+def _before(cursor, created_at_field, id_field):
+    created_at, post_id = cursor
+    return Q(**{f'{created_at_field}__lt': created_at}) | Q(
+        **{created_at_field: created_at, f'{id_field}__lt': post_id}
+    )
+
+
+def read_timeline(user, cursor=None, limit=20):
+    """
+    One page of a user's home feed, newest first.
+    Returns (post ids, next cursor or None). The page merges the user's
+    timeline entries with posts of followed celebrities.
+    """
+    position = decode_cursor(cursor) if cursor else None
+
+    entries = TimelineEntry.objects.filter(user=user)
+    if position:
+        entries = entries.filter(_before(position, 'created_at', 'post_id'))
+    page = list(entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit + 1])
+
+    celebrities = celebrity_ids() - {user.id}
+    if celebrities:
+        followed = list(
+            UserFollow.objects.filter(follower=user, following_id__in=celebrities)
+            .values_list('following_id', flat=True)
+        )
+        if followed:
+            posts = Post.objects.filter(user_id__in=followed)
+            if position:
+                posts = posts.filter(_before(position, 'created_at', 'id'))
+            page.extend(posts.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit + 1])
+            # Posts fanned out before their author became a celebrity appear twice
+            page = sorted(set(page), reverse=True)
+
+    next_cursor = encode_cursor(*page[limit - 1]) if len(page) > limit else None
+    return [post_id for _, post_id in page[:limit]], next_cursor
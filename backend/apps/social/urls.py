@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     SocialFeedView,
+    ForYouFeedView,
     UserAchievementsView,
     YearlyStatsView,
     GenerateYearlyWrapView,
@@ -11,6 +12,7 @@ urlpatterns = [
     # Social Feed
     # -----------------------------------
     path("feed/", SocialFeedView.as_view(), name="social-feed"),
+    path("feed/for-you/", ForYouFeedView.as_view(), name="social-for-you"),
 
     # -----------------------------------
     # User Achievements
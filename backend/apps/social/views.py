@@ -1,9 +1,25 @@
 from rest_framework import generics, status, serializers
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from apps.social.models import Post, Achievement, UserAchievement, YearlyStats
-from apps.reviews.models import Review
+from apps.social.serializers import (
+    FEED_PREFETCH_RELATED,
+    FEED_SELECT_RELATED,
+    REPOST_PREFETCH_RELATED,
+    REPOST_SELECT_RELATED,
+    REVIEW_PREFETCH_RELATED,
+    REVIEW_SELECT_RELATED,
+    PostSerializer,
+    RepostSerializer,
+    viewer_flags,
+)
+from apps.social.ranking import rank_feed
+from apps.social.timeline import read_timeline
+from apps.reviews.models import Review, ReviewRepost
+from apps.reviews.serializers import ReviewListSerializer
+from utils.pagination import RankedFeedPagination
 from apps.authentication.models import User
 
 
@@ -11,12 +27,6 @@ from apps.authentication.models import User
 # Serializers
 # ----------------------------------------------------
 
-class PostSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Post
-        fields = "__all__"
-
-
 class AchievementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Achievement
@@ -56,15 +66,82 @@ class YearlyWrapSerializer(serializers.Serializer):
 # ============================================================
 
 class SocialFeedView(generics.ListAPIView):
+    """
+    Home feed from the reader's materialized timeline (see timeline.py),
+    paged with ?cursor= from the `next` link.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = PostSerializer
-
-    def get_queryset(self):
-        user = self.request.user
-        following_ids = user.following.values_list("following_id", flat=True)
-        return Post.objects.filter(
-            user__id__in=list(following_ids) + [user.id]
-        ).order_by("-created_at")
+    page_size = 20
+
+    def list(self, request, *args, **kwargs):
+        post_ids, next_cursor = read_timeline(
+            request.user, request.query_params.get("cursor"), self.page_size
+        )
+        posts = (
+            Post.objects.select_related(*FEED_SELECT_RELATED)
+            .prefetch_related(*FEED_PREFETCH_RELATED)
+            .in_bulk(post_ids)
+        )
+        page = [posts[post_id] for post_id in post_ids if post_id in posts]
+        context = {**self.get_serializer_context(), **viewer_flags(request.user, page)}
+
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+        return Response({
+            "next": next_url,
+            "previous": None,
+            "results": PostSerializer(page, many=True, context=context).data,
+        })
+
+
+class ForYouFeedView(generics.GenericAPIView):
+    """
+    Ranked feed of reviews, reposts and posts by the people the reader
+    follows (see ranking.py). Each result is {"type", "score", <type>: {...}}.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = RankedFeedPagination
+
+    def get(self, request):
+        page = self.paginate_queryset(rank_feed(request.user))
+
+        ids = {"review": [], "repost": [], "post": []}
+        for kind, item_id, _ in page:
+            ids[kind].append(item_id)
+        reviews = (
+            Review.objects.select_related(*REVIEW_SELECT_RELATED)
+            .prefetch_related(*REVIEW_PREFETCH_RELATED)
+            .in_bulk(ids["review"])
+        ) if ids["review"] else {}
+        reposts = (
+            ReviewRepost.objects.select_related(*REPOST_SELECT_RELATED)
+            .prefetch_related(*REPOST_PREFETCH_RELATED)
+            .in_bulk(ids["repost"])
+        ) if ids["repost"] else {}
+        posts = (
+            Post.objects.select_related(*FEED_SELECT_RELATED)
+            .prefetch_related(*FEED_PREFETCH_RELATED)
+            .in_bulk(ids["post"])
+        ) if ids["post"] else {}
+
+        context = {**self.get_serializer_context(), **viewer_flags(request.user, posts.values())}
+        serializers_by_kind = {
+            "review": (reviews, ReviewListSerializer),
+            "repost": (reposts, RepostSerializer),
+            "post": (posts, PostSerializer),
+        }
+        results = []
+        for kind, item_id, score in page:
+            objects, serializer_class = serializers_by_kind[kind]
+            if item_id in objects:  # deleted since the feed was ranked
+                results.append({
+                    "type": kind,
+                    "score": score,
+                    kind: serializer_class(objects[item_id], context=context).data,
+                })
+        return self.get_paginated_response(results)
 
 
 # ============================================================
@@ -5,22 +5,24 @@ ASGI config for popcult_project project.
 import os
 import django
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "popcult_project.settings")
 django.setup()
 
-# Import your WebSocket routing (I assume chat app has websocket routing)
-from apps.chat.routing import websocket_urlpatterns
+from apps.authentication.middleware import JWTAuthMiddleware
+from apps.chat.routing import websocket_urlpatterns as chat_websocket_urlpatterns
+from apps.matching.routing import websocket_urlpatterns as matching_websocket_urlpatterns
+
+websocket_urlpatterns = chat_websocket_urlpatterns + matching_websocket_urlpatterns
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
 
-    "websocket": AuthMiddlewareStack(
+    # Same JWT access tokens as the REST API, passed as ?token=<jwt>
+    "websocket": JWTAuthMiddleware(
         URLRouter(
             websocket_urlpatterns
         )
     ),
 })
-
@@ -1,4 +1,6 @@
 import os
+from datetime import timedelta
+
 from celery import Celery
 from celery.schedules import crontab
 
@@ -7,6 +9,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'popcult_project.settings')
 app = Celery('popcult_project')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+# Shared maintenance tasks outside the apps
+app.autodiscover_tasks(['utils'], related_name='partitioning')
 
 # Periodic tasks
 app.conf.beat_schedule = {
@@ -22,6 +26,26 @@ app.conf.beat_schedule = {
         'task': 'apps.movies.tasks.check_upcoming_releases',
         'schedule': crontab(hour=6, minute=0),  # Run at 6 AM daily
     },
+    'sync-tmdb-changes': {
+        'task': 'apps.movies.tasks.sync_tmdb_changes',
+        'schedule': crontab(minute=30),  # Run hourly
+    },
+    'flush-chat-messages': {
+        'task': 'apps.chat.tasks.flush_chat_messages',
+        'schedule': timedelta(seconds=2),  # Write-behind chat messages
+    },
+    'maintain-partitions': {
+        'task': 'utils.partitioning.maintain_partitions',
+        'schedule': crontab(hour=1, minute=15),  # Run at 1:15 AM daily
+    },
+    'refresh-timeline-celebrities': {
+        'task': 'apps.social.tasks.refresh_celebrities',
+        'schedule': crontab(minute=45),  # Run hourly
+    },
+    'trim-timelines': {
+        'task': 'apps.social.tasks.trim_timelines',
+        'schedule': crontab(hour=4, minute=0),  # Run at 4 AM daily
+    },
 }
 
 @app.task(bind=True)
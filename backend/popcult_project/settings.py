@@ -190,6 +190,46 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Threads (and so database connections) the matching consumer uses for swipes
+MATCHING_DB_POOL_SIZE = config("MATCHING_DB_POOL_SIZE", default=8, cast=int)
+
+# Write-behind chat messages: "redis" (stream) or "memory" (single process, dev only)
+CHAT_MESSAGE_QUEUE = config("CHAT_MESSAGE_QUEUE", default="redis")
+CHAT_MESSAGE_STREAM_URL = (
+    f"redis://{config('REDIS_HOST', default='localhost')}:"
+    f"{config('REDIS_PORT', default=6379)}/2"
+)
+# Seconds before messages read by a writer that never acknowledged them are redelivered
+CHAT_MESSAGE_CLAIM_AFTER = config("CHAT_MESSAGE_CLAIM_AFTER", default=60, cast=int)
+
+# Monthly partitioned tables (PostgreSQL) and their retention in months;
+# None keeps every partition. Expired partitions are archived as .csv.gz
+PARTITIONED_TABLES = {
+    "messages": None,
+    "notifications": config("NOTIFICATIONS_RETENTION_MONTHS", default=6, cast=int),
+    "user_activities": config("USER_ACTIVITIES_RETENTION_MONTHS", default=12, cast=int),
+}
+PARTITION_ARCHIVE_DIR = config("PARTITION_ARCHIVE_DIR", default=str(BASE_DIR / "archive" / "partitions"))
+
+# Social timelines: posts are fanned out to followers on write, except for
+# authors with at least SOCIAL_CELEBRITY_FOLLOWERS followers, whose posts are
+# merged into feeds at read time. Each timeline keeps its newest CAP posts.
+SOCIAL_CELEBRITY_FOLLOWERS = config("SOCIAL_CELEBRITY_FOLLOWERS", default=5000, cast=int)
+SOCIAL_TIMELINE_CAP = config("SOCIAL_TIMELINE_CAP", default=800, cast=int)
+
+# --------------------------
+# CACHE (Redis)
+# --------------------------
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": (
+            f"redis://{config('REDIS_HOST', default='localhost')}:"
+            f"{config('REDIS_PORT', default=6379)}/1"
+        ),
+    }
+}
+
 # --------------------------
 # CELERY
 # --------------------------
@@ -208,6 +248,11 @@ CELERY_TIMEZONE = "UTC"
 # --------------------------
 TMDB_API_KEY = config("TMDB_API_KEY")
 TMDB_BASE_URL = config("TMDB_BASE_URL")
+# TMDb allows ~50 requests/second per IP; stay a little below it
+TMDB_RATE_LIMIT = config("TMDB_RATE_LIMIT", default=40, cast=int)
+TMDB_MAX_WORKERS = config("TMDB_MAX_WORKERS", default=8, cast=int)
+TMDB_MAX_RETRIES = config("TMDB_MAX_RETRIES", default=3, cast=int)
+TMDB_CACHE_ENABLED = config("TMDB_CACHE_ENABLED", default=True, cast=bool)
 
 # --------------------------
 # CLOUDINARY
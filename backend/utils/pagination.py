@@ -0,0 +1,203 @@
+"""
+Shared pagination classes.
+
+Keyset (cursor) pagination pages with `WHERE <ordering> < <cursor>`
+instead of OFFSET, and never COUNTs, so a page costs the same on the
+first page as on the thousandth. The cursor is opaque to clients; follow
+the `next` / `previous` links.
+"""
+
+import base64
+import binascii
+import uuid
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Base keyset pagination; subclasses set `ordering` to an indexed column"""
+
+    page_size = 20
+    ordering = '-created_at'
+    cursor_query_param = 'cursor'
+
+
+class MessageHistoryPagination(KeysetPagination):
+    """Chat history, newest first, on the (chat_room, created_at) index"""
+
+    page_size = 30
+    ordering = '-created_at'
+
+
+class MessageSearchPagination(KeysetPagination):
+    """Message search hits, newest first (recency, not relevance, so pages stay stable)"""
+
+    page_size = 20
+    ordering = '-created_at'
+
+
+class CompositeKeysetPagination(BasePagination):
+    """
+    Keyset pagination whose cursor carries every ordering column, ending in
+    the primary key, the way the social feed's does.
+
+    CursorPagination positions only on the first ordering column and pages
+    through ties with an OFFSET capped at 1000, which breaks on columns
+    where many rows tie (likes_count) and on NULLs. Subclasses set
+    `ordering`, all descending with a unique last field, or override
+    get_fields(); columns in `nulls_last` sort their NULLs after every value.
+    """
+
+    page_size = 20
+    cursor_query_param = 'cursor'
+    ordering = ('created_at', 'id')
+    nulls_last = ()
+    parsers = {'likes_count': int, 'created_at': parse_datetime, 'id': uuid.UUID}
+
+    def get_fields(self, request):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fields = self.get_fields(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+
+        order = [F(field).desc(nulls_last=True) if field in self.nulls_last else f'-{field}' for field in self.fields]
+        page = list(queryset.order_by(*order)[:self.page_size + 1])
+        self.next_cursor = self.encode_cursor(page[self.page_size - 1]) if len(page) > self.page_size else None
+        return page[:self.page_size]
+
+    def after(self, values):
+        """Rows past `values` in the ordering: a < x, or a = x and b < y, or ..."""
+        q = Q()
+        for i, field in enumerate(self.fields):
+            if values[i] is None:
+                continue  # NULLs sort last, nothing follows them on this column
+            past = Q(**{f'{field}__lt': values[i]})
+            if field in self.nulls_last:
+                past |= Q(**{f'{field}__isnull': True})
+            for earlier, value in zip(self.fields[:i], values[:i]):
+                past &= Q(**{f'{earlier}__isnull': True} if value is None else {earlier: value})
+            q |= past
+        # Redundant, but gives the planner a range on the leading index column
+        leading = self.fields[0]
+        if values[0] is None:
+            q &= Q(**{f'{leading}__isnull': True})
+        elif leading not in self.nulls_last:
+            q &= Q(**{f'{leading}__lte': values[0]})
+        return q
+
+    def encode_cursor(self, item):
+        values = [getattr(item, field) for field in self.fields]
+        raw = '|'.join(
+            '' if value is None else value.isoformat() if hasattr(value, 'isoformat') else str(value)
+            for value in values
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """Values of the ordering fields in a cursor; raises NotFound when it is malformed"""
+        values = []
+        try:
+            parts = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            for field, part in zip(self.fields, parts, strict=True):
+                value = None if part == '' and field in self.nulls_last else self.parsers[field](part)
+                if value is None and (part or field not in self.nulls_last):  # e.g. parse_datetime('junk')
+                    raise ValueError(part)
+                values.append(value)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound('Invalid cursor') from None
+        return values
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response({'next': next_url, 'previous': None, 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
+
+
+class ReviewListPagination(CompositeKeysetPagination):
+    """
+    Review listings of one movie or one user, on their (movie|user, ...)
+    indexes: newest first, or ?sort=likes for most liked first
+    """
+
+    page_size = 20
+    orderings = {
+        'recent': ('created_at', 'id'),
+        'likes': ('likes_count', 'created_at', 'id'),
+    }
+
+    def get_fields(self, request):
+        return self.orderings.get(request.query_params.get('sort'), self.orderings['recent'])
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': 'sort',
+            'required': False,
+            'in': 'query',
+            'description': 'recent (default) or likes.',
+            'schema': {'type': 'string', 'enum': list(self.orderings)},
+        }]
+
+
+class ReviewCommentPagination(KeysetPagination):
+    """Comments of a review (or replies of a comment), oldest first"""
+
+    page_size = 20
+    ordering = 'created_at'
+
+
+class ReviewActivityPagination(KeysetPagination):
+    """Likes and reposts of a review, newest first"""
+
+    page_size = 50
+    ordering = '-created_at'
+
+
+class InboxPagination(CompositeKeysetPagination):
+    """
+    Chat rooms by latest message, on the (participant, last_message_at,
+    created_at) indexes; rooms without messages follow, newest first
+    """
+
+    page_size = 50
+    ordering = ('last_message_at', 'created_at', 'id')
+    nulls_last = ('last_message_at',)
+    parsers = {'last_message_at': parse_datetime, **CompositeKeysetPagination.parsers}
+
+
+class RankedFeedPagination(LimitOffsetPagination):
+    """Slices of a ranked feed cached as a Python list, where offsets and counts cost nothing"""
+
+    default_limit = 20
+    max_limit = 50
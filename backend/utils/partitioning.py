@@ -0,0 +1,202 @@
+"""
+Monthly range partitioning for append-heavy tables (PostgreSQL only).
+
+A partitioned table is split on created_at into one partition per UTC
+month, named <table>_pYYYYMM, plus a <table>_default catch-all that only
+receives rows no monthly partition covers. Because a primary key on a
+partitioned table must contain the partition key, the database primary
+key becomes (id, created_at); the models keep `id` as their pk, and ids
+stay unique because they are random UUIDs.
+
+- convert_to_partitioned() turns an existing table into a partitioned
+  one (used by migrations; copies the data, so run it in a maintenance
+  window on large tables)
+- maintain_partitions (Celery beat) creates the coming months ahead of
+  time, and detaches partitions past their retention, archiving each
+  one to <PARTITION_ARCHIVE_DIR>/<partition>.csv.gz before dropping it
+
+Queries that filter or order by created_at (history pages, inboxes,
+notification lists) only touch the partitions they need; see the
+check_partition_pruning command.
+"""
+
+import gzip
+import logging
+import os
+import re
+from datetime import date
+
+from celery import shared_task
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = 'created_at'
+MONTHS_AHEAD = 2
+
+
+def add_months(month, months):
+    """First day of the month `months` after the month of `month`"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_of(moment):
+    return date(moment.year, moment.month, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def _bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+    return cursor.fetchone() is not None
+
+
+def create_partition(cursor, table, month):
+    """Create the partition holding `month` if it does not exist yet"""
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} '
+        f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})'
+    )
+
+
+def ensure_partitions(cursor, table, months_ahead=MONTHS_AHEAD):
+    """Partitions for the current month and the next `months_ahead` ones"""
+    this_month = month_of(timezone.now())
+    for offset in range(months_ahead + 1):
+        create_partition(cursor, table, add_months(this_month, offset))
+
+
+def monthly_partitions(cursor, table):
+    """(month, partition name) of the table's monthly partitions, oldest first"""
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(%s)',
+        [table],
+    )
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def export_partition(cursor, partition, archive_dir):
+    """Write a partition to <archive_dir>/<partition>.csv.gz (with a header row); returns the path"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{partition}.csv.gz')
+    with gzip.open(f'{path}.part', 'wt', encoding='utf-8') as fh:
+        cursor.cursor.copy_expert(f'COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)', fh)
+    os.replace(f'{path}.part', path)
+    return path
+
+
+def detach_expired(cursor, table, retention_months, archive_dir=None):
+    """
+    Detach monthly partitions that ended more than `retention_months` ago.
+    With an archive_dir each one is exported and dropped; without, it is
+    left as a standalone table. Returns the detached partition names.
+    """
+    cutoff = add_months(month_of(timezone.now()), -retention_months)
+    detached = []
+    for month, partition in monthly_partitions(cursor, table):
+        if add_months(month, 1) > cutoff:
+            break
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {partition}')
+        if archive_dir:
+            path = export_partition(cursor, partition, archive_dir)
+            cursor.execute(f'DROP TABLE {partition}')
+            logger.info("Archived partition %s to %s", partition, path)
+        detached.append(partition)
+    return detached
+
+
+def convert_to_partitioned(schema_editor, table, months_ahead=MONTHS_AHEAD):
+    """
+    Rebuild `table` as a monthly partitioned table with the same columns,
+    defaults, indexes and foreign keys, and move its rows over.
+    No-op on other databases and on tables that are already partitioned.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    old = f'{table}_unpartitioned'
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return
+
+        cursor.execute(
+            'SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisunique FROM pg_index i '
+            'JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary',
+            [table],
+        )
+        indexes = cursor.fetchall()
+        unique = [name for name, _, is_unique in indexes if is_unique]
+        if unique:
+            raise ValueError(f"Unique indexes on {table} must include {PARTITION_KEY}: {', '.join(unique)}")
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER' "
+            "ORDER BY ordinal_position",
+            [table],
+        )
+        columns = ', '.join(name for (name,) in cursor.fetchall())
+        cursor.execute(f"SELECT min({PARTITION_KEY}) FROM {table}")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        cursor.execute(
+            f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({PARTITION_KEY})'
+        )
+        month = month_of(oldest) if oldest else month_of(timezone.now())
+        last = add_months(month_of(timezone.now()), months_ahead)
+        while month <= last:
+            create_partition(cursor, table, month)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}')
+        cursor.execute(f'DROP TABLE {old}')
+
+        cursor.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, {PARTITION_KEY})')
+        for _, definition, _ in indexes:
+            cursor.execute(definition)  # names and definitions are free again after the drop
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+
+@shared_task
+def maintain_partitions():
+    """
+    Create upcoming monthly partitions and archive expired ones for every
+    table in PARTITIONED_TABLES ({table: retention in months or None}).
+    """
+    if connection.vendor != 'postgresql':
+        return "Partitioning needs PostgreSQL"
+
+    archived = []
+    with connection.cursor() as cursor:
+        for table, retention_months in settings.PARTITIONED_TABLES.items():
+            if not is_partitioned(cursor, table):
+                logger.warning("%s is not partitioned; run its migrations first", table)
+                continue
+            ensure_partitions(cursor, table)
+            if retention_months:
+                archived += detach_expired(cursor, table, retention_months, settings.PARTITION_ARCHIVE_DIR)
+    return f"Archived {len(archived)} partitions"
@@ -1,7 +1,258 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from apps.movies.models import Movie
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 10  # seconds
+STALE_AFTER_DAYS = 7
+
+# Movie columns refreshed from TMDb when an existing row is upserted
+MOVIE_SYNC_FIELDS = [
+    'title', 'original_title', 'overview', 'poster_path', 'backdrop_path',
+    'release_date', 'runtime', 'genres', 'original_language',
+    'tmdb_vote_average', 'tmdb_vote_count', 'last_synced', 'updated_at',
+]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Refills at `rate` tokens per second up to `capacity`; acquire() blocks
+    until a token is available so bursts never exceed TMDb's quota.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def parse_release_date(value):
+    """TMDb release_date ('YYYY-MM-DD', '' or missing) as a date; None when absent or malformed"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+# One pooled keep-alive session and one limiter per process, shared by every client
+_session = None
+_rate_limiters = {}
+_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide requests.Session used for TMDb calls"""
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=settings.TMDB_MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.TMDB_MAX_WORKERS,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get_rate_limiter(rate):
+    """Return the process-wide token bucket for the given requests/second rate"""
+    with _lock:
+        if rate not in _rate_limiters:
+            _rate_limiters[rate] = TokenBucket(rate)
+        return _rate_limiters[rate]
+
+
+class TMDbResponseCache:
+    """
+    Shared cache for TMDb GET responses.
+
+    - Keyed by endpoint + params, with a TTL per endpoint (ENDPOINT_TTLS)
+    - Bodies are stored zlib-compressed in the Django cache (Redis)
+    - Expired entries are kept around and revalidated with
+      If-None-Match / If-Modified-Since, so unchanged data costs a 304
+    - Identical concurrent requests, from any worker, are coalesced behind a
+      short-lived lock key: one caller fetches, the others wait for its entry
+    - Hits, misses, revalidations and bytes saved are counted in the cache
+    """
+
+    KEY_PREFIX = 'tmdb:response:'
+    STATS_PREFIX = 'tmdb:stats:'
+    STATS = ('hits', 'misses', 'revalidated', 'coalesced', 'bytes_fetched', 'bytes_saved')
+
+    # (path pattern, seconds a response is served without revalidation)
+    ENDPOINT_TTLS = [
+        (re.compile(r'^/movie/\d+$'), 24 * 3600),
+        (re.compile(r'^/movie/(popular|upcoming)$'), 3600),
+        (re.compile(r'^/discover/movie$'), 6 * 3600),
+        (re.compile(r'^/search/movie$'), 3600),
+    ]
+    # How long an expired entry is kept for conditional revalidation
+    RETENTION = 30 * 24 * 3600
+    LOCK_TIMEOUT = 30
+    WAIT_INTERVAL = 0.05
+
+    def ttl_for(self, path):
+        """TTL for an endpoint, or None when it must not be cached"""
+        for pattern, ttl in self.ENDPOINT_TTLS:
+            if pattern.match(path):
+                return ttl
+        return None
+
+    def make_key(self, path, params):
+        query = urlencode(sorted((params or {}).items()))
+        return self.KEY_PREFIX + hashlib.sha1(f"{path}?{query}".encode()).hexdigest()
+
+    def fetch(self, path, params, send, revalidate=False, if_modified=False):
+        """
+        Return the decoded JSON body for (path, params).
+        `send(extra_headers)` performs the real request and returns the response.
+        With revalidate=True a fresh entry is still checked against TMDb
+        (conditionally), e.g. when the changes feed says the movie was edited.
+        With if_modified=True too, a 304 returns None instead of the cached
+        body, so callers can skip work for data they already have.
+        """
+        ttl = self.ttl_for(path)
+        if ttl is None:
+            response = send({})
+            response.raise_for_status()
+            return response.json()
+
+        key = self.make_key(path, params)
+        entry = cache.get(key)
+        if not revalidate and self._is_fresh(entry):
+            self._count(hits=1, bytes_saved=entry['size'])
+            return self._decode(entry)
+
+        lock_key = f"{key}:lock"
+        if revalidate:
+            return self._refresh(key, ttl, entry, send, if_modified=if_modified)
+
+        if not cache.add(lock_key, 1, timeout=self.LOCK_TIMEOUT):
+            fresh = self._wait_for_fresh(key)
+            if fresh is not None:
+                self._count(hits=1, coalesced=1, bytes_saved=fresh['size'])
+                return self._decode(fresh)
+            # The other fetcher is stuck or failed: fetch ourselves, leaving its lock alone
+            return self._refresh(key, ttl, cache.get(key), send)
+
+        try:
+            return self._refresh(key, ttl, entry, send)
+        finally:
+            cache.delete(lock_key)
+
+    def stats(self):
+        """Counters plus hit ratio (revalidated responses count as hits)"""
+        values = cache.get_many([self.STATS_PREFIX + name for name in self.STATS])
+        stats = {name: values.get(self.STATS_PREFIX + name, 0) for name in self.STATS}
+        requests_seen = stats['hits'] + stats['misses'] + stats['revalidated']
+        stats['hit_ratio'] = (
+            round((stats['hits'] + stats['revalidated']) / requests_seen, 4) if requests_seen else 0.0
+        )
+        return stats
+
+    def reset_stats(self):
+        cache.delete_many([self.STATS_PREFIX + name for name in self.STATS])
+
+    def _refresh(self, key, ttl, entry, send, if_modified=False):
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = send(headers)
+        if response.status_code == 304 and entry:
+            entry['expires_at'] = time.time() + ttl
+            cache.set(key, entry, timeout=self.RETENTION)
+            self._count(revalidated=1, bytes_saved=entry['size'])
+            return None if if_modified else self._decode(entry)
+
+        response.raise_for_status()
+        body = response.content
+        cache.set(key, {
+            'body': zlib.compress(body),
+            'size': len(body),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'expires_at': time.time() + ttl,
+        }, timeout=self.RETENTION)
+        self._count(misses=1, bytes_fetched=len(body))
+        return json.loads(body)
+
+    def _wait_for_fresh(self, key):
+        deadline = time.monotonic() + self.LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(self.WAIT_INTERVAL)
+            entry = cache.get(key)
+            if self._is_fresh(entry):
+                return entry
+            if not cache.get(f"{key}:lock"):
+                return None
+        return None
+
+    def _is_fresh(self, entry):
+        return entry is not None and entry['expires_at'] > time.time()
+
+    def _decode(self, entry):
+        return json.loads(zlib.decompress(entry['body']))
+
+    def _count(self, **increments):
+        for name, amount in increments.items():
+            key = self.STATS_PREFIX + name
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                if not cache.add(key, amount, timeout=None):
+                    cache.incr(key, amount)
+
+
+response_cache = TMDbResponseCache()
+
 
 class TMDbClient:
     def __init__(self):
@@ -11,37 +262,95 @@ class TMDbClient:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
-    
+        self.session = get_session()
+        self.rate_limiter = get_rate_limiter(settings.TMDB_RATE_LIMIT)
+        self.max_workers = settings.TMDB_MAX_WORKERS
+        self.response_cache = response_cache if settings.TMDB_CACHE_ENABLED else None
+
+    def _get(self, path, params=None, revalidate=False, if_modified=False):
+        """
+        GET a TMDb endpoint, served from the response cache when possible.
+        See TMDbResponseCache.fetch for revalidate and if_modified.
+        """
+        def send(extra_headers):
+            return self._send(path, params, extra_headers)
+
+        if self.response_cache is None:
+            response = send({})
+            response.raise_for_status()
+            return response.json()
+        return self.response_cache.fetch(path, params, send, revalidate=revalidate, if_modified=if_modified)
+
+    def _send(self, path, params=None, extra_headers=None):
+        """Rate-limited request against the TMDb API (retries are handled by the session)"""
+        self.rate_limiter.acquire()
+        return self.session.get(
+            f"{self.base_url}{path}",
+            headers={**self.headers, **(extra_headers or {})},
+            params=params,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def map_concurrently(self, func, items):
+        """
+        Call func(item) for every item using a bounded thread pool.
+        Returns {item: result}; items whose request failed are logged and left out.
+        """
+        results = {}
+        if not items:
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except requests.RequestException as e:
+                    logger.warning("TMDb request for %s failed: %s", item, e)
+        return results
+
     def search_movies(self, query, page=1):
         """Search movies by title"""
-        endpoint = f"{self.base_url}/search/movie"
-        params = {'query': query, 'page': page}
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
-    
-    def get_movie_details(self, tmdb_id):
-        """Get detailed movie information"""
-        endpoint = f"{self.base_url}/movie/{tmdb_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        return response.json()
-    
+        return self._get("/search/movie", params={'query': query, 'page': page})
+
+    def get_movie_details(self, tmdb_id, revalidate=False, if_modified=False):
+        """Get detailed movie information (None when if_modified and TMDb answered 304)"""
+        return self._get(f"/movie/{tmdb_id}", revalidate=revalidate, if_modified=if_modified)
+
     def get_popular_movies(self, page=1):
         """Get popular movies"""
-        endpoint = f"{self.base_url}/movie/popular"
-        params = {'page': page}
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
-    
+        return self._get("/movie/popular", params={'page': page})
+
     def get_upcoming_movies(self, page=1):
         """Get upcoming movies"""
-        endpoint = f"{self.base_url}/movie/upcoming"
-        params = {'page': page}
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
-    
+        return self._get("/movie/upcoming", params={'page': page})
+
+    def get_movie_changes(self, start_date, end_date, page=1):
+        """Get ids of movies edited on TMDb between two dates (max 14 days apart)"""
+        params = {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'page': page,
+        }
+        return self._get("/movie/changes", params=params)
+
+    def get_changed_movie_ids(self, start_date, end_date):
+        """All changed movie ids in the window; pages after the first are fetched concurrently"""
+        first = self.get_movie_changes(start_date, end_date)
+        pages = self.map_concurrently(
+            lambda page: self.get_movie_changes(start_date, end_date, page=page),
+            range(2, first.get('total_pages', 1) + 1),
+        )
+        return [
+            change['id']
+            for data in [first, *pages.values()]
+            for change in data.get('results', [])
+            if not change.get('adult')
+        ]
+
     def discover_movies(self, genres=None, year=None, sort_by='popularity.desc', page=1):
         """Discover movies with filters"""
-        endpoint = f"{self.base_url}/discover/movie"
         params = {
             'page': page,
             'sort_by': sort_by
@@ -50,50 +359,117 @@ class TMDbClient:
             params['with_genres'] = ','.join(map(str, genres))
         if year:
             params['year'] = year
-        
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        return response.json()
-    
+
+        return self._get("/discover/movie", params=params)
+
     def cache_movie(self, tmdb_id):
-        """Cache movie in local database"""
-        try:
-            movie = Movie.objects.get(tmdb_id=tmdb_id)
-            # Update if outdated (older than 7 days)
-            if (timezone.now() - movie.last_synced).days > 7:
-                data = self.get_movie_details(tmdb_id)
-                self._update_movie_from_api(movie, data)
-            return movie
-        except Movie.DoesNotExist:
-            data = self.get_movie_details(tmdb_id)
-            return self._create_movie_from_api(data)
-    
-    def _create_movie_from_api(self, data):
-        """Create movie from API data"""
-        movie = Movie.objects.create(
-            tmdb_id=data['id'],
-            title=data['title'],
-            original_title=data.get('original_title', ''),
-            overview=data.get('overview', ''),
-            poster_path=data.get('poster_path', ''),
-            backdrop_path=data.get('backdrop_path', ''),
-            release_date=data.get('release_date'),
-            runtime=data.get('runtime'),
-            genres=[g['id'] for g in data.get('genres', [])],
-            original_language=data.get('original_language', 'en'),
-            tmdb_vote_average=data.get('vote_average', 0),
-            tmdb_vote_count=data.get('vote_count', 0),
-            last_synced=timezone.now()
-        )
+        """
+        Cache one movie in the local database: fetched when missing or
+        outdated (older than STALE_AFTER_DAYS) and written with the same
+        upsert as cache_movies(). Raises Movie.DoesNotExist when a missing
+        movie could not be fetched.
+        """
+        movie = self.cache_movies([tmdb_id]).get(tmdb_id)
+        if movie is None:
+            raise Movie.DoesNotExist(f"TMDb movie {tmdb_id} could not be fetched")
         return movie
-    
-    def _update_movie_from_api(self, movie, data):
-        """Update existing movie with API data"""
-        movie.title = data['title']
-        movie.overview = data.get('overview', '')
-        movie.poster_path = data.get('poster_path', '')
-        movie.runtime = data.get('runtime')
-        movie.tmdb_vote_average = data.get('vote_average', 0)
-        movie.tmdb_vote_count = data.get('vote_count', 0)
-        movie.last_synced = timezone.now()
-        movie.save()
-        return movie
\ No newline at end of file
+
+    def cache_movies(self, tmdb_ids, is_upcoming=None, force=False):
+        """
+        Cache many movies at once.
+        Existing rows are loaded with a single query; details for missing or
+        outdated movies (every movie with force=True) are fetched concurrently
+        and written with one bulk upsert. With force=True existing rows are
+        revalidated and only rewritten when TMDb returns a changed body, not
+        on a 304. Pass is_upcoming to set the flag on every movie in the same
+        pass.
+        Returns the cached Movie objects keyed by tmdb_id.
+        """
+        tmdb_ids = list(dict.fromkeys(tmdb_ids))
+        movies = {m.tmdb_id: m for m in Movie.objects.filter(tmdb_id__in=tmdb_ids)}
+
+        now = timezone.now()
+        to_fetch = [
+            tmdb_id for tmdb_id in tmdb_ids
+            if force or tmdb_id not in movies or (now - movies[tmdb_id].last_synced).days > STALE_AFTER_DAYS
+        ]
+        details = self.map_concurrently(
+            lambda tmdb_id: self.get_movie_details(tmdb_id, revalidate=force, if_modified=tmdb_id in movies),
+            to_fetch,
+        )
+        details = {tmdb_id: data for tmdb_id, data in details.items() if data is not None}
+
+        with transaction.atomic():
+            movies.update(self.ingest_movies(details.values(), is_upcoming=is_upcoming, existing=movies))
+
+            if is_upcoming is not None:
+                # Fresh rows were not re-fetched, flag them with one UPDATE
+                fresh_ids = [tmdb_id for tmdb_id in movies if tmdb_id not in details]
+                Movie.objects.filter(tmdb_id__in=fresh_ids).update(is_upcoming=is_upcoming)
+                for tmdb_id in fresh_ids:
+                    movies[tmdb_id].is_upcoming = is_upcoming
+
+        return movies
+
+    def ingest_movies(self, payloads, is_upcoming=None, existing=None):
+        """
+        Upsert a page of TMDb movie detail payloads in a single statement.
+        Existing primary keys are resolved with one tmdb_id__in query (or taken
+        from `existing`) so the returned objects match the stored rows.
+        Returns {tmdb_id: Movie}.
+        """
+        mapped = [self._movie_fields_from_api(data) for data in payloads if data.get('id')]
+        mapped = [fields for fields in mapped if fields['title']]
+        if not mapped:
+            return {}
+
+        if existing is None:
+            existing = Movie.objects.filter(tmdb_id__in=[fields['tmdb_id'] for fields in mapped]).only('id', 'tmdb_id')
+            existing = {m.tmdb_id: m for m in existing}
+
+        rows = []
+        for fields in mapped:
+            if is_upcoming is not None:
+                fields['is_upcoming'] = is_upcoming
+            movie = Movie(**fields)
+            if fields['tmdb_id'] in existing:
+                movie.id = existing[fields['tmdb_id']].id
+            rows.append(movie)
+
+        update_fields = MOVIE_SYNC_FIELDS + (['is_upcoming'] if is_upcoming is not None else [])
+        with transaction.atomic():
+            Movie.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['tmdb_id'],
+                update_fields=update_fields,
+            )
+        return {movie.tmdb_id: movie for movie in rows}
+
+    def sync_upcoming_movies(self, tmdb_ids):
+        """
+        Flag exactly `tmdb_ids` as upcoming: cache/flag them in one pass and
+        clear the flag on every other movie with a single UPDATE.
+        """
+        with transaction.atomic():
+            movies = self.cache_movies(tmdb_ids, is_upcoming=True)
+            Movie.objects.filter(is_upcoming=True).exclude(tmdb_id__in=list(movies)).update(is_upcoming=False)
+        return movies
+
+    def _movie_fields_from_api(self, data):
+        """Map a TMDb movie payload onto Movie model fields"""
+        return {
+            'tmdb_id': data['id'],
+            'title': data.get('title') or data.get('original_title') or '',
+            'original_title': data.get('original_title') or '',
+            'overview': data.get('overview') or '',
+            'poster_path': data.get('poster_path') or '',
+            'backdrop_path': data.get('backdrop_path') or '',
+            'release_date': parse_release_date(data.get('release_date')),
+            'runtime': data.get('runtime'),
+            'genres': [g['id'] for g in data['genres']] if 'genres' in data else data.get('genre_ids', []),
+            'original_language': data.get('original_language') or 'en',
+            'tmdb_vote_average': data.get('vote_average') or 0,
+            'tmdb_vote_count': data.get('vote_count') or 0,
+            'last_synced': timezone.now(),
+        }
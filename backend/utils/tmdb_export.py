@@ -0,0 +1,218 @@
+"""
+Bulk import of TMDb export files into the movies table.
+
+Accepts either a TMDb daily ID export (movie_ids_MM_DD_YYYY.json.gz, one
+{"id", "original_title", "adult", ...} object per line) or any JSON-lines
+dump of /movie/{id} payloads, plain or gzipped. Rows stream through a
+generator pipeline so memory stays flat regardless of file size:
+
+    read_lines -> parse_rows -> movies_from_rows -> chunked -> loader
+
+Full payloads are upserted. ID-export rows only carry an id and a title,
+so they are inserted as skeletons (existing rows are left alone) with a
+last_synced far enough in the past that cache_movie fills in the details
+the first time the movie is touched.
+"""
+
+import gzip
+import io
+import itertools
+import json
+import logging
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.movies.models import Movie
+from utils.tmdb_client import MOVIE_SYNC_FIELDS, TMDbClient
+
+logger = logging.getLogger(__name__)
+
+NEVER_SYNCED = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+_CHAR_LIMITS = {
+    field.name: field.max_length
+    for field in Movie._meta.concrete_fields
+    if field.get_internal_type() == 'CharField'
+}
+
+
+def open_export(path):
+    """Open a (possibly gzipped) export file for text reading"""
+    with open(path, 'rb') as fh:
+        gzipped = fh.read(2) == b'\x1f\x8b'
+    if gzipped:
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def read_lines(fh, skip=0):
+    """Yield (line_number, line) pairs, skipping the first `skip` lines unparsed"""
+    return itertools.islice(enumerate(fh, start=1), skip, None)
+
+
+def parse_rows(lines, stats):
+    """Decode JSON lines, counting blank and malformed ones as skipped"""
+    for line_number, line in lines:
+        stats['last_line'] = line_number
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            stats['skipped'] += 1
+            logger.debug("Malformed JSON on line %s", line_number)
+            continue
+        yield line_number, row
+
+
+def movies_from_rows(rows, stats, client=None):
+    """
+    Validate rows and map them onto Movie instances with the same field
+    mapping the API sync uses. Yields (line_number, movie, is_full_payload).
+    """
+    client = client or TMDbClient()
+    for line_number, row in rows:
+        if not isinstance(row, dict) or row.get('adult'):
+            stats['skipped'] += 1
+            continue
+        tmdb_id = row.get('id')
+        if not isinstance(tmdb_id, int) or tmdb_id <= 0:
+            stats['skipped'] += 1
+            continue
+
+        fields = client._movie_fields_from_api(row)
+        if not fields['title']:
+            stats['skipped'] += 1
+            continue
+        for name, limit in _CHAR_LIMITS.items():
+            if name in fields:
+                fields[name] = str(fields[name])[:limit]
+
+        is_full = 'title' in row
+        if not is_full:
+            fields['last_synced'] = NEVER_SYNCED
+        yield line_number, Movie(**fields), is_full
+
+
+def chunked(movies, size):
+    """
+    Group the stream into chunks of at most `size` movies, de-duplicated by
+    tmdb_id (last row wins) so one upsert never touches a row twice.
+    Yields (last_line_number, full_movies, skeleton_movies).
+    """
+    chunk, last_line = {}, 0
+    for line_number, movie, is_full in movies:
+        chunk[movie.tmdb_id] = (movie, is_full)
+        last_line = line_number
+        if len(chunk) >= size:
+            yield _split(last_line, chunk)
+            chunk = {}
+    if chunk:
+        yield _split(last_line, chunk)
+
+
+def _split(last_line, chunk):
+    full = [movie for movie, is_full in chunk.values() if is_full]
+    skeletons = [movie for movie, is_full in chunk.values() if not is_full]
+    return last_line, full, skeletons
+
+
+class BulkCreateLoader:
+    """Chunked bulk_create upserts; works on every database backend"""
+
+    def load(self, full, skeletons):
+        if full:
+            Movie.objects.bulk_create(
+                full,
+                update_conflicts=True,
+                unique_fields=['tmdb_id'],
+                update_fields=MOVIE_SYNC_FIELDS,
+            )
+        if skeletons:
+            Movie.objects.bulk_create(skeletons, ignore_conflicts=True)
+
+
+class CopyLoader:
+    """
+    PostgreSQL COPY into a temporary staging table, then a single
+    INSERT ... SELECT ... ON CONFLICT per chunk. Must run inside a transaction.
+    """
+
+    staging_table = 'movies_import_staging'
+
+    def __init__(self):
+        self.fields = Movie._meta.concrete_fields
+        self.columns = ', '.join(connection.ops.quote_name(f.column) for f in self.fields)
+        self.updates = ', '.join(
+            f'{name} = EXCLUDED.{name}'
+            for name in (connection.ops.quote_name(Movie._meta.get_field(f).column) for f in MOVIE_SYNC_FIELDS)
+        )
+
+    def load(self, full, skeletons):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {self.staging_table} '
+                f'(LIKE {Movie._meta.db_table} INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            for movies, conflict in ((full, f'DO UPDATE SET {self.updates}'), (skeletons, 'DO NOTHING')):
+                if not movies:
+                    continue
+                cursor.execute(f'TRUNCATE {self.staging_table}')
+                cursor.cursor.copy_expert(
+                    f'COPY {self.staging_table} ({self.columns}) FROM STDIN WITH (FORMAT csv)',
+                    self._to_csv(movies),
+                )
+                cursor.execute(
+                    f'INSERT INTO {Movie._meta.db_table} ({self.columns}) '
+                    f'SELECT {self.columns} FROM {self.staging_table} '
+                    f'ON CONFLICT (tmdb_id) {conflict}'
+                )
+
+    def _to_csv(self, movies):
+        now = timezone.now()
+        buffer = io.StringIO()
+        for movie in movies:
+            buffer.write(','.join(
+                self._csv_field(self._csv_value(field, movie, now)) for field in self.fields
+            ) + '\n')
+        buffer.seek(0)
+        return buffer
+
+    def _csv_field(self, value):
+        """
+        COPY ... (FORMAT csv) reads an unquoted empty field as NULL and a
+        quoted one ("") as an empty string, so strings are always quoted and
+        None is left bare. (csv.QUOTE_NONNUMERIC would quote None as "" too.)
+        """
+        if value is None:
+            return ''
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return '"' + str(value).replace('"', '""') + '"'
+
+    def _csv_value(self, field, movie, now):
+        if getattr(field, 'auto_now', False):
+            return now.isoformat()
+        value = getattr(movie, field.attname)
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+
+def get_loader(use_copy=None):
+    """COPY on PostgreSQL (unless disabled), chunked bulk_create elsewhere"""
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    if use_copy and connection.vendor != 'postgresql':
+        raise ValueError("COPY loading requires PostgreSQL")
+    return CopyLoader() if use_copy else BulkCreateLoader()
@@ -0,0 +1,167 @@
+"""
+Local stand-in for the TMDb API.
+
+Serves deterministic, TMDb-shaped payloads from a background thread so the
+sync pipeline can be exercised and benchmarked offline:
+
+    with TMDbStubServer(latency=0.05) as stub:
+        with override_settings(TMDB_BASE_URL=stub.base_url):
+            update_popular_movies()
+        print(stub.request_count)
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAGE_SIZE = 20
+TOTAL_PAGES = 500
+
+
+def movie_payload(tmdb_id):
+    """Detail payload in the shape returned by /movie/{id}"""
+    return {
+        'id': tmdb_id,
+        'title': f'Stub Movie {tmdb_id}',
+        'original_title': f'Stub Movie {tmdb_id}',
+        'overview': f'Overview for stub movie {tmdb_id}.',
+        'poster_path': f'/poster_{tmdb_id}.jpg',
+        'backdrop_path': f'/backdrop_{tmdb_id}.jpg',
+        'release_date': f'20{tmdb_id % 25:02d}-01-01',
+        'runtime': 80 + tmdb_id % 90,
+        'genres': [{'id': 28, 'name': 'Action'}, {'id': 18 + tmdb_id % 3, 'name': 'Drama'}],
+        'original_language': 'en',
+        'vote_average': round((tmdb_id % 100) / 10, 1),
+        'vote_count': tmdb_id * 3,
+    }
+
+
+def list_payload(page, offset=0):
+    """Paged list payload in the shape returned by /movie/popular and friends"""
+    first_id = offset + (page - 1) * PAGE_SIZE + 1
+    return {
+        'page': page,
+        'total_pages': TOTAL_PAGES,
+        'total_results': TOTAL_PAGES * PAGE_SIZE,
+        'results': [
+            {'id': tmdb_id, 'title': f'Stub Movie {tmdb_id}', 'genre_ids': [28]}
+            for tmdb_id in range(first_id, first_id + PAGE_SIZE)
+        ],
+    }
+
+
+def changes_payload(page, total_pages=3, per_page=100):
+    """Changes feed payload in the shape returned by /movie/changes"""
+    first_id = (page - 1) * per_page + 1
+    return {
+        'page': page,
+        'total_pages': total_pages,
+        'total_results': total_pages * per_page,
+        'results': [{'id': tmdb_id, 'adult': False} for tmdb_id in range(first_id, first_id + per_page)],
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection pooling is measurable
+
+    routes = [
+        (re.compile(r'/movie/popular$'), lambda qs: list_payload(int(qs.get('page', 1)))),
+        (re.compile(r'/movie/changes$'), lambda qs: changes_payload(int(qs.get('page', 1)))),
+        (re.compile(r'/movie/upcoming$'), lambda qs: list_payload(int(qs.get('page', 1)), offset=100_000)),
+        (re.compile(r'/search/movie$'), lambda qs: list_payload(int(qs.get('page', 1)))),
+        (re.compile(r'/discover/movie$'), lambda qs: list_payload(int(qs.get('page', 1)))),
+    ]
+    detail_route = re.compile(r'/movie/(\d+)$')
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        url = urlparse(self.path)
+        path = url.path[len(server.prefix):]
+        qs = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        payload = None
+        match = self.detail_route.match(path)
+        if match:
+            payload = movie_payload(int(match.group(1)))
+        else:
+            for pattern, handler in self.routes:
+                if pattern.match(path):
+                    payload = handler(qs)
+                    break
+
+        if payload is None:
+            self._send(404, {'status_code': 34, 'status_message': 'The resource you requested could not be found.'})
+        else:
+            self._send(200, payload)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            with self.server.lock:
+                self.server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TMDbStubServer:
+    """Threaded HTTP server bound to localhost on a free port"""
+
+    def __init__(self, latency=0.0, prefix='/3'):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.prefix = prefix
+        self.httpd.request_count = 0
+        self.httpd.not_modified_count = 0
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}{self.httpd.prefix}'
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    @property
+    def not_modified_count(self):
+        return self.httpd.not_modified_count
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()